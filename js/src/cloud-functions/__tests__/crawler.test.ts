@@ -449,3 +449,86 @@ describe('CrawlerHost Index Page', () => {
     expect(responseString).to.include('/https://example.com');
   });
 });
+
+describe('CrawlerHost multi-mode X-Respond-With', () => {
+  it('should split, trim and lowercase a comma separated mode list', async () => {
+    const { CrawlerHost } = await import('../crawler.js');
+
+    expect(CrawlerHost.requestedModes('markdown, HTML ,screenshot')).to.deep.equal(['markdown', 'html', 'screenshot']);
+    expect(CrawlerHost.requestedModes('text')).to.deep.equal(['text']);
+  });
+
+  it('should fall back to default for missing or empty values', async () => {
+    const { CrawlerHost } = await import('../crawler.js');
+
+    expect(CrawlerHost.requestedModes(undefined)).to.deep.equal(['default']);
+    expect(CrawlerHost.requestedModes('')).to.deep.equal(['default']);
+    expect(CrawlerHost.requestedModes(' , ,')).to.deep.equal(['default']);
+  });
+
+  it('should drop duplicate modes and keep unknown ones in request order', async () => {
+    const { CrawlerHost } = await import('../crawler.js');
+
+    expect(CrawlerHost.requestedModes('html,markdown,HTML,html')).to.deep.equal(['html', 'markdown']);
+    expect(CrawlerHost.requestedModes('markdown,bogus')).to.deep.equal(['markdown', 'bogus']);
+  });
+
+  it('should bundle every mode from one snapshot with the JSON metadata', async () => {
+    const { CrawlerHost } = await import('../crawler.js');
+    const crawlerHost = new CrawlerHost(
+      mockPuppeteerControl,
+      mockJSDomControl,
+      mockPDFExtractor,
+      mockRobotsChecker,
+      mockFirebaseStorage,
+      mockThreadLocal
+    );
+
+    const snapshot = {
+      title: 'Test Page',
+      href: 'https://example.com/',
+      html: '<html><body><p>Hi</p></body></html>',
+      text: 'Hi',
+      parsed: { title: 'Test Page', content: 'Hi', excerpt: 'A test page', lang: 'en', siteName: 'Example', byline: 'Tester' },
+      imgs: []
+    } as any;
+    const page = (mode: string) => ({
+      title: 'Test Page',
+      url: 'https://example.com/',
+      content: `${mode} body`,
+      screenshotUrl: mode === 'screenshot' ? '/instant-screenshots/shot.png' : undefined,
+      toString() { return `${mode} body`; }
+    }) as any;
+
+    // Every mode after the first is rendered from the same snapshot, once
+    const formattedModes: string[] = [];
+    (crawlerHost as any).formatSnapshot = async (mode: string, snap: any) => {
+      expect(snap).to.equal(snapshot);
+      formattedModes.push(mode);
+      return page(mode);
+    };
+
+    const mockRes = new MockResponse();
+    const modes = CrawlerHost.requestedModes('markdown,html,screenshot,html');
+    await (crawlerHost as any).sendBundleResponse(mockRes, modes, { snapshot, formatted: page('markdown') }, new URL('https://example.com/'));
+
+    expect(formattedModes).to.deep.equal(['html', 'screenshot', 'default']);
+    expect(mockRes.getContentType()).to.equal('application/json');
+
+    const responseData = mockRes.getData();
+    expect(responseData).to.have.property('code', 200);
+    expect(responseData).to.have.property('status', 20000);
+
+    const data = responseData.data;
+    expect(data).to.have.property('title', 'Test Page');
+    expect(data).to.have.property('url', 'https://example.com/');
+    expect(data).to.have.property('content', 'default body');
+    expect(data.metadata).to.have.property('og:site_name', 'Example');
+    expect(data.metadata).to.have.property('article:author', 'Tester');
+    expect(data.formats).to.deep.equal({
+      markdown: 'markdown body',
+      html: 'html body',
+      screenshot: '/instant-screenshots/shot.png'
+    });
+  });
+});
@@ -876,6 +876,86 @@ curl -H "X-Respond-With: screenshot" "${baseUrl}/https://example.com"
         }
     }
 
+    /**
+     * Splits X-Respond-With into its requested modes. A comma separated list
+     * (e.g. "markdown,html,screenshot") asks for a bundle of several
+     * representations rendered from a single crawl.
+     */
+    static requestedModes(respondWith: string | undefined): string[] {
+        const modes = (respondWith || 'default')
+            .split(',')
+            .map((mode) => mode.trim().toLowerCase())
+            .filter((mode) => mode.length > 0);
+
+        return modes.length ? _.uniq(modes) : ['default'];
+    }
+
+    private buildJsonData(formatted: FormattedPage, snapshot?: PageSnapshot) {
+        const lang = snapshot?.parsed?.lang || 'en';
+        const description = snapshot?.parsed?.excerpt || formatted.title;
+        const siteName = snapshot?.parsed?.siteName || '';
+        const byline = snapshot?.parsed?.byline || '';
+
+        return {
+            title: formatted.title,
+            description: description,
+            url: formatted.url,
+            content: formatted.content,
+            links: formatted.links || {},
+            images: formatted.images || {},
+            metadata: {
+                lang: lang,
+                description: description,
+                'og:title': formatted.title,
+                'og:description': description,
+                'og:type': 'website',
+                'og:url': formatted.url,
+                'og:site_name': siteName,
+                'article:author': byline,
+                'article:published_time': formatted.publishedTime || '',
+                viewport: 'width=device-width, initial-scale=1.0'
+            },
+            usage: {
+                tokens: Math.ceil((formatted.content?.length || 0) / 4)
+            }
+        };
+    }
+
+    /**
+     * Formats one snapshot in every requested mode and returns them together,
+     * alongside the regular JSON metadata, so clients needing several
+     * representations pay for a single browser render.
+     */
+    private async sendBundleResponse(
+        res: Response,
+        modes: string[],
+        result: { snapshot: PageSnapshot; formatted: FormattedPage },
+        parsedUrl: URL
+    ): Promise<any> {
+        const rendered = new Map<string, FormattedPage>([[modes[0], result.formatted]]);
+        const render = async (mode: string) => {
+            if (!rendered.has(mode)) {
+                rendered.set(mode, await this.formatSnapshot(mode, result.snapshot, parsedUrl));
+            }
+            return rendered.get(mode)!;
+        };
+
+        const formats: { [mode: string]: string | undefined } = {};
+        for (const mode of modes) {
+            const formatted = await render(mode);
+            if (mode === 'screenshot') {
+                formats[mode] = formatted.screenshotUrl;
+            } else if (mode === 'pageshot') {
+                formats[mode] = formatted.pageshotUrl;
+            } else {
+                formats[mode] = formatted.toString();
+            }
+        }
+
+        const data = { ...this.buildJsonData(await render('default'), result.snapshot), formats };
+        return sendResponse(res, { code: 200, status: 20000, data }, { contentType: 'application/json' });
+    }
+
     private sendFormattedResponse(res: Response, formatted: FormattedPage, respondWith: string, snapshot?: PageSnapshot): any {
         const acceptHeader = this.threadLocal.get('accept') || '';
         const returnFormat = this.threadLocal.get('x-return-format') || '';
@@ -889,37 +969,10 @@ curl -H "X-Respond-With: screenshot" "${baseUrl}/https://example.com"
         }
 
         if (wantsJson) {
-            const lang = snapshot?.parsed?.lang || 'en';
-            const description = snapshot?.parsed?.excerpt || formatted.title;
-            const siteName = snapshot?.parsed?.siteName || '';
-            const byline = snapshot?.parsed?.byline || '';
-
             const jsonResponse = {
                 code: 200,
                 status: 20000,
-                data: {
-                    title: formatted.title,
-                    description: description,
-                    url: formatted.url,
-                    content: formatted.content,
-                    links: formatted.links || {},
-                    images: formatted.images || {},
-                    metadata: {
-                        lang: lang,
-                        description: description,
-                        'og:title': formatted.title,
-                        'og:description': description,
-                        'og:type': 'website',
-                        'og:url': formatted.url,
-                        'og:site_name': siteName,
-                        'article:author': byline,
-                        'article:published_time': formatted.publishedTime || '',
-                        viewport: 'width=device-width, initial-scale=1.0'
-                    },
-                    usage: {
-                        tokens: Math.ceil((formatted.content?.length || 0) / 4)
-                    }
-                },
+                data: this.buildJsonData(formatted, snapshot),
                 meta: {
                     usage: {
                         tokens: Math.ceil((formatted.content?.length || 0) / 4)
@@ -1046,7 +1099,7 @@ curl -H "X-Respond-With: screenshot" "${baseUrl}/https://example.com"
         return {
             proxyUrl: opts.proxyUrl,
             cookies: cookies,
-            favorScreenshot: ['screenshot', 'pageshot'].includes(opts.respondWith),
+            favorScreenshot: CrawlerHost.requestedModes(opts.respondWith).some((mode) => ['screenshot', 'pageshot'].includes(mode)),
             removeSelector: opts.removeSelector,
             targetSelector: opts.targetSelector,
             waitForSelector: opts.waitForSelector,
@@ -1377,7 +1430,7 @@ curl -H "X-Respond-With: screenshot" "${baseUrl}/https://example.com"
             }
 
             if (crawlerOptions.timeout === undefined) {
-                const formatted = await this.formatSnapshot(crawlerOptions.respondWith, scrapped, parsedUrl);
+                const formatted = await this.formatSnapshot(CrawlerHost.requestedModes(crawlerOptions.respondWith)[0], scrapped, parsedUrl);
                 return { snapshot: scrapped, formatted };
             }
         }
@@ -1386,7 +1439,7 @@ curl -H "X-Respond-With: screenshot" "${baseUrl}/https://example.com"
             return null;
         }
 
-        const formatted = await this.formatSnapshot(crawlerOptions.respondWith, lastScrapped, parsedUrl);
+        const formatted = await this.formatSnapshot(CrawlerHost.requestedModes(crawlerOptions.respondWith)[0], lastScrapped, parsedUrl);
         return { snapshot: lastScrapped, formatted };
     }
 
@@ -1409,7 +1462,7 @@ curl -H "X-Respond-With: screenshot" "${baseUrl}/https://example.com"
                 text: `Failed to access the page due to an invalid domain or TLD: ${parsedUrl.toString()}`,
                 error: 'Invalid domain or TLD'
             };
-            const formatted = await this.formatSnapshot(crawlerOptions.respondWith, errorSnapshot, parsedUrl);
+            const formatted = await this.formatSnapshot(CrawlerHost.requestedModes(crawlerOptions.respondWith)[0], errorSnapshot, parsedUrl);
             return { snapshot: errorSnapshot, formatted };
         }
 
@@ -1472,6 +1525,11 @@ curl -H "X-Respond-With: screenshot" "${baseUrl}/https://example.com"
                 return sendResponse(res, 'No content available', { contentType: 'text/plain', code: 404 });
             }
 
+            const requestedModes = CrawlerHost.requestedModes(crawlerOptions.respondWith);
+            if (requestedModes.length > 1) {
+                return this.sendBundleResponse(res, requestedModes, result, parsedUrl);
+            }
+
             return this.sendFormattedResponse(res, result.formatted, crawlerOptions.respondWith, result.snapshot);
 
         } catch (error) {
@@ -8,7 +8,7 @@ import { parseString as parseSetCookieString } from 'set-cookie-parser';
         operation: {
             parameters: {
                 'Accept': { description: 'Preferred response format', in: 'header', schema: { type: 'string' } },
-                'X-Respond-With': { description: 'Preferred response form (markdown|html|text|pageshot|screenshot)', in: 'header', schema: { type: 'string' } },
+                'X-Respond-With': { description: 'Preferred response form (markdown|html|text|pageshot|screenshot), or a comma separated list for a JSON bundle', in: 'header', schema: { type: 'string' } },
                 'X-Wait-For-Selector': { description: 'CSS selector to wait for', in: 'header', schema: { type: 'string' } },
                 'X-Target-Selector': { description: 'CSS selector to extract only', in: 'header', schema: { type: 'string' } },
                 'X-Remove-Selector': { description: 'CSS selector to remove from output', in: 'header', schema: { type: 'string' } },
@@ -50,53 +50,47 @@ console.log('CrawlerHost initialized successfully');
 // Define concurrency middleware
 let activeRequests = 0;
 const maxConcurrent = 3; // Adjust as needed
+// Lifetime request counters reported by /queue (reset by /queue/reset)
+const requestCounters = { total: 0, completed: 0, failed: 0, rejected: 0 };
 const concurrencyMiddleware = (req, res, next) => {
+  requestCounters.total++;
   if (activeRequests >= maxConcurrent) {
+    requestCounters.rejected++;
     res.status(429).json({ error: 'Too many requests' });
     return;
   }
   activeRequests++;
-  res.on('finish', () => {
+  let released = false;
+  const release = () => {
+    // 'finish' never fires when the client disconnects early, so also listen for 'close'
+    if (released) return;
+    released = true;
     activeRequests--;
-  });
+    if (res.writableFinished && res.statusCode < 400) {
+      requestCounters.completed++;
+    } else {
+      requestCounters.failed++;
+    }
+  };
+  res.on('finish', release);
+  res.on('close', release);
   next();
 };
 
 app.use(express.json());
 
-// Global concurrency middleware
-app.use(concurrencyMiddleware);
-
-// Serve static files from the public directory
-app.use(express.static(path.join(__dirname, '..', 'public')));
-
-// Also serve static files with a base path for proxy compatibility
-app.use('/dearreader', express.static(path.join(__dirname, '..', 'public')));
-
-// Serve static files from the local-storage directory (prefer Docker mount /app/local-storage, fallback to project storage/)
-const externalStoragePath = path.join('/app', 'local-storage', 'instant-screenshots');
-const localStoragePath = path.join(__dirname, '..', '..', 'storage', 'instant-screenshots');
-const storageToServe = fs.existsSync(path.join('/app', 'local-storage')) ? externalStoragePath : localStoragePath;
-if (!fs.existsSync(storageToServe)) {
-  try {
-    fs.mkdirSync(storageToServe, { recursive: true });
-  } catch (e) {
-    console.warn('Could not create storage directory:', storageToServe, e);
-  }
-}
-app.use('/instant-screenshots', express.static(storageToServe));
-
 // Queue status endpoint
 app.get('/queue', (req, res) => {
   try {
     // Get queue statistics from crawlerHost if it has a queue manager
     const queueStats = {
-      total_requests: Math.floor(Math.random() * 1000) + 50, // Mock some realistic data
-      active_requests: Math.floor(Math.random() * 4), // 0-3 active requests
-      pending_requests: Math.floor(Math.random() * 10), // 0-9 pending
-      completed_requests: Math.floor(Math.random() * 900) + 40,
-      failed_requests: Math.floor(Math.random() * 20),
-      max_concurrent: 3,  // From config
+      total_requests: requestCounters.total,
+      active_requests: activeRequests,
+      pending_requests: 0, // Excess requests are rejected with 429, never queued
+      completed_requests: requestCounters.completed,
+      failed_requests: requestCounters.failed,
+      rejected_requests: requestCounters.rejected,
+      max_concurrent: maxConcurrent,
       status: 'operational',
       timestamp: new Date().toISOString(),
       uptime: process.uptime(),
@@ -115,12 +109,13 @@ app.get('/dearreader/queue', (req, res) => {
   try {
     // Get queue statistics from crawlerHost if it has a queue manager
     const queueStats = {
-      total_requests: Math.floor(Math.random() * 1000) + 50, // Mock some realistic data
-      active_requests: Math.floor(Math.random() * 4), // 0-3 active requests
-      pending_requests: Math.floor(Math.random() * 10), // 0-9 pending
-      completed_requests: Math.floor(Math.random() * 900) + 40,
-      failed_requests: Math.floor(Math.random() * 20),
-      max_concurrent: 3,  // From config
+      total_requests: requestCounters.total,
+      active_requests: activeRequests,
+      pending_requests: 0, // Excess requests are rejected with 429, never queued
+      completed_requests: requestCounters.completed,
+      failed_requests: requestCounters.failed,
+      rejected_requests: requestCounters.rejected,
+      max_concurrent: maxConcurrent,
       status: 'operational',
       timestamp: new Date().toISOString(),
       uptime: process.uptime(),
@@ -138,6 +133,7 @@ app.get('/dearreader/queue', (req, res) => {
 app.post('/queue/reset', (req, res) => {
   try {
     // Reset queue statistics
+    Object.assign(requestCounters, { total: 0, completed: 0, failed: 0, rejected: 0 });
     res.json({ message: 'Queue statistics reset successfully' });
   } catch (error: any) {
     console.error('Error resetting queue stats:', error);
@@ -149,6 +145,7 @@ app.post('/queue/reset', (req, res) => {
 app.post('/dearreader/queue/reset', (req, res) => {
   try {
     // Reset queue statistics
+    Object.assign(requestCounters, { total: 0, completed: 0, failed: 0, rejected: 0 });
     res.json({ message: 'Queue statistics reset successfully' });
   } catch (error: any) {
     console.error('Error resetting queue stats:', error);
@@ -186,6 +183,45 @@ app.get('/cache/stats', (req, res) => {
   }
 });
 
+// Rate limiting statistics endpoint
+app.get('/rate-limit/stats', (req, res) => {
+  try {
+    const apiKey = req.query.api_key as string;
+    if (!apiKey) {
+      return res.status(400).json({ error: 'api_key query parameter required' });
+    }
+
+    const stats = rateLimitService.getUsageStats(apiKey);
+    res.json(stats);
+  } catch (error: any) {
+    console.error('Error getting rate limit stats:', error);
+    res.status(500).json({ error: 'Failed to get rate limit statistics' });
+  }
+});
+
+// Global concurrency middleware. Mounted after the queue, health and stats routes
+// so probes and monitoring never take one of the maxConcurrent slots.
+app.use(concurrencyMiddleware);
+
+// Serve static files from the public directory
+app.use(express.static(path.join(__dirname, '..', 'public')));
+
+// Also serve static files with a base path for proxy compatibility
+app.use('/dearreader', express.static(path.join(__dirname, '..', 'public')));
+
+// Serve static files from the local-storage directory (prefer Docker mount /app/local-storage, fallback to project storage/)
+const externalStoragePath = path.join('/app', 'local-storage', 'instant-screenshots');
+const localStoragePath = path.join(__dirname, '..', '..', 'storage', 'instant-screenshots');
+const storageToServe = fs.existsSync(path.join('/app', 'local-storage')) ? externalStoragePath : localStoragePath;
+if (!fs.existsSync(storageToServe)) {
+  try {
+    fs.mkdirSync(storageToServe, { recursive: true });
+  } catch (e) {
+    console.warn('Could not create storage directory:', storageToServe, e);
+  }
+}
+app.use('/instant-screenshots', express.static(storageToServe));
+
 // Cache management endpoints
 app.post('/cache/clear', (req, res) => {
   try {
@@ -237,22 +273,6 @@ app.get('/tasks', (req, res) => {
   }
 });
 
-// Rate limiting statistics endpoint
-app.get('/rate-limit/stats', (req, res) => {
-  try {
-    const apiKey = req.query.api_key as string;
-    if (!apiKey) {
-      return res.status(400).json({ error: 'api_key query parameter required' });
-    }
-
-    const stats = rateLimitService.getUsageStats(apiKey);
-    res.json(stats);
-  } catch (error: any) {
-    console.error('Error getting rate limit stats:', error);
-    res.status(500).json({ error: 'Failed to get rate limit statistics' });
-  }
-});
-
 // Function to serve HTML with conditional base tag
 function serveHtmlWithBaseTag(filePath: string, res: express.Response) {
   fs.readFile(filePath, 'utf8', (err, data) => {
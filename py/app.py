@@ -28,24 +28,79 @@ Options:
     --debug          - If 'npm test' times out, re-runs it with no time limit
     --force          - Continues the pipeline even if some steps fail
     --no-cache       - Disables the Docker build cache (used with 'docker' command)
+    --profile DIR    - Writes per-step wall/CPU time, peak RSS and process counts to
+                       DIR/profile.json and a Chrome trace to DIR/trace.json
+    --no-skip        - Runs npm, pyright and the Docker build even when their inputs are
+                       unchanged since their last successful run
+    --jobs N         - Runs up to N independent pipeline steps at once (default: 4;
+                       --verbose runs them one at a time)
+
+Pipelines are dependency graphs: in 'all', pyright runs alongside the JS steps,
+the Docker build waits for npm test to finish so the two do not compete for
+CPU, and demo and speedtest wait for the container.
 """
 import argparse
 import os
+import queue
 import shlex
 import shutil
 import subprocess
 import sys
+import threading
 import time
-import select
+import urllib.error
+import urllib.request
 import webbrowser
 import yaml as yaml # Add yaml import
 import socket
 import psutil
-from typing import Tuple, Callable, Optional, Dict
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Tuple, Callable, Optional, Dict, List, Sequence, Union
+
+from build_cache import BuildCache
+from step_profiler import StepProfiler
 
 # --- Configuration ---
 DOCKER_IMAGE_NAME = "reader-app"
 DOCKER_CONTAINER_NAME = "reader-instance"
+DEFAULT_JOBS = 4  # Pipeline steps run at the same time
+OUTPUT_BUFFER_LINES = 5000  # Lines of stdout/stderr kept per captured command
+PIPE_GRACE_SECONDS = 2.0  # How long to keep reading after exit, in case children still hold the pipes
+TERMINATE_GRACE_SECONDS = 5.0  # SIGTERM -> SIGKILL; returns as soon as the processes are gone
+PORT_RELEASE_TIMEOUT = 10.0
+READY_TIMEOUT = 90.0  # Container start until /health/ready (Chromium included)
+READY_URL = "http://localhost:3000/health/ready"
+
+# Inputs of the cacheable steps (see build_cache.py); paths are relative to the project root
+STEP_INPUTS: Dict[str, Dict[str, Any]] = {
+    "npm install": {
+        "inputs": ["js/package.json", "js/package-lock.json"],
+        "tools": [["node", "--version"], ["npm", "--version"]],
+        "outputs": ["js/node_modules"],
+    },
+    "npm test": {
+        "inputs": ["js/package.json", "js/package-lock.json", "js/tsconfig*.json", "js/.mocharc*",
+                   "js/src/**", "js/test/**", "config.yaml", "crawl_pipeline.yaml"],
+        "tools": [["node", "--version"], ["npm", "--version"]],
+    },
+    "pyright": {
+        "inputs": ["py/**/*.py", "pyrightconfig.json", "py/pyproject.toml"],
+        "tools": [["pyright", "--version"]],
+    },
+    # node_modules and build output are kept out of the image context by .dockerignore
+    "docker build": {
+        "inputs": ["docker/Dockerfile", ".dockerignore", "js/**"],
+        "exclude": ["js/node_modules", "js/build", "js/build_test"],
+        "tools": [["docker", "--version"]],
+        "check": lambda: _docker_image_exists(),  # Defined with the build-cache helpers below
+    },
+}
+
+# Set by main(); None (the default, also in tests) runs every step
+BUILD_CACHE: Optional[BuildCache] = None
+# Set by main() for pipelines; records per-step time and resources
+PROFILER: Optional[StepProfiler] = None
 LOG_PREFIX = f"[{time.strftime('%Y-%m-%d %H:%M:%S')}]"
 
 def get_default_url_from_config():
@@ -77,14 +132,85 @@ def print_error(message: str) -> None:
 def print_warning(message: str) -> None:
     print(f"{Colors.YELLOW}{LOG_PREFIX} [WARN] {message}{Colors.ENDC}")
 
+def input_fingerprint(name: str) -> Optional[Dict[str, Any]]:
+    """Fingerprint a step's inputs before it runs; None without a usable build cache."""
+    if BUILD_CACHE is None:
+        return None
+    try:
+        return BUILD_CACHE.fingerprint(STEP_INPUTS[name])
+    except OSError as e:
+        print_warning(f"Could not fingerprint the inputs of '{name}': {e}")
+        return None
+
+def skip_unchanged(name: str, fingerprint: Optional[Dict[str, Any]]) -> bool:
+    """True (and say so) when a step's inputs match its last successful run."""
+    if BUILD_CACHE is None or fingerprint is None:
+        return False
+    if not BUILD_CACHE.is_fresh(name, STEP_INPUTS[name], fingerprint):
+        return False
+    print_success(f"⏭️  {name}: inputs unchanged since the last successful run; skipping (use --no-skip to run it).")
+    return True
+
+def record_success(name: str, fingerprint: Optional[Dict[str, Any]]) -> None:
+    """Remember the inputs a step saw when it started, after it succeeded."""
+    if BUILD_CACHE is not None and fingerprint is not None:
+        try:
+            BUILD_CACHE.record(name, fingerprint)
+        except OSError as e:
+            print_warning(f"Could not update the build cache for '{name}': {e}")
+
+def _docker_image_exists() -> bool:
+    """True when the image a cached 'docker build' produced is still there."""
+    try:
+        return subprocess.run(["docker", "image", "inspect", DOCKER_IMAGE_NAME], stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL, timeout=30).returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+# --- Waiting helpers ---
+def wait_for(condition: Callable[[], bool], timeout: float, interval: float = 0.05,
+             max_interval: float = 1.0) -> bool:
+    """Poll `condition` with exponential backoff; True as soon as it holds, False at the deadline."""
+    deadline = time.monotonic() + timeout
+    while True:
+        if condition():
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
+
+def wait_until_ready(url: str = READY_URL, timeout: float = READY_TIMEOUT) -> bool:
+    """Poll a readiness endpoint with backoff until it answers 200 or the deadline passes."""
+    return wait_for(lambda: is_ready(url), timeout)
+
+def is_ready(url: str = READY_URL) -> bool:
+    """True when the readiness endpoint answers 200."""
+    try:
+        with urllib.request.urlopen(url, timeout=2) as response:
+            return response.status == 200
+    except (urllib.error.URLError, OSError, ValueError):
+        return False  # Not listening yet, 503 while starting, or reset mid-startup
+
 # --- Helper for process termination (moved above run_cmd) ---
 def _terminate_process_group(proc: subprocess.Popen):
-    """Helper to terminate a process and its children, platform-aware."""
+    """Helper to terminate a process and its children, platform-aware.
+
+    Sends SIGTERM, then SIGKILL only to processes still alive after
+    TERMINATE_GRACE_SECONDS; returns as soon as they have all exited.
+    """
     if sys.platform != "win32":
         try:
+            try:
+                leader = psutil.Process(proc.pid)
+                tree = [leader] + leader.children(recursive=True)
+            except psutil.NoSuchProcess:
+                tree = []
             os.killpg(os.getpgid(proc.pid), 15)  # SIGTERM
-            time.sleep(1)
-            os.killpg(os.getpgid(proc.pid), 9)  # SIGKILL
+            _, alive = psutil.wait_procs(tree, timeout=TERMINATE_GRACE_SECONDS)
+            if alive:
+                os.killpg(os.getpgid(proc.pid), 9)  # SIGKILL
         except ProcessLookupError:
             pass  # Process already finished
         except Exception as e:
@@ -92,30 +218,83 @@ def _terminate_process_group(proc: subprocess.Popen):
     else: # Windows
         try:
             proc.terminate()
-            time.sleep(1)
-            proc.kill()
+            try:
+                proc.wait(timeout=TERMINATE_GRACE_SECONDS)
+            except subprocess.TimeoutExpired:
+                proc.kill()
         except ProcessLookupError:
             pass  # Process already finished
         except Exception as e:
             print_error(f"Failed to kill process on Windows: {e}")
+    try:
+        proc.wait(timeout=TERMINATE_GRACE_SECONDS)  # Reap it
+    except subprocess.TimeoutExpired:
+        pass
 
 # --- Core Execution Logic ---
+class OutputRing:
+    """Ring buffer keeping the last `max_lines` lines of a command's output."""
+
+    def __init__(self, max_lines: int = OUTPUT_BUFFER_LINES):
+        self.lines: deque = deque(maxlen=max_lines)
+        self.dropped = 0
+
+    def append(self, line: str) -> None:
+        if len(self.lines) == self.lines.maxlen:
+            self.dropped += 1
+        self.lines.append(line)
+
+    def text(self) -> str:
+        head = f"[... {self.dropped} earlier lines dropped ...]\n" if self.dropped else ""
+        return head + "".join(self.lines)
+
+def _pump_lines(stream, name: str, lines: "queue.Queue[Tuple[str, Optional[str]]]") -> None:
+    """Reader thread: forward every line of a pipe, then None at EOF."""
+    try:
+        for line in stream:
+            lines.put((name, line))
+    except (OSError, ValueError):
+        pass  # Pipe closed underneath us
+    finally:
+        lines.put((name, None))
+
 def run_cmd(
-    cmd: list, cwd: Optional[str] = None, timeout: Optional[int] = None, live: bool = False
+    cmd: list, cwd: Optional[str] = None, timeout: Optional[int] = None, live: bool = False,
+    log_file: Optional[str] = None, echo: bool = False,
+    on_line: Optional[Callable[[str, str], None]] = None, max_lines: int = OUTPUT_BUFFER_LINES,
 ) -> Tuple[int, str, str]:
     """
     Executes a command, captures its output, and handles timeouts gracefully.
     REFACTORED: Now consistently takes a list of arguments for better security and clarity.
+
+    In capture mode stdout and stderr are drained continuously by reader threads,
+    so a chatty command can never block on a full pipe. The last `max_lines` lines
+    of each stream are returned. Every line can also be appended to `log_file`,
+    echoed to the console (`echo`), and passed to `on_line(stream, line)`, where
+    stream is "stdout" or "stderr". The callback runs on the calling thread.
+    On timeout the output captured so far is returned with exit code 124.
     """
     if not isinstance(cmd, list):
         raise TypeError("The 'cmd' argument must be a list of strings.")
 
     print(f"  └─ Running: {' '.join(shlex.quote(c) for c in cmd)}")
 
+    code, out, err = _execute(cmd, cwd, timeout, live, log_file, echo, on_line, max_lines)
+    if PROFILER is not None:
+        PROFILER.finish(code)
+    return code, out, err
+
+def _execute(
+    cmd: list, cwd: Optional[str], timeout: Optional[int], live: bool, log_file: Optional[str],
+    echo: bool, on_line: Optional[Callable[[str, str], None]], max_lines: int,
+) -> Tuple[int, str, str]:
+    """The body of run_cmd: start the command and collect its exit code and output."""
     preexec_fn = os.setsid if sys.platform != "win32" else None
 
     if live:
         proc = subprocess.Popen(cmd, cwd=cwd, preexec_fn=preexec_fn)
+        if PROFILER is not None:
+            PROFILER.track(proc.pid, cmd)
         try:
             proc.wait(timeout=timeout)
             return int(proc.returncode), "", ""
@@ -123,50 +302,64 @@ def run_cmd(
             print_warning(f"Command timed out after {timeout}s. Terminating process group...")
             _terminate_process_group(proc)
             return 124, "", ""
-    else:
-        # Special handling for npm/node commands that might not flush properly
-        if cmd and cmd[0] in ['npm', 'node', 'npx']:
-            # Use a different approach for Node.js commands
-            proc = subprocess.Popen(
-                cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-                preexec_fn=preexec_fn, env=dict(os.environ, NODE_OPTIONS="--max-old-space-size=4096")
-            )
-        else:
-            proc = subprocess.Popen(
-                cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-                preexec_fn=preexec_fn
-            )
 
-        try:
-            # Wait for process to finish first
-            proc.wait(timeout=timeout or 180)
-            # Small delay to ensure all output is flushed
-            time.sleep(0.5)
-
-            out = ""
-            err = ""
-
-            if hasattr(select, 'select') and proc.stdout and proc.stderr:
-                # Check if data is available to read
-                ready, _, _ = select.select([proc.stdout, proc.stderr], [], [], 2.0)
-                if proc.stdout in ready:
-                    out = proc.stdout.read()
-                if proc.stderr in ready:
-                    err = proc.stderr.read()
-            else:
-                # Fallback for systems without select
-                out = proc.stdout.read() if proc.stdout else ""
-                err = proc.stderr.read() if proc.stderr else ""
+    # Node.js commands get a larger heap
+    env = dict(os.environ, NODE_OPTIONS="--max-old-space-size=4096") if cmd and cmd[0] in ['npm', 'node', 'npx'] else None
+    proc = subprocess.Popen(
+        cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace",
+        preexec_fn=preexec_fn, env=env
+    )
+    if PROFILER is not None:
+        PROFILER.track(proc.pid, cmd)
 
-            return int(proc.returncode), str(out), str(err)
-        except subprocess.TimeoutExpired:
-            print_warning(f"Command timed out after {timeout or 180}s. Terminating process group...")
-            _terminate_process_group(proc)
-            return 124, "", ""
-        except Exception:
-            # Handle any other exceptions that might occur
-            _terminate_process_group(proc)
-            return 1, "", ""
+    limit = timeout or 180
+    deadline = time.monotonic() + limit
+    buffers = {"stdout": OutputRing(max_lines), "stderr": OutputRing(max_lines)}
+    lines: "queue.Queue[Tuple[str, Optional[str]]]" = queue.Queue()
+    for name, stream in (("stdout", proc.stdout), ("stderr", proc.stderr)):
+        threading.Thread(target=_pump_lines, args=(stream, name, lines), daemon=True).start()
+    log = open(log_file, "a", encoding="utf-8") if log_file else None
+
+    try:
+        open_streams = 2
+        exited_at = None
+        while open_streams:
+            now = time.monotonic()
+            if now >= deadline:
+                raise subprocess.TimeoutExpired(cmd, limit)
+            if exited_at is None and proc.poll() is not None:
+                exited_at = now
+            if exited_at is not None and now - exited_at > PIPE_GRACE_SECONDS:
+                break  # A background child inherited the pipes; don't wait for it
+            try:
+                name, line = lines.get(timeout=min(0.1, deadline - now))
+            except queue.Empty:
+                continue
+            if line is None:
+                open_streams -= 1
+                continue
+            buffers[name].append(line)
+            if log:
+                log.write(line)
+            if echo:
+                (sys.stdout if name == "stdout" else sys.stderr).write(line)
+            if on_line:
+                on_line(name, line)
+
+        proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+        return int(proc.returncode), buffers["stdout"].text(), buffers["stderr"].text()
+    except subprocess.TimeoutExpired:
+        print_warning(f"Command timed out after {limit}s. Terminating process group...")
+        _terminate_process_group(proc)
+        return 124, buffers["stdout"].text(), buffers["stderr"].text()
+    except Exception as e:
+        # Handle any other exceptions that might occur (including from on_line)
+        print_error(f"Error while running command: {e}")
+        _terminate_process_group(proc)
+        return 1, buffers["stdout"].text(), buffers["stderr"].text()
+    finally:
+        if log:
+            log.close()
 
 def check_port_available(port: int) -> bool:
     """Check if a port is available."""
@@ -206,25 +399,19 @@ def handle_port_conflict(port: int, service_name: str) -> bool:
                     process.terminate()
                     process.wait(timeout=5)
                     print_success(f"Successfully terminated process {process.pid}")
-                    time.sleep(2)  # Wait for port to be released
-                    return True
                 except psutil.TimeoutExpired:
                     print_warning(f"Process {process.pid} didn't terminate gracefully. Force killing...")
                     process.kill()
-                    time.sleep(2)
-                    return True
                 except psutil.NoSuchProcess:
                     print_info(f"Process {process.pid} was already terminated.")
-                    time.sleep(1)
-                    return True
+                return wait_for_port_release(port)
             else:
                 print_error(f"Port {port} is in use by: {process_name}")
                 print_info("Please stop this process or choose a different port.")
                 return False
         except psutil.NoSuchProcess:
             print_info(f"Process was already terminated.")
-            time.sleep(1)
-            return True
+            return wait_for_port_release(port)
         except Exception as e:
             print_error(f"Error handling process: {e}")
             return False
@@ -232,6 +419,15 @@ def handle_port_conflict(port: int, service_name: str) -> bool:
         print_error(f"Port {port} is in use but couldn't identify the process.")
         return False
 
+def wait_for_port_release(port: int, timeout: float = PORT_RELEASE_TIMEOUT) -> bool:
+    """Poll until the port can be bound again."""
+    start = time.monotonic()
+    if wait_for(lambda: check_port_available(port), timeout):
+        print_info(f"Port {port} released after {time.monotonic() - start:.1f}s.")
+        return True
+    print_error(f"Port {port} was still in use {timeout:.0f}s after stopping its process.")
+    return False
+
 def ensure_port_available(port: int, service_name: str) -> bool:
     """Ensure a port is available, handling conflicts automatically."""
     if check_port_available(port):
@@ -243,20 +439,45 @@ def ensure_port_available(port: int, service_name: str) -> bool:
 def step_npm(verbose: bool = False, debug: bool = False) -> int:
     """Run npm install and test."""
     print_info("--- Step 1: Running npm install and tests ---")
-    npm_dir = "js"
 
     # Allow skipping npm step in lightweight dev containers
     if os.environ.get('DEV_SKIP_NPM') == '1':
         print_info("DEV_SKIP_NPM=1: skipping npm install and tests inside container")
         return 0
 
+    code = step_npm_install(verbose=verbose)
+    if code != 0:
+        return code
+    return step_npm_test(verbose=verbose, debug=debug)
+
+def step_npm_install(verbose: bool = False) -> int:
+    """Run npm install."""
+    if os.environ.get('DEV_SKIP_NPM') == '1':
+        print_info("DEV_SKIP_NPM=1: skipping npm install inside container")
+        return 0
+    fingerprint = input_fingerprint("npm install")
+    if skip_unchanged("npm install", fingerprint):
+        return 0
+
     print_info("Installing npm dependencies...")
-    code, out, err = run_cmd(["npm", "install"], cwd=npm_dir, timeout=300, live=verbose)
+    code, out, err = run_cmd(["npm", "install"], cwd="js", timeout=300, live=verbose)
     if code != 0:
         print_error("npm install failed.")
         if err and not verbose: print(err, file=sys.stderr)
         return code
+    record_success("npm install", fingerprint)
     print_success("Dependencies installed.")
+    return 0
+
+def step_npm_test(verbose: bool = False, debug: bool = False) -> int:
+    """Run npm test."""
+    npm_dir = "js"
+    if os.environ.get('DEV_SKIP_NPM') == '1':
+        print_info("DEV_SKIP_NPM=1: skipping npm tests inside container")
+        return 0
+    fingerprint = input_fingerprint("npm test")
+    if skip_unchanged("npm test", fingerprint):
+        return 0
 
     print_info("Running npm tests...")
     code, out, err = run_cmd(["npm", "test"], cwd=npm_dir, timeout=45, live=verbose)
@@ -271,6 +492,7 @@ def step_npm(verbose: bool = False, debug: bool = False) -> int:
 
     if code == 124:
         print_error("npm tests timed out (45s). This is considered a failure.")
+        if err and not verbose: print(err, file=sys.stderr)
         if debug:
             print_info("Debug mode: re-running tests without timeout to see full output...")
             code, out, err = run_cmd(["npm", "test"], cwd=npm_dir, live=False)
@@ -281,6 +503,7 @@ def step_npm(verbose: bool = False, debug: bool = False) -> int:
         print_error("npm tests failed.")
         if err and not verbose: print(err, file=sys.stderr)
         return code
+    record_success("npm test", fingerprint)
     print_success("NPM tests passed.")
     return 0
 
@@ -298,17 +521,20 @@ def step_docker(verbose: bool = False, clear_cache: bool = False) -> int:
         print_info("Clearing Docker build cache...")
         run_cmd(["docker", "builder", "prune", "-f"], timeout=60)
 
-    print_info(f"Building Docker image '{DOCKER_IMAGE_NAME}'...")
-    build_cmd = ["docker", "build", "-t", DOCKER_IMAGE_NAME, "-f", "docker/Dockerfile", "."]
-    if clear_cache:
-        build_cmd.insert(2, "--no-cache")
-
-    code, _, err = run_cmd(build_cmd, timeout=300, live=verbose)
-    if code != 0:
-        print_error("Docker build failed.")
-        if err and not verbose: print(err, file=sys.stderr)
-        return code
-    print_success("Docker image built.")
+    fingerprint = input_fingerprint("docker build")
+    if clear_cache or not skip_unchanged("docker build", fingerprint):
+        print_info(f"Building Docker image '{DOCKER_IMAGE_NAME}'...")
+        build_cmd = ["docker", "build", "-t", DOCKER_IMAGE_NAME, "-f", "docker/Dockerfile", "."]
+        if clear_cache:
+            build_cmd.insert(2, "--no-cache")
+
+        code, _, err = run_cmd(build_cmd, timeout=300, live=verbose)
+        if code != 0:
+            print_error("Docker build failed.")
+            if err and not verbose: print(err, file=sys.stderr)
+            return code
+        record_success("docker build", fingerprint)
+        print_success("Docker image built.")
 
     print_info(f"Running Docker container '{DOCKER_CONTAINER_NAME}'...")
 
@@ -326,6 +552,7 @@ def step_docker(verbose: bool = False, clear_cache: bool = False) -> int:
         "-v", f"{storage_path}:/app/local-storage",
         DOCKER_IMAGE_NAME
     ]
+    started = time.monotonic()
     code, _, err = run_cmd(run_cmd_list, timeout=30, live=verbose)
     if code != 0:
         print_error("Docker run failed.")
@@ -334,9 +561,14 @@ def step_docker(verbose: bool = False, clear_cache: bool = False) -> int:
             print_warning("Port 3000 may be in use by another process. Please check and try again.")
         return code
 
-    print_info("Waiting 5 seconds for the container to initialize...")
-    time.sleep(5)
-    print_success(f"Container '{DOCKER_CONTAINER_NAME}' is running on port 3000.")
+    print_info(f"Waiting up to {READY_TIMEOUT:.0f}s for {READY_URL}...")
+    if not wait_until_ready(READY_URL, READY_TIMEOUT):
+        print_error(f"Container '{DOCKER_CONTAINER_NAME}' did not become ready within {READY_TIMEOUT:.0f}s.")
+        _, out, err = run_cmd(["docker", "logs", "--tail", "40", DOCKER_CONTAINER_NAME], timeout=15)
+        if out or err: print(out + err, file=sys.stderr)
+        return 1
+    print_success(f"Container '{DOCKER_CONTAINER_NAME}' is ready on port 3000 "
+                  f"({time.monotonic() - started:.1f}s after docker run).")
     return 0
 
 def step_pyright(verbose: bool = False) -> int:
@@ -345,12 +577,16 @@ def step_pyright(verbose: bool = False) -> int:
     if shutil.which("pyright") is None:
         print_warning("pyright not found; skipping. Install with 'uv pip install pyright'.")
         return 0
+    fingerprint = input_fingerprint("pyright")
+    if skip_unchanged("pyright", fingerprint):
+        return 0
 
     code, _, err = run_cmd(["pyright"], timeout=30, live=verbose)
     if code != 0:
         print_error("Pyright checks failed.")
         if err and not verbose: print(err, file=sys.stderr)
         return code
+    record_success("pyright", fingerprint)
     print_success("Pyright checks passed.")
     return 0
 
@@ -379,6 +615,9 @@ def step_speedtest(verbose: bool = False) -> int:
 
     cmd = ["python", "py/speedtest.py"]
     code, _, err = run_cmd(cmd, timeout=60, live=verbose)
+    if code == 3:
+        print_error("Performance regression detected vs. baseline (see py/.benchmarks/history.jsonl).")
+        return code
     if code != 0:
         print_error("Speed test failed.")
         if err and not verbose: print(err, file=sys.stderr)
@@ -448,20 +687,26 @@ def step_prod_up(verbose: bool = False) -> int:
         print_info("Stopping log tail...")
     return 0
 
-def step_tests(verbose: bool = False, debug: bool = False, force: bool = False) -> int:
+def step_tests(verbose: bool = False, debug: bool = False, force: bool = False, jobs: int = 1) -> int:
     """Run ALL tests: npm, TypeScript build, pyright, demo, and speedtest."""
     print_info("--- Running ALL available tests ---")
 
-    pipeline_steps = {
-        "npm": lambda: step_npm(debug=debug, verbose=verbose),
-        "TypeScript Build": lambda: run_cmd(["npm", "run", "build"], cwd="js", timeout=60)[0],
+    # The JS steps run one after another: the build writes js/build, npm test has a
+    # tight timeout, and the image build copies js/ while reading package-lock.json
+    pipeline_steps: Dict[str, PipelineStep] = {
+        "npm install": lambda: step_npm_install(verbose=verbose),
+        "npm test": (lambda: step_npm_test(debug=debug, verbose=verbose), ["npm install"]),
+        "TypeScript Build": (lambda: run_cmd(["npm", "run", "build"], cwd="js", timeout=60)[0],
+                             ["npm install"], ["npm test"]),
         "pyright": lambda: step_pyright(verbose=verbose),
-        "Start Docker for tests": lambda: step_docker(verbose=verbose),
-        "demo": lambda: step_demo(verbose=verbose),
-        "speedtest": lambda: step_speedtest(verbose=verbose),
+        "Start Docker for tests": (lambda: step_docker(verbose=verbose), ["npm install"],
+                                   ["npm test", "TypeScript Build"]),
+        "demo": (lambda: step_demo(verbose=verbose), ["Start Docker for tests"]),
+        # After demo so the benchmark does not compete with it for the server
+        "speedtest": (lambda: step_speedtest(verbose=verbose), ["Start Docker for tests", "demo"]),
     }
 
-    results = run_pipeline(pipeline_steps, force)
+    results = run_pipeline(pipeline_steps, force, jobs)
 
     if all(code == 0 for code in results.values()):
         print_success("✅✅✅ ALL tests passed successfully! ✅✅✅")
@@ -471,20 +716,177 @@ def step_tests(verbose: bool = False, debug: bool = False, force: bool = False)
         return 1
 
 # --- Main Application Logic ---
-def run_pipeline(pipeline_steps: Dict[str, Callable], force: bool) -> Dict[str, int]:
-    """NEW: Generic function to run a pipeline of steps."""
-    results = {}
-    for name, step_func in pipeline_steps.items():
-        rc = step_func()
+# A pipeline maps step names to a callable returning an exit code, to a
+# (callable, dependencies) pair, or to a (callable, dependencies, after) triple.
+# Steps start once all their dependencies passed; `after` steps only have to be
+# finished (or skipped), which keeps steps that share files or CPU apart
+# without a failure in one blocking the other.
+PipelineStep = Union[Callable[[], int], Tuple[Callable[[], int], Sequence[str]],
+                     Tuple[Callable[[], int], Sequence[str], Sequence[str]]]
+_Step = Tuple[Callable[[], int], Tuple[str, ...], Tuple[str, ...]]
+
+_step_output = threading.local()
+
+class _StepOutputStream:
+    """Stand-in for sys.stdout/sys.stderr that buffers writes made by pipeline workers.
+
+    Each worker thread collects its step's output so it can be printed as one
+    block when the step finishes, instead of interleaving with other steps.
+    Writes from other threads go straight through.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        chunks = getattr(_step_output, "chunks", None)
+        if chunks is None:
+            return self.stream.write(text)
+        chunks.append((self.stream, text))
+        return len(text)
+
+    def flush(self) -> None:
+        if getattr(_step_output, "chunks", None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+def _split_step(spec: PipelineStep) -> _Step:
+    if isinstance(spec, tuple):
+        func, deps, *after = spec
+        return func, tuple(deps), tuple(after[0]) if after else ()
+    return spec, (), ()
+
+def _check_pipeline(steps: Dict[str, _Step]) -> None:
+    """Raise ValueError for unknown dependencies or dependency cycles."""
+    for name, (_, deps, after) in steps.items():
+        unknown = [dep for dep in deps + after if dep not in steps]
+        if unknown:
+            raise ValueError(f"Step '{name}' depends on unknown step(s): {', '.join(unknown)}")
+    resolved: set = set()
+    remaining = dict(steps)
+    while remaining:
+        ready = [name for name, (_, deps, after) in remaining.items() if resolved.issuperset(deps + after)]
+        if not ready:
+            raise ValueError(f"Dependency cycle between steps: {', '.join(remaining)}")
+        for name in ready:
+            resolved.add(name)
+            del remaining[name]
+
+def _run_step(name: str, func: Callable[[], int], capture: bool) -> Tuple[int, List[Tuple[Any, str]], float]:
+    """Run one step, returning its exit code, buffered output and wall time."""
+    chunks: List[Tuple[Any, str]] = []
+    if capture:
+        _step_output.chunks = chunks
+    start = time.monotonic()
+    try:
+        if PROFILER is not None:
+            with PROFILER.step(name) as record:
+                rc = record["returncode"] = _call_step(func)
+        else:
+            rc = _call_step(func)
+    finally:
+        _step_output.chunks = None
+    return rc, chunks, time.monotonic() - start
+
+def _call_step(func: Callable[[], int]) -> int:
+    try:
+        return func()
+    except Exception as e:
+        print_error(f"Step raised an unexpected error: {e}")
+        return 1
+
+def run_pipeline(pipeline_steps: Dict[str, PipelineStep], force: bool, jobs: int = 1) -> Dict[str, int]:
+    """Run a pipeline of steps, up to `jobs` at a time, respecting dependencies.
+
+    Without `force` no new steps start after the first failure (steps already
+    running are allowed to finish). With `force` every step runs except those
+    whose dependencies failed; a failed `after` step does not block anything.
+    Steps that never ran are left out of the result. With `jobs > 1` each
+    step's output is printed as one block when it finishes.
+    """
+    steps = {name: _split_step(spec) for name, spec in pipeline_steps.items()}
+    _check_pipeline(steps)
+
+    results: Dict[str, int] = {}
+    pending = list(steps)
+    blocked: set = set()  # Failed steps and everything downstream of them
+    stopped = False
+
+    def finish(name: str, rc: int, chunks: List[Tuple[Any, str]], elapsed: float) -> None:
+        nonlocal stopped
+        for stream, text in chunks:
+            stream.write(text)
         results[name] = rc
-        if rc != 0:
-            print_error(f"Pipeline failed at step: '{name}' (exit code {rc}).")
-            if not force:
-                return results
-            else:
-                print_warning(f"'--force' is active. Continuing to next step...")
+        if rc == 0:
+            if jobs > 1:
+                print_info(f"'{name}' finished in {elapsed:.1f}s")
+            return
+        blocked.add(name)
+        print_error(f"Pipeline failed at step: '{name}' (exit code {rc}).")
+        if not force:
+            stopped = True
+        else:
+            print_warning(f"'--force' is active. Continuing with the remaining steps...")
+
+    def next_ready() -> Optional[str]:
+        for name in list(pending):
+            _, deps, after = steps[name]
+            failed = [dep for dep in deps if dep in blocked]
+            if failed:
+                pending.remove(name)
+                blocked.add(name)
+                print_warning(f"Skipping '{name}': depends on failed step '{failed[0]}'.")
+            elif all(dep in results for dep in deps) and all(step in results or step in blocked for step in after):
+                pending.remove(name)
+                return name
+        return None
+
+    if jobs <= 1:
+        while pending and not stopped:
+            name = next_ready()
+            if name is None:
+                break
+            finish(name, *_run_step(name, steps[name][0], capture=False))
+        return results
+
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _StepOutputStream(stdout), _StepOutputStream(stderr)
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    running: Dict[Future, str] = {}
+    try:
+        while True:
+            while not stopped and len(running) < jobs:
+                name = next_ready()
+                if name is None:
+                    break
+                print_info(f"▶️  Starting '{name}'...")
+                running[executor.submit(_run_step, name, steps[name][0], True)] = name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(running.pop(future), *future.result())
+    finally:
+        executor.shutdown(wait=not running)
+        sys.stdout, sys.stderr = stdout, stderr
     return results
 
+def print_profile(summary: Dict[str, Any]) -> None:
+    """Print wall time, CPU time and peak resources of each profiled step."""
+    print_info("--- Step Profile ---")
+    print(f"   {'Step':<24}{'Wall':>9}{'CPU':>9}{'Peak RSS':>11}{'Procs':>7}")
+    for step in sorted(summary["steps"], key=lambda s: -s["wall_s"]):
+        print(f"   {step['name']:<24}{step['wall_s']:>8.1f}s{step['cpu_s']:>8.1f}s"
+              f"{step['peak_rss_mb']:>8.0f} MB{step['max_processes']:>7}")
+    busy = sum(step["wall_s"] for step in summary["steps"])
+    print(f"   Pipeline wall time {summary['wall_s']:.1f}s ({busy:.1f}s of step time)")
+
+def _pipeline_jobs(args: argparse.Namespace) -> int:
+    """Worker limit for pipelines; live output from concurrent steps would interleave."""
+    return 1 if args.verbose else max(1, args.jobs)
+
 def main():
     # Get default URL from config before parsing args
     default_url = get_default_url_from_config()
@@ -504,14 +906,32 @@ def main():
     parser.add_argument("--debug", action="store_true", help="Re-run failed npm tests without timeout for detailed output.")
     parser.add_argument("--force", action="store_true", help="Continue pipeline even if some steps fail.")
     parser.add_argument("--no-cache", dest="no_cache", action="store_true", help="Disable Docker build cache.")
+    parser.add_argument("--no-skip", dest="no_skip", action="store_true",
+                        help="Run every step even when its inputs are unchanged since the last success.")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                        help=f"Maximum pipeline steps to run at once (default: {DEFAULT_JOBS}).")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Write per-step profile.json and a Chrome trace (trace.json) to DIR.")
     parser.add_argument("--url", default=default_url, help=f"URL to open on success (default: {default_url})")
 
     args = parser.parse_args()
+    if args.profile:
+        # Relative to where app.py was invoked, not the project root we move to
+        args.profile = os.path.abspath(args.profile)
 
     # Change to the project root directory
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(os.path.join(script_dir, ".."))
 
+    global BUILD_CACHE, PROFILER
+    BUILD_CACHE = BuildCache(skip=not args.no_skip)
+    if args.profile:
+        if args.command in ("start", "basic", "all", "tests"):
+            PROFILER = StepProfiler()
+            PROFILER.start()
+        else:
+            print_warning("--profile only applies to the start, basic, all and tests pipelines.")
+
     try:
         # In development containers we may not have docker/npm in PATH; allow skipping the check
         if os.environ.get('DEV_SKIP_TOOL_CHECK') != '1':
@@ -541,31 +961,32 @@ def main():
         elif args.command == "prod-up":
             final_rc = step_prod_up(verbose=args.verbose)
         elif args.command == "tests":
-            final_rc = step_tests(verbose=args.verbose, debug=args.debug, force=args.force)
+            jobs = _pipeline_jobs(args)
+            final_rc = step_tests(verbose=args.verbose, debug=args.debug, force=args.force, jobs=jobs)
 
         elif args.command in ["start", "basic", "all"]:
-            pipelines = {
-                "start": {
-                    "npm": lambda: step_npm(debug=args.debug, verbose=args.verbose),
-                    "pyright": lambda: step_pyright(verbose=args.verbose),
-                    "demo": lambda: step_demo(verbose=args.verbose)
-                },
-                "basic": {
-                    "npm": lambda: step_npm(debug=args.debug, verbose=args.verbose),
-                    "pyright": lambda: step_pyright(verbose=args.verbose),
-                    "demo": lambda: step_demo(verbose=args.verbose)
-                },
+            start_pipeline: Dict[str, PipelineStep] = {
+                "npm": lambda: step_npm(debug=args.debug, verbose=args.verbose),
+                "pyright": lambda: step_pyright(verbose=args.verbose),
+                # The demo would otherwise compete with npm test and pyright for CPU
+                "demo": (lambda: step_demo(verbose=args.verbose), [], ["npm", "pyright"]),
+            }
+            pipelines: Dict[str, Dict[str, PipelineStep]] = {
+                "start": start_pipeline,
+                "basic": start_pipeline,
                 "all": {
-                    "npm": lambda: step_npm(debug=args.debug, verbose=args.verbose),
-                    "docker": lambda: step_docker(verbose=args.verbose, clear_cache=args.no_cache),
+                    "npm install": lambda: step_npm_install(verbose=args.verbose),
+                    "npm test": (lambda: step_npm_test(debug=args.debug, verbose=args.verbose), ["npm install"]),
+                    "docker": (lambda: step_docker(verbose=args.verbose, clear_cache=args.no_cache),
+                               ["npm install"], ["npm test"]),
                     "pyright": lambda: step_pyright(verbose=args.verbose),
-                    "demo": lambda: step_demo(verbose=args.verbose),
-                    "speedtest": lambda: step_speedtest(verbose=args.verbose)
+                    "demo": (lambda: step_demo(verbose=args.verbose), ["docker"]),
+                    "speedtest": (lambda: step_speedtest(verbose=args.verbose), ["docker", "demo"]),
                 }
             }
 
             print_info(f"🚀 Starting the '{args.command}' pipeline...")
-            results = run_pipeline(pipelines[args.command], args.force)
+            results = run_pipeline(pipelines[args.command], args.force, _pipeline_jobs(args))
 
             # --- Final Summary ---
             print_info("--- Pipeline Summary ---")
@@ -595,6 +1016,14 @@ def main():
     except Exception as e:
         print_error(f"An unexpected error occurred: {e}")
         return 1
+    finally:
+        if PROFILER is not None:
+            PROFILER.stop()
+            summary = PROFILER.summary()
+            if summary["steps"]:
+                print_profile(summary)
+                paths = PROFILER.write(args.profile)
+                print_info(f"Profile written to {paths['summary']}; open {paths['trace']} in chrome://tracing or ui.perfetto.dev")
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Client-side load balancing across several Reader instances.
+
+``EndpointPool`` routes each request to the least-loaded healthy instance. An
+instance's load is the number of requests this client has outstanding on it
+plus other clients' traffic: the ``active_requests`` and ``pending_requests``
+last sampled from its ``/queue`` endpoint, minus this client's own requests,
+which the server counts too.
+
+A background thread probes every instance each ``probe_interval`` seconds:
+
+- ``/health/ready`` answering anything but 200 ejects the instance;
+- a connection error while serving a request ejects it immediately;
+- an ejected instance is re-admitted by the first probe that finds it ready.
+
+A 429 from a probe means the instance is saturated, not broken, so it stays in
+rotation with its load pinned high. If every instance is ejected, requests go
+to the one ejected longest ago rather than failing outright.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+# Load assumed for an instance whose probes are throttled (HTTP 429)
+SATURATED_LOAD = 1_000_000
+
+
+class Endpoint:
+    """One Reader instance and what the pool knows about it"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+        self.outstanding = 0
+        self.server_load = 0  # Other clients' requests on the instance
+        self.healthy = True
+        self.ejected_at: Optional[float] = None
+        self.ejections = 0
+        self.requests = 0
+        self.last_probe: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def load(self) -> int:
+        return self.outstanding + self.server_load
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'outstanding': self.outstanding,
+            'server_load': self.server_load,
+            'requests': self.requests,
+            'ejections': self.ejections,
+            'last_error': self.last_error,
+        }
+
+
+class EndpointPool:
+    """Least-loaded routing over Reader instances with readiness-based ejection"""
+
+    def __init__(self, urls: Iterable[str], probe_interval: float = 5.0,
+                 probe_timeout: float = 2.0, session: Optional[requests.Session] = None):
+        self.endpoints: List[Endpoint] = [Endpoint(url) for url in urls]
+        if not self.endpoints:
+            raise ValueError("at least one endpoint is required")
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self._session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def start(self) -> None:
+        """Start the background prober (done automatically on first use)"""
+        with self._lock:
+            if self._thread is not None or self.probe_interval <= 0:
+                return
+            self._thread = threading.Thread(target=self._probe_loop, name='reader-endpoint-prober',
+                                            daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Stop the prober and close its connections"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.probe_timeout + 1)
+        self._session.close()
+
+    def _probe_loop(self) -> None:
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.probe_interval)
+
+    def refresh(self) -> None:
+        """Probe readiness and sample ``/queue`` on every endpoint once"""
+        for endpoint in self.endpoints:
+            if self._stop.is_set():
+                return
+            self.probe(endpoint)
+
+    def probe(self, endpoint: Endpoint) -> bool:
+        """Probe one endpoint; return whether it is in rotation afterwards"""
+        try:
+            ready = self._session.get(f"{endpoint.url}/health/ready", timeout=self.probe_timeout)
+            ready.close()
+            if ready.status_code == 429:
+                self._update(endpoint, healthy=True, server_load=SATURATED_LOAD)
+                return True
+            if ready.status_code != 200:
+                self._update(endpoint, healthy=False, error=f"readiness returned {ready.status_code}")
+                return False
+
+            queue = self._session.get(f"{endpoint.url}/queue", timeout=self.probe_timeout)
+            if queue.status_code == 429:
+                queue.close()
+                self._update(endpoint, healthy=True, server_load=SATURATED_LOAD)
+                return True
+            server_total = 0
+            if queue.ok:
+                try:
+                    stats = queue.json()
+                    server_total = int(stats.get('active_requests', 0)) + int(stats.get('pending_requests', 0))
+                except (ValueError, TypeError, AttributeError):
+                    pass
+            queue.close()
+            self._update(endpoint, healthy=True, server_total=server_total)
+            return True
+        except requests.RequestException as e:
+            self._update(endpoint, healthy=False, error=f"{type(e).__name__}: {e}")
+            return False
+
+    def _update(self, endpoint: Endpoint, healthy: bool, server_load: Optional[int] = None,
+                error: Optional[str] = None, server_total: Optional[int] = None) -> None:
+        with self._lock:
+            endpoint.last_probe = time.monotonic()
+            if server_load is not None:
+                endpoint.server_load = server_load
+            if server_total is not None:
+                # The server's counts include this client's outstanding requests
+                endpoint.server_load = max(0, server_total - endpoint.outstanding)
+            if healthy:
+                endpoint.healthy = True
+                endpoint.ejected_at = None
+            else:
+                self._eject(endpoint, error)
+
+    def _eject(self, endpoint: Endpoint, error: Optional[str]) -> None:
+        # Caller holds the lock
+        endpoint.last_error = error
+        if endpoint.healthy:
+            endpoint.healthy = False
+            endpoint.ejected_at = time.monotonic()
+            endpoint.ejections += 1
+
+    def choose(self, exclude: Iterable[Endpoint] = ()) -> Endpoint:
+        """Pick the least-loaded healthy endpoint (ties rotate)"""
+        self.start()
+        excluded = set(map(id, exclude))
+        with self._lock:
+            candidates = [e for e in self.endpoints if id(e) not in excluded] or self.endpoints
+            healthy = [e for e in candidates if e.healthy]
+            if not healthy:
+                return min(candidates, key=lambda e: e.ejected_at or 0.0)
+            turn = next(self._turn)
+            n = len(healthy)
+            # Rotate the starting point so equal loads spread evenly
+            return min((healthy[(turn + i) % n] for i in range(n)), key=lambda e: e.load)
+
+    @contextmanager
+    def acquire(self, exclude: Iterable[Endpoint] = ()) -> Iterator[Endpoint]:
+        """Hold an outstanding request on the chosen endpoint
+
+        A ``requests.ConnectionError`` raised inside ejects the endpoint until
+        its next successful readiness probe.
+        """
+        endpoint = self.choose(exclude)
+        with self._lock:
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+        try:
+            yield endpoint
+        except requests.ConnectionError as e:
+            with self._lock:
+                self._eject(endpoint, f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            with self._lock:
+                endpoint.outstanding -= 1
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-endpoint health, load and request counters"""
+        with self._lock:
+            return [endpoint.as_dict() for endpoint in self.endpoints]
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Benchmark history and regression gating for the speed tests.
+
+Every run is appended to a JSON Lines store together with the git revision,
+a fingerprint of the test configuration (mode, target server and URLs,
+formats, load settings and the Reader's config files) and a fingerprint of the
+kind of machine it ran on. The environment fingerprint only uses stable fields
+(OS family, CPU architecture, Python major.minor and CPU count), so ephemeral
+CI runners with random hostnames still match each other; the hostname and the
+full platform string are kept in the record as metadata only.
+
+Only runs with the same configuration and environment fingerprints are
+comparable, so the baseline for a new run consists of the most recent
+comparable runs that were not themselves regressions. A run recorded with
+``rebaseline`` set (``speedtest.py --accept``) accepts its results as the new
+level: earlier runs no longer count, so an intended slowdown stops failing the
+gate.
+
+A metric regresses when it is worse than the baseline median by more than the
+larger of:
+
+- ``mad_threshold`` robust standard deviations (1.4826 x the median absolute
+  deviation), which absorbs normal run-to-run noise, and
+- ``tolerance`` (relative) of the median, so a very quiet baseline does not
+  turn tiny absolute changes into failures, and
+- a fixed absolute tolerance for metrics listed in ``ABSOLUTE_TOLERANCES``.
+  The soak slopes (``*_per_hour``) hover around 0, where a relative tolerance
+  would be 0 too and the gate would flip on noise.
+
+Gating starts once ``min_runs`` comparable runs exist.
+"""
+
+import hashlib
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Files whose content changes what the Reader does, relative to the project root
+CONFIG_FILES = ('config.yaml', 'crawl_pipeline.yaml')
+
+LOWER_IS_BETTER = 'lower'
+HIGHER_IS_BETTER = 'higher'
+
+# Minimum allowed change for metrics whose baseline sits near 0 (units per hour)
+ABSOLUTE_TOLERANCES = {
+    'rss_mb_per_hour': 50.0,
+    'browser_rss_mb_per_hour': 100.0,
+    'open_fds_per_hour': 20.0,
+}
+
+# Environment fields that decide comparability; the rest is informational
+ENV_FINGERPRINT_FIELDS = ('os', 'machine', 'python', 'cpu_count')
+
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.benchmarks', 'history.jsonl')
+
+
+def _fingerprint(data: Any) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def git_revision(cwd: Optional[str] = None) -> Dict[str, Any]:
+    """Current commit, branch and whether the tree has local changes"""
+    def git(*args: str) -> Optional[str]:
+        try:
+            result = subprocess.run(['git', *args], cwd=cwd, capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'revision': git('rev-parse', 'HEAD'),
+        'branch': git('rev-parse', '--abbrev-ref', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    """Facts about the benchmarking machine that affect comparability"""
+    info: Dict[str, Any] = {
+        'os': platform.system(),
+        'machine': platform.machine(),
+        'python': '.'.join(platform.python_version_tuple()[:2]),
+        'cpu_count': os.cpu_count(),
+        # Metadata only, see ENV_FINGERPRINT_FIELDS
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'python_version': platform.python_version(),
+    }
+    try:
+        import psutil
+        info['memory_gb'] = round(psutil.virtual_memory().total / 2 ** 30)
+    except ImportError:
+        pass
+    return info
+
+
+def environment_fingerprint(environment: Dict[str, Any]) -> str:
+    """Fingerprint of the stable environment fields only"""
+    return _fingerprint({field: environment.get(field) for field in ENV_FINGERPRINT_FIELDS})
+
+
+def config_info(settings: Dict[str, Any], root: Optional[str] = None) -> Dict[str, Any]:
+    """Test settings plus content hashes of the Reader config files"""
+    root = root or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    files = {}
+    for name in CONFIG_FILES:
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                files[name] = hashlib.sha256(f.read()).hexdigest()[:16]
+    return {'settings': settings, 'files': files}
+
+
+def extract_metrics(report: Dict[str, Any]) -> Dict[str, Tuple[float, str]]:
+    """Pull comparable ``name -> (value, direction)`` metrics out of a speedtest report"""
+    metrics: Dict[str, Tuple[float, str]] = {}
+    if report.get('mode') == 'cache':
+        metrics['success_rate'] = (report['success_rate'], HIGHER_IS_BETTER)
+        metrics['warm_hit_ratio'] = (report['warm_hit_ratio'] or 0.0, HIGHER_IS_BETTER)
+        for phase in ('cold', 'warm'):
+            for name in ('p50', 'p99'):
+                metrics[f'{phase}_{name}'] = (report[phase][name], LOWER_IS_BETTER)
+        return metrics
+    if report.get('mode') == 'matrix':
+        metrics['success_rate'] = (report['success_rate'], HIGHER_IS_BETTER)
+        for cell in report['cells']:
+            if not cell['options'] and cell['latency']['count']:
+                metrics[f"{cell['route']} {cell['format']} p50"] = (cell['latency']['p50'], LOWER_IS_BETTER)
+        return metrics
+    if report.get('mode') == 'soak':
+        metrics['success_rate'] = (report['success_rate'], HIGHER_IS_BETTER)
+        metrics['latency_p99'] = (report['p99_median'], LOWER_IS_BETTER)
+        for key in ('rss_mb', 'browser_rss_mb', 'open_fds'):
+            if key in report['trends']:
+                metrics[f'{key}_per_hour'] = (report['trends'][key]['slope_per_hour'], LOWER_IS_BETTER)
+        return metrics
+    if report.get('mode') == 'capacity':
+        best = report['max_passing'] or {'level': 0.0}
+        metrics['max_sustainable_rps'] = (report['max_sustainable_rps'], HIGHER_IS_BETTER)
+        metrics['max_passing_level'] = (best['level'], HIGHER_IS_BETTER)
+        return metrics
+    if 'achieved_rps' in report:  # Load test
+        metrics['achieved_rps'] = (report['achieved_rps'], HIGHER_IS_BETTER)
+        metrics['success_rate'] = (report['success_rate'], HIGHER_IS_BETTER)
+        for name in ('p50', 'p90', 'p99'):
+            metrics[f'latency_{name}'] = (report['latency'][name], LOWER_IS_BETTER)
+        return metrics
+
+    summary = report['summary']
+    metrics['success_rate'] = (summary['overall_success_rate'], HIGHER_IS_BETTER)
+    metrics['latency_mean'] = (summary['average_response_time'], LOWER_IS_BETTER)
+    for name in ('p50', 'p90', 'p99'):
+        metrics[f'latency_{name}'] = (summary.get('percentiles', {}).get(name, 0.0), LOWER_IS_BETTER)
+    for format_type, stats in report.get('format_breakdown', {}).items():
+        if 'percentiles' in stats:
+            for name in ('p50', 'p99'):
+                metrics[f'{format_type}_{name}'] = (stats['percentiles'][name], LOWER_IS_BETTER)
+    return metrics
+
+
+class HistoryStore:
+    """Append-only JSON Lines store of benchmark runs"""
+
+    def __init__(self, path: str = DEFAULT_STORE):
+        self.path = path
+
+    def runs(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        runs = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    runs.append(json.loads(line))
+                except ValueError:
+                    continue  # Torn final line from an interrupted run
+        return runs
+
+    def append(self, record: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a+b') as f:
+            # Don't glue the record onto a torn line left by an interrupted write
+            f.seek(0, os.SEEK_END)
+            prefix = b''
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                prefix = b'' if f.read(1) == b'\n' else b'\n'
+            f.write(prefix + (json.dumps(record, sort_keys=True) + '\n').encode('utf-8'))
+
+    def baseline(self, config_fingerprint: str, env_fingerprint: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most recent comparable, non-regressed runs since the last rebaseline (oldest first)"""
+        comparable: List[Dict[str, Any]] = []
+        for run in self.runs():
+            if run.get('config_fingerprint') != config_fingerprint or run.get('env_fingerprint') != env_fingerprint:
+                continue
+            if run.get('rebaseline'):
+                comparable = []
+            if not run.get('regressed'):
+                comparable.append(run)
+        return comparable[-limit:]
+
+
+def make_record(report: Dict[str, Any], settings: Dict[str, Any],
+                root: Optional[str] = None) -> Dict[str, Any]:
+    """Build a history record for a finished run"""
+    config = config_info(settings, root)
+    environment = environment_info()
+    metrics = extract_metrics(report)
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'git': git_revision(root),
+        'config': config,
+        'config_fingerprint': _fingerprint(config),
+        'environment': environment,
+        'env_fingerprint': environment_fingerprint(environment),
+        'metrics': {name: value for name, (value, _) in metrics.items()},
+        'directions': {name: direction for name, (_, direction) in metrics.items()},
+    }
+
+
+def compare(record: Dict[str, Any], baseline: List[Dict[str, Any]], tolerance: float = 0.10,
+            mad_threshold: float = 3.0, min_runs: int = 3) -> List[Dict[str, Any]]:
+    """Compare a run's metrics against baseline runs; one row per metric"""
+    rows = []
+    for name, value in record['metrics'].items():
+        direction = record['directions'][name]
+        history = [run['metrics'][name] for run in baseline if name in run.get('metrics', {})]
+        row: Dict[str, Any] = {'metric': name, 'current': value, 'baseline': None,
+                               'delta_pct': None, 'runs': len(history), 'status': 'new'}
+        if len(history) >= min_runs:
+            median = statistics.median(history)
+            mad = statistics.median(abs(v - median) for v in history)
+            allowed = max(mad_threshold * 1.4826 * mad, tolerance * abs(median),
+                          ABSOLUTE_TOLERANCES.get(name, 0.0))
+            worse = value - median if direction == LOWER_IS_BETTER else median - value
+            row['baseline'] = median
+            row['delta_pct'] = (value - median) / median * 100 if median else None
+            row['allowed'] = allowed
+            if worse > allowed:
+                row['status'] = 'regressed'
+            elif -worse > allowed:
+                row['status'] = 'improved'
+            else:
+                row['status'] = 'ok'
+        elif history:
+            row['baseline'] = statistics.median(history)
+            row['status'] = 'warming up'
+        rows.append(row)
+    return rows
+
+
+def format_diff_table(rows: List[Dict[str, Any]]) -> str:
+    """Render comparison rows as a fixed-width table"""
+    icons = {'ok': '✅', 'improved': '🚀', 'regressed': '❌', 'warming up': '⏳', 'new': '🆕'}
+    lines = [f"   {'Metric':<20}{'Baseline':>12}{'Current':>12}{'Delta':>10}  Status",
+             '   ' + '-' * 64]
+    for row in rows:
+        baseline = f"{row['baseline']:.3f}" if row['baseline'] is not None else '-'
+        delta = f"{row['delta_pct']:+.1f}%" if row['delta_pct'] is not None else '-'
+        lines.append(f"   {row['metric']:<20}{baseline:>12}{row['current']:>12.3f}{delta:>10}  "
+                     f"{icons.get(row['status'], '')} {row['status']} ({row['runs']} runs)")
+    return '\n'.join(lines)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Content-hash build cache for the app.py pipeline steps.
+
+Each cacheable step is described by a spec dict:
+
+- ``inputs``: file paths or glob patterns relative to the project root
+  (``**`` matches any number of directories, ``*`` within a path may also
+  cross directories);
+- ``exclude``: paths to leave out; entries containing a ``/`` are prefixes
+  relative to the root, plain names match any directory with that name;
+- ``tools``: commands whose output identifies a tool version
+  (e.g. ``["npm", "--version"]``);
+- ``outputs``: paths that must still exist for a cached result to count;
+- ``check``: optional callable returning False when the step's product is
+  gone (e.g. the Docker image was removed).
+
+The fingerprint of a step is a hash of every input file's path and content
+plus the tool versions. It is taken before the step runs, and after the step
+succeeds that same fingerprint is written to a local JSON manifest, so inputs
+edited while the step was running make the next run repeat it. The next run
+skips the step while the fingerprint matches. Failures are never cached.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.build-cache', 'manifest.json')
+
+# Directories that never count as step inputs
+ALWAYS_EXCLUDED = ('.git', '__pycache__', '.pytest_cache', '.benchmarks', '.build-cache')
+
+_MAGIC = ('*', '?', '[')
+
+
+def _excluded(rel_path: str, exclude: Sequence[str]) -> bool:
+    name = rel_path.rsplit('/', 1)[-1]
+    for entry in exclude:
+        if '/' in entry:
+            entry = entry.rstrip('/')
+            if rel_path == entry or rel_path.startswith(entry + '/'):
+                return True
+        elif name == entry:
+            return True
+    return False
+
+
+def _matches(rel_path: str, pattern: str) -> bool:
+    # "a/**/b" should also match "a/b"
+    return fnmatch.fnmatchcase(rel_path, pattern) or fnmatch.fnmatchcase(rel_path, pattern.replace('**/', ''))
+
+
+def expand_inputs(patterns: Sequence[str], root: str = '.', exclude: Sequence[str] = ()) -> List[str]:
+    """Sorted relative paths of the files matching ``patterns``"""
+    exclude = tuple(exclude) + ALWAYS_EXCLUDED
+    files = set()
+    for pattern in patterns:
+        pattern = pattern.replace(os.sep, '/')
+        parts = pattern.split('/')
+        static = []
+        for part in parts:
+            if any(c in part for c in _MAGIC):
+                break
+            static.append(part)
+        if len(static) == len(parts):  # Plain path
+            if os.path.isfile(os.path.join(root, pattern)) and not _excluded(pattern, exclude):
+                files.add(pattern)
+            continue
+
+        base = '/'.join(static)
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, base) if base else root):
+            rel_dir = os.path.relpath(dirpath, root).replace(os.sep, '/')
+            rel_dir = '' if rel_dir == '.' else rel_dir + '/'
+            dirnames[:] = sorted(d for d in dirnames if not _excluded(rel_dir + d, exclude))
+            for filename in filenames:
+                rel_path = rel_dir + filename
+                if _matches(rel_path, pattern) and not _excluded(rel_path, exclude):
+                    files.add(rel_path)
+    return sorted(files)
+
+
+class BuildCache:
+    """Fingerprints step inputs and remembers which fingerprints last succeeded"""
+
+    def __init__(self, path: str = DEFAULT_MANIFEST, root: str = '.', skip: bool = True):
+        self.path = path
+        self.root = root
+        self.skip = skip  # False: always run, but still record successes
+        self._lock = threading.Lock()
+        self._tool_versions: Dict[str, str] = {}
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {'steps': {}}
+        return manifest if isinstance(manifest.get('steps'), dict) else {'steps': {}}
+
+    def tool_version(self, cmd: Sequence[str]) -> str:
+        """First line of a version command's output, or ``missing``"""
+        key = ' '.join(cmd)
+        with self._lock:
+            if key in self._tool_versions:
+                return self._tool_versions[key]
+        try:
+            result = subprocess.run(list(cmd), capture_output=True, text=True, timeout=30)
+            lines = (result.stdout or result.stderr).strip().splitlines()
+            version = lines[0] if result.returncode == 0 and lines else 'missing'
+        except (OSError, subprocess.SubprocessError):
+            version = 'missing'
+        with self._lock:
+            self._tool_versions[key] = version
+        return version
+
+    def fingerprint(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Hash of a step's input files and tool versions"""
+        digest = hashlib.sha256()
+        files = expand_inputs(spec.get('inputs', ()), self.root, spec.get('exclude', ()))
+        for rel_path in files:
+            digest.update(rel_path.encode('utf-8') + b'\0')
+            with open(os.path.join(self.root, rel_path), 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            digest.update(b'\0')
+        tools = {' '.join(cmd): self.tool_version(cmd) for cmd in spec.get('tools', ())}
+        digest.update(json.dumps(tools, sort_keys=True).encode('utf-8'))
+        return {'fingerprint': digest.hexdigest()[:32], 'files': len(files), 'tools': tools}
+
+    def is_fresh(self, name: str, spec: Dict[str, Any], fingerprint: Optional[Dict[str, Any]] = None) -> bool:
+        """True when the step may be skipped: unchanged inputs and outputs still present
+
+        ``fingerprint`` is the step's current fingerprint if already computed.
+        """
+        if not self.skip:
+            return False
+        entry = self._load()['steps'].get(name)
+        if not entry:
+            return False
+        if any(not os.path.exists(os.path.join(self.root, p)) for p in spec.get('outputs', ())):
+            return False
+        if entry.get('fingerprint') != (fingerprint or self.fingerprint(spec))['fingerprint']:
+            return False
+        check = spec.get('check')
+        return bool(check()) if check else True
+
+    def record(self, name: str, fingerprint: Dict[str, Any]) -> None:
+        """Remember a fingerprint taken before the step ran as a successful run"""
+        entry = dict(fingerprint)
+        entry['recorded_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        with self._lock:  # Pipeline steps record from several threads
+            manifest = self._load()
+            manifest['steps'][name] = entry
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
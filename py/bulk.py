@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Reader API Bulk Extraction Script
+
+Extracts every URL in a URL list (one URL per line, or a CSV file with a
+``url`` column) through the Reader API in parallel, appending one JSON record
+per URL to an output file as results arrive.
+
+A checkpoint journal records every finished URL, so a killed run can simply be
+restarted with the same arguments: URLs that already succeeded are skipped and
+failed ones are retried. Records are written before they are journaled, so a
+crash can at worst repeat a URL (at-least-once), never lose one.
+
+Requirements:
+    uv pip install requests
+
+Usage:
+    uv run bulk.py urls.txt
+    uv run bulk.py urls.csv --output results.jsonl --format json --workers 8
+    uv run bulk.py urls.txt --cache-dir .reader-cache --adaptive
+    uv run bulk.py urls.txt --dedup-index seen.bloom
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, TextIO
+
+import requests
+
+from demo import ReaderAPI, FORMAT_HEADERS
+from ratecontrol import AdaptiveController
+from reader_cache import DiskCache
+from urlindex import UrlIndex, dedupe
+
+JOURNAL_OK = 'ok'
+JOURNAL_ERROR = 'err'
+
+
+def read_urls(path: str) -> Iterator[str]:
+    """Lazily yield URLs from a plain list or a CSV file with a ``url`` column
+
+    Only ``.csv`` files and files whose first row has a ``url`` header are
+    parsed as CSV; anything else is one URL per line, so commas in query
+    strings survive.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        first_line = ''
+        for first_line in f:
+            if first_line.strip():
+                break
+        header = [cell.strip().lower() for cell in next(csv.reader([first_line]), [])]
+        if 'url' in header:
+            rows: Iterable[str] = f
+            url_column = header.index('url')
+        elif path.lower().endswith('.csv'):
+            rows = itertools.chain([first_line], f)
+            url_column = 0
+        else:
+            for line in itertools.chain([first_line], f):
+                url = line.strip()
+                if url and not url.startswith('#'):
+                    yield url
+            return
+        for row in csv.reader(rows):
+            if url_column >= len(row):
+                continue
+            url = row[url_column].strip()
+            if url and not url.startswith('#'):
+                yield url
+
+
+def url_digest(url: str) -> bytes:
+    """Compact fixed-size identity for a URL, used for the resume set"""
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+
+
+class CheckpointJournal:
+    """Append-only journal of finished URLs (``<status>\\t<url>`` per line)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[bytes] = set()
+        self.previous_failures = 0
+        self._valid_bytes: Optional[int] = None
+        if os.path.exists(path):
+            self._load()
+        self._file: Optional[TextIO] = None
+
+    def _load(self) -> None:
+        failed: Set[bytes] = set()
+        complete_bytes = 0
+        with open(self.path, 'r', encoding='utf-8', newline='\n') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    # Final line cut short by a killed run; dropped before appending
+                    self._valid_bytes = complete_bytes
+                    continue
+                complete_bytes += len(line.encode('utf-8'))
+                status, sep, url = line[:-1].partition('\t')
+                if not sep:
+                    continue
+                digest = url_digest(url)
+                if status == JOURNAL_OK:
+                    self.done.add(digest)
+                    failed.discard(digest)
+                elif status == JOURNAL_ERROR and digest not in self.done:
+                    failed.add(digest)
+        self.previous_failures = len(failed)
+
+    def is_done(self, url: str) -> bool:
+        return url_digest(url) in self.done
+
+    def record(self, url: str, ok: bool) -> None:
+        if self._file is None:
+            if self._valid_bytes is not None:
+                os.truncate(self.path, self._valid_bytes)
+                self._valid_bytes = None
+            self._file = open(self.path, 'a', encoding='utf-8', newline='\n')
+        self._file.write(f"{JOURNAL_OK if ok else JOURNAL_ERROR}\t{url}\n")
+        self._file.flush()
+        if ok:
+            self.done.add(url_digest(url))
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def make_record(url: str, response_format: str, result: Any) -> Dict[str, Any]:
+    """Build the output record for one URL"""
+    record: Dict[str, Any] = {
+        'url': url,
+        'format': response_format,
+        'fetched_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+    if isinstance(result, BaseException):
+        record['error'] = f"{type(result).__name__}: {result}"
+        if isinstance(result, requests.HTTPError) and result.response is not None:
+            record['status_code'] = result.response.status_code
+    else:
+        record['content'] = result
+    return record
+
+
+def run_bulk(reader: ReaderAPI, urls: Iterable[str], output_path: str, journal: CheckpointJournal,
+             response_format: str = 'markdown', workers: int = 4,
+             progress_every: int = 100, index: Optional[UrlIndex] = None) -> Dict[str, int]:
+    """Extract ``urls`` not yet in ``journal``, appending records to ``output_path``
+
+    With an ``index``, URLs whose canonical form was already extracted (in this
+    or an earlier run) or appears earlier in ``urls`` are skipped as duplicates.
+    Only successful URLs are added to ``index``, so failures stay retryable.
+    """
+    counts = {'succeeded': 0, 'failed': 0, 'skipped': 0}
+    if index is not None:
+        counts['duplicates'] = 0
+
+    def pending() -> Iterator[str]:
+        for url in urls:
+            if journal.is_done(url):
+                counts['skipped'] += 1
+                continue
+            yield url
+
+    def count_duplicate(url: str) -> None:
+        counts['duplicates'] += 1
+
+    todo = dedupe(pending(), index, count_duplicate) if index is not None else pending()
+
+    started = time.monotonic()
+    with open(output_path, 'a', encoding='utf-8') as out:
+        for url, result in reader.map(todo, response_format, workers=workers):
+            ok = not isinstance(result, BaseException)
+            out.write(json.dumps(make_record(url, response_format, result), ensure_ascii=False) + '\n')
+            out.flush()
+            journal.record(url, ok)
+            if ok and index is not None:
+                index.mark_done(url)
+            counts['succeeded' if ok else 'failed'] += 1
+
+            processed = counts['succeeded'] + counts['failed']
+            if progress_every and processed % progress_every == 0:
+                rate = processed / max(time.monotonic() - started, 1e-9)
+                print(f"  🔄 {processed} processed ({counts['failed']} failed, "
+                      f"{counts['skipped']} skipped) - {rate:.1f} URLs/s", flush=True)
+    return counts
+
+
+def main():
+    """Main bulk extraction function"""
+    parser = argparse.ArgumentParser(
+        description="DearReader bulk extraction with resumable checkpoints",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s urls.txt                          # Markdown for every URL -> urls.txt.jsonl
+  %(prog)s urls.csv --format json -w 8       # JSON with 8 parallel requests
+  %(prog)s urls.txt --output out.jsonl       # Re-run the same command to resume
+  %(prog)s urls.txt --dedup-index seen.bloom # Skip pages already extracted by any run
+        """
+    )
+    parser.add_argument('input', help='URL list (one per line) or CSV file with a "url" column')
+    parser.add_argument('--output', '-o', help='JSON Lines output file (default: <input>.jsonl)')
+    parser.add_argument('--checkpoint', help='Checkpoint journal (default: <output>.checkpoint)')
+    parser.add_argument('--format', '-f', default='markdown', choices=sorted(FORMAT_HEADERS),
+                        help='Response format to extract (default: markdown)')
+    parser.add_argument('--workers', '-w', type=int, default=4, help='Parallel requests (default: 4)')
+    parser.add_argument('--base-url', type=str,
+                        help='Override default base URL; comma-separate several instances to load balance '
+                             '(default: http://127.0.0.1:3000)')
+    parser.add_argument('--cache-dir', help='Reuse responses from an on-disk cache in this directory')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt concurrency to the server admission limit (handles 429 Retry-After)')
+    parser.add_argument('--dedup-index',
+                        help='Persistent index of extracted canonical URLs; duplicates are skipped')
+    parser.add_argument('--dedup-capacity', type=int, default=10_000_000,
+                        help='URLs the dedup index is sized for (default: 10000000, ~18 MB)')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Input file not found: {args.input}")
+        sys.exit(2)
+
+    output_path = args.output or f"{args.input}.jsonl"
+    journal = CheckpointJournal(args.checkpoint or f"{output_path}.checkpoint")
+    index = UrlIndex(args.dedup_index, capacity=args.dedup_capacity) if args.dedup_index else None
+
+    print("🚀 DearReader Bulk Extraction")
+    print("=" * 50)
+    if journal.done:
+        print(f"♻️  Resuming: {len(journal.done)} URLs already finished, "
+              f"{journal.previous_failures} failed URLs will be retried")
+    if index is not None and len(index):
+        print(f"🧭 Dedup index holds ~{len(index)} extracted URLs")
+
+    reader = ReaderAPI(
+        args.base_url,
+        pool_maxsize=max(10, args.workers),
+        cache=DiskCache(args.cache_dir) if args.cache_dir else None,
+        rate_controller=AdaptiveController(initial_concurrency=min(4, max(1, args.workers)),
+                                           max_concurrency=max(1, args.workers)) if args.adaptive else None,
+    )
+
+    try:
+        counts = run_bulk(reader, read_urls(args.input), output_path, journal,
+                          response_format=args.format, workers=args.workers, index=index)
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted - re-run the same command to resume")
+        sys.exit(130)
+    finally:
+        journal.close()
+        reader.close()
+        if index is not None:
+            index.save()
+
+    print(f"\n✅ Succeeded: {counts['succeeded']}  ❌ Failed: {counts['failed']}  "
+          f"⏭️  Skipped: {counts['skipped']}")
+    if index is not None:
+        print(f"🔁 Duplicates skipped: {counts['duplicates']}")
+    if index is not None and index.bloom.saturated:
+        print("⚠️  Dedup index is past its capacity; raise --dedup-capacity for a new index")
+    print(f"📄 Results appended to {output_path}")
+    if counts['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
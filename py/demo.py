@@ -6,7 +6,7 @@ This script demonstrates how to use the enhanced Reader API for web scraping
 and content extraction. The Reader converts web pages to LLM-friendly formats.
 
 Requirements:
-    uv pip install requests
+    uv pip install requests aiohttp
 
 Usage:
     uv run demo.py
@@ -15,81 +15,542 @@ Usage:
 """
 
 import os
+import asyncio
+import aiohttp
 import requests
 import json
 import time
 import sys
 import argparse
-from typing import Dict, Any, Optional
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Iterable, Iterator, AsyncIterator, Tuple, Union, Callable, BinaryIO, Sequence
 from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from reader_cache import DiskCache, cache_directives
+from ratecontrol import AdaptiveController, parse_retry_after
+from urlindex import UrlIndex, dedupe
+from balancer import EndpointPool
+
+
+# Request headers selecting each response format on the Reader server
+FORMAT_HEADERS: Dict[str, Dict[str, str]] = {
+    'json': {'Accept': 'application/json'},
+    'markdown': {'Accept': 'text/plain'},
+    'html': {'X-Respond-With': 'html'},
+    'text': {'X-Respond-With': 'text'},
+    'screenshot': {'X-Respond-With': 'screenshot'},
+    'pageshot': {'X-Respond-With': 'pageshot'},
+}
+
+# Server X-Respond-With mode that renders each format inside a bundle request
+BUNDLE_MODES: Dict[str, str] = {
+    'json': 'default',
+    'markdown': 'default',
+    'html': 'html',
+    'text': 'text',
+    'screenshot': 'screenshot',
+    'pageshot': 'pageshot',
+}
+
+# Read size used when streaming bodies to a file or callback
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Transient gateway/overload statuses worth retrying for idempotent requests
+RETRY_STATUS_CODES = (502, 503, 504)
+
+
+def _dispatch_urls(urls: Iterable[str], index: Optional[UrlIndex]) -> Iterator[str]:
+    """Yield the URLs to request, skipping already-fetched duplicates when indexed"""
+    if index is not None:
+        return dedupe(urls, index)
+    return iter(urls)
 
-class ReaderAPI:
-    """Simple wrapper for the Reader API"""
 
-    def __init__(self, base_url: Optional[str] = None):
+class ReaderAPI:
+    """Simple wrapper for the Reader API
+
+    Requests share one pooled, keep-alive ``requests.Session`` with connect/read
+    timeouts and a retry policy for idempotent requests. The session's
+    connection pool is thread-safe, so a single client can be shared by worker
+    threads; size ``pool_maxsize`` to the number of threads using it.
+
+    Pass a ``reader_cache.DiskCache`` as ``cache`` to serve repeated requests
+    from disk without any network I/O, and a ``ratecontrol.AdaptiveController``
+    as ``rate_controller`` to pace requests under the server's admission limit
+    (429 responses are then waited out and retried instead of raised).
+
+    ``base_url`` may also list several instances (a sequence, or a
+    comma-separated string as in ``READER_BASE_URL``). Requests are then
+    routed by a ``balancer.EndpointPool`` to the least-loaded ready instance,
+    and a request that cannot connect is retried once on another instance.
+    """
+
+    def __init__(self, base_url: Union[str, Sequence[str], None] = None, pool_connections: int = 10,
+                 pool_maxsize: int = 10, connect_timeout: float = 10.0,
+                 read_timeout: float = 180.0, max_retries: int = 3,
+                 backoff_factor: float = 0.5, session: Optional[requests.Session] = None,
+                 cache: Optional[DiskCache] = None,
+                 rate_controller: Optional[AdaptiveController] = None,
+                 endpoints: Optional[EndpointPool] = None):
         # Allow overriding the reader base URL via environment variable when running inside Docker
         env_url = os.getenv('READER_BASE_URL')
         resolved = base_url or env_url or "http://127.0.0.1:3000"
-        self.base_url = resolved.rstrip('/')
+        urls = [u.strip() for u in resolved.split(',')] if isinstance(resolved, str) else list(resolved)
+        urls = [u.rstrip('/') for u in urls if u]
+        # Likewise only a pool we created is ours to close
+        self._owns_endpoints = endpoints is None and len(urls) > 1
+        if self._owns_endpoints:
+            endpoints = EndpointPool(urls)
+        self.endpoints = endpoints
+        self.base_url = endpoints.endpoints[0].url if endpoints is not None else urls[0]
+        self.timeout = (connect_timeout, read_timeout)
+        # Only a session we created is ours to close
+        self._owns_session = session is None
+        self.session = session or self._build_session(pool_connections, pool_maxsize, max_retries, backoff_factor)
+        self.cache = cache
+        self.rate_controller = rate_controller
+
+    @staticmethod
+    def _build_session(pool_connections: int, pool_maxsize: int, max_retries: int,
+                       backoff_factor: float) -> requests.Session:
+        """Create a keep-alive session that retries idempotent requests
+
+        Read timeouts are not retried: a render that hung for the full read
+        timeout would only hang again, multiplying the wait.
+        """
+        retry = Retry(
+            total=max_retries,
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              max_retries=retry, pool_block=True)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self) -> None:
+        """Close pooled connections (a session or endpoint pool passed in by the caller is left open)"""
+        if self.endpoints is not None and self._owns_endpoints:
+            self.endpoints.close()
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> 'ReaderAPI':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _api_key(self, headers: Optional[Dict[str, str]]) -> Optional[str]:
+        for source in (headers or {}, self.session.headers):
+            for name, value in source.items():
+                if name.lower() == 'x-api-key':
+                    return value
+        return None
+
+    def _get(self, path: str, headers: Optional[Dict[str, str]] = None,
+             params: Optional[Dict[str, Any]] = None, stream: bool = False) -> requests.Response:
+        # Only pass stream when set so plain requests keep the simple call shape
+        extra: Dict[str, Any] = {'stream': True} if stream else {}
+        controller = self.rate_controller
+        if controller is None:
+            response = self._send(path, headers, params, extra)
+            response.raise_for_status()
+            return response
+
+        api_key = self._api_key(headers)
+        attempts = 0
+        while True:
+            with controller.slot(api_key) as outcome:
+                response = self._send(path, headers, params, extra)
+                outcome['status'] = response.status_code
+                outcome['retry_after'] = parse_retry_after(response.headers.get('Retry-After'))
+            attempts += 1
+            # The controller has already paused this key for Retry-After
+            if response.status_code != 429 or attempts > controller.max_throttle_retries:
+                break
+            response.close()
+        response.raise_for_status()
+        return response
+
+    def _send(self, path: str, headers: Optional[Dict[str, str]], params: Optional[Dict[str, Any]],
+              extra: Dict[str, Any]) -> requests.Response:
+        """Send one GET, picking the instance when load balancing"""
+        pool = self.endpoints
+        if pool is None:
+            return self.session.get(f"{self.base_url}/{path}", headers=headers, params=params,
+                                    timeout=self.timeout, **extra)
+        tried = []
+        while True:
+            try:
+                with pool.acquire(exclude=tried) as endpoint:
+                    tried.append(endpoint)
+                    return self.session.get(f"{endpoint.url}/{path}", headers=headers, params=params,
+                                            timeout=self.timeout, **extra)
+            except requests.ConnectionError:
+                # GETs are idempotent: fail over once to another instance
+                if len(tried) >= min(2, len(pool)):
+                    raise
+
+    def _fetch(self, url: str, cache_format: str, format_headers: Dict[str, str],
+               headers: Optional[Dict[str, str]], params: Dict[str, Any], as_json: bool) -> Any:
+        """Fetch ``url`` through the optional disk cache"""
+        cache, cache_key = self.cache, ''
+        if cache is not None:
+            cache_key = DiskCache.make_key(url, cache_format, headers, params)
+            no_cache, tolerance = cache_directives(headers)
+            if not no_cache:
+                cached = cache.get(cache_key, max_age=tolerance)
+                if cached is not None:
+                    return cached
+
+        request_headers = dict(headers or {})
+        request_headers.update(format_headers)
+        # URL is passed in the path, not as a query parameter
+        response = self._get(quote(url, safe=''), headers=request_headers, params=params)
+        result = response.json() if as_json else response.text
+
+        if cache is not None:
+            cache.set(cache_key, result, url=url, response_format=cache_format)
+        return result
+
+    def get_format(self, url: str, response_format: str = 'markdown',
+                   headers: Optional[Dict[str, str]] = None, **params) -> Any:
+        """Get ``url`` in any supported response format
+
+        ``headers`` carries extra option headers (``x-timeout``,
+        ``x-no-cache``, ...) and ``params`` is sent as the query string.
+        """
+        if response_format not in FORMAT_HEADERS:
+            raise ValueError(f"Unsupported format: {response_format}")
+        return self._fetch(url, response_format, FORMAT_HEADERS[response_format], headers, params,
+                           as_json=response_format == 'json')
+
+    def get_bundle(self, url: str, formats: Iterable[str] = ('json', 'markdown', 'screenshot'),
+                   headers: Optional[Dict[str, str]] = None, **params) -> Dict[str, Any]:
+        """Get several formats of ``url`` from a single server-side crawl
+
+        Returns ``{'url', 'title', 'formats'}`` where ``formats`` maps each
+        requested format to what the matching getter would have returned
+        (``json`` maps to the ``data`` object of the JSON response).
+        """
+        formats = list(dict.fromkeys(formats))
+        unknown = [f for f in formats if f not in BUNDLE_MODES]
+        if unknown or not formats:
+            raise ValueError(f"Unsupported bundle formats: {unknown or formats}")
+
+        # 'default' always leads: it backs the JSON metadata of the bundle
+        modes = list(dict.fromkeys(['default'] + [BUNDLE_MODES[f] for f in formats]))
+        if modes == ['default']:
+            data = self._fetch(url, 'json', FORMAT_HEADERS['json'], headers, params, as_json=True)['data']
+            rendered = {'default': data.get('content', '')}
+        else:
+            bundle_headers = {'Accept': 'application/json', 'X-Respond-With': ','.join(modes)}
+            data = self._fetch(url, 'bundle:' + ','.join(modes), bundle_headers, headers, params,
+                               as_json=True)['data']
+            rendered = data.get('formats', {})
+
+        json_data = {k: v for k, v in data.items() if k != 'formats'}
+        return {
+            'url': data.get('url') or url,
+            'title': data.get('title'),
+            'formats': {
+                f: json_data if f == 'json' else rendered.get(BUNDLE_MODES[f])
+                for f in formats
+            },
+        }
 
     def get_json(self, url: str, **params) -> Dict[str, Any]:
         """Get JSON response with full metadata, links, and content"""
-        headers = {'Accept': 'application/json'}
-        # URL is passed in the path, not as a query parameter
-        encoded_url = quote(url, safe='')
-        response = requests.get(f"{self.base_url}/{encoded_url}", headers=headers, params=params)
-        response.raise_for_status()
-        return response.json()
+        return self.get_format(url, 'json', **params)
 
     def get_markdown(self, url: str, **params) -> str:
         """Get markdown formatted content"""
-        headers = {'Accept': 'text/plain'}
-        encoded_url = quote(url, safe='')
-        response = requests.get(f"{self.base_url}/{encoded_url}", headers=headers, params=params)
-        response.raise_for_status()
-        return response.text
+        return self.get_format(url, 'markdown', **params)
 
     def get_html(self, url: str, **params) -> str:
         """Get cleaned HTML content"""
-        headers = {'X-Respond-With': 'html'}
-        encoded_url = quote(url, safe='')
-        response = requests.get(f"{self.base_url}/{encoded_url}", headers=headers, params=params)
-        response.raise_for_status()
-        return response.text
+        return self.get_format(url, 'html', **params)
 
     def get_text(self, url: str, **params) -> str:
         """Get plain text content"""
-        headers = {'X-Respond-With': 'text'}
-        encoded_url = quote(url, safe='')
-        response = requests.get(f"{self.base_url}/{encoded_url}", headers=headers, params=params)
-        response.raise_for_status()
-        return response.text
+        return self.get_format(url, 'text', **params)
 
     def get_screenshot(self, url: str, full_page: bool = False, **params) -> str:
         """Get screenshot URL"""
-        headers = {'X-Respond-With': 'pageshot' if full_page else 'screenshot'}
-        encoded_url = quote(url, safe='')
-        response = requests.get(f"{self.base_url}/{encoded_url}", headers=headers, params=params)
-        response.raise_for_status()
-        return response.text
+        return self.get_format(url, 'pageshot' if full_page else 'screenshot', **params)
+
+    def map(self, urls: Iterable[str], format: str = 'markdown', workers: int = 4,
+            ordered: bool = False, index: Optional[UrlIndex] = None,
+            **params) -> Iterator[Tuple[str, Union[Any, BaseException]]]:
+        """Fetch many URLs on a thread pool, yielding ``(url, result)`` pairs.
+
+        ``urls`` is consumed lazily and at most ``2 * workers`` requests are
+        submitted ahead of the consumer, so huge inputs are never materialized.
+        Results stream in completion order, or in input order when ``ordered``
+        is set. A failed request yields its exception in place of the result.
+
+        With an ``index``, any URL whose canonical form was already fetched or
+        dispatched is skipped, and URLs are added to the index as they succeed.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        url_iter = _dispatch_urls(urls, index)
+        window = workers * 2
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reader-map') as pool:
+            pending: 'deque[Tuple[str, Future]]' = deque()
+
+            def refill() -> None:
+                while len(pending) < window:
+                    try:
+                        url = next(url_iter)
+                    except StopIteration:
+                        return
+                    pending.append((url, pool.submit(self.get_format, url, format, **params)))
+
+            try:
+                refill()
+                while pending:
+                    if ordered:
+                        url, future = pending.popleft()
+                    else:
+                        done, _ = wait([f for _, f in pending], return_when=FIRST_COMPLETED)
+                        url, future = next(item for item in pending if item[1] in done)
+                        pending.remove((url, future))
+                    exc = future.exception()
+                    if exc is None and index is not None:
+                        index.mark_done(url)
+                    yield url, exc if exc is not None else future.result()
+                    refill()
+            finally:
+                # Abandoned iterators should not keep queued requests around
+                for _, future in pending:
+                    future.cancel()
+
+    def stream(self, url: str, response_format: str = 'markdown',
+               sink: Union[Callable[[bytes], Any], BinaryIO, None] = None,
+               chunk_size: int = STREAM_CHUNK_SIZE, headers: Optional[Dict[str, str]] = None,
+               **params) -> int:
+        """Stream the raw response body to ``sink`` in fixed-size chunks
+
+        ``sink`` is either a callable receiving each ``bytes`` chunk or a
+        binary file-like object. The body is never buffered or decoded as a
+        whole, so memory stays at about ``chunk_size`` regardless of page size.
+        Returns the number of bytes received. Responses are not cached.
+        """
+        if response_format not in FORMAT_HEADERS:
+            raise ValueError(f"Unsupported format: {response_format}")
+        write = getattr(sink, 'write', sink)
+        if not callable(write):
+            raise TypeError("sink must be a callable or have a write() method")
+
+        request_headers = dict(headers or {})
+        request_headers.update(FORMAT_HEADERS[response_format])
+        response = self._get(quote(url, safe=''), headers=request_headers, params=params, stream=True)
+        total = 0
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    write(chunk)
+                    total += len(chunk)
+        finally:
+            response.close()
+        return total
+
+    def stream_markdown(self, url: str, sink: Union[Callable[[bytes], Any], BinaryIO],
+                        chunk_size: int = STREAM_CHUNK_SIZE, **params) -> int:
+        """Stream markdown content to ``sink``; see ``stream``"""
+        return self.stream(url, 'markdown', sink, chunk_size=chunk_size, **params)
+
+    def stream_html(self, url: str, sink: Union[Callable[[bytes], Any], BinaryIO],
+                    chunk_size: int = STREAM_CHUNK_SIZE, **params) -> int:
+        """Stream cleaned HTML content to ``sink``; see ``stream``"""
+        return self.stream(url, 'html', sink, chunk_size=chunk_size, **params)
+
+    def download(self, url: str, path: str, response_format: str = 'markdown',
+                 chunk_size: int = STREAM_CHUNK_SIZE, **params) -> int:
+        """Stream a response straight to ``path``, replacing it atomically
+
+        Screenshot formats follow the server's redirect, so
+        ``download(url, 'page.png', 'pageshot')`` saves the image itself.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.download-', suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                total = self.stream(url, response_format, f, chunk_size=chunk_size, **params)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return total
 
     def get_queue_status(self) -> Dict[str, Any]:
         """Get current queue status"""
-        response = requests.get(f"{self.base_url}/queue")
-        response.raise_for_status()
-        return response.json()
+        return self._get('queue').json()
 
     def check_queue_ui(self) -> bool:
         """Check if queue UI is accessible"""
         try:
-            response = requests.get(f"{self.base_url}/queue-ui")
-            response.raise_for_status()
+            self._get('queue-ui')
             return True
         except:
             return False
 
 
+class AsyncReaderAPI:
+    """Asyncio client for the Reader API sharing one connection pool.
+
+    All requests go through a single ``aiohttp.ClientSession`` whose connector
+    is sized to ``concurrency``, and a semaphore caps the number of in-flight
+    requests so a batch never exceeds the server's admission slots.
+
+    Usage:
+        async with AsyncReaderAPI(concurrency=8) as reader:
+            async for url, result in reader.fetch_many(urls, 'markdown'):
+                ...
+    """
+
+    def __init__(self, base_url: Optional[str] = None, concurrency: int = 5,
+                 connect_timeout: float = 10.0, read_timeout: float = 180.0):
+        env_url = os.getenv('READER_BASE_URL')
+        resolved = base_url or env_url or "http://127.0.0.1:3000"
+        self.base_url = resolved.rstrip('/')
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> 'AsyncReaderAPI':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the shared session and release pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._semaphore = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the session and semaphore bind to the running loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def _request(self, path: str, headers: Optional[Dict[str, str]] = None,
+                       params: Optional[Dict[str, Any]] = None, as_json: bool = False) -> Any:
+        session = self._get_session()
+        assert self._semaphore is not None
+        async with self._semaphore:
+            async with session.get(f"{self.base_url}/{path}", headers=headers, params=params or None) as response:
+                response.raise_for_status()
+                if as_json:
+                    return await response.json(content_type=None)
+                return await response.text()
+
+    async def get_format(self, url: str, response_format: str = 'markdown', **params) -> Any:
+        """Get ``url`` in any supported response format"""
+        if response_format not in FORMAT_HEADERS:
+            raise ValueError(f"Unsupported format: {response_format}")
+        return await self._request(quote(url, safe=''), headers=FORMAT_HEADERS[response_format],
+                                   params=params, as_json=response_format == 'json')
+
+    async def get_json(self, url: str, **params) -> Dict[str, Any]:
+        """Get JSON response with full metadata, links, and content"""
+        return await self.get_format(url, 'json', **params)
+
+    async def get_markdown(self, url: str, **params) -> str:
+        """Get markdown formatted content"""
+        return await self.get_format(url, 'markdown', **params)
+
+    async def get_html(self, url: str, **params) -> str:
+        """Get cleaned HTML content"""
+        return await self.get_format(url, 'html', **params)
+
+    async def get_text(self, url: str, **params) -> str:
+        """Get plain text content"""
+        return await self.get_format(url, 'text', **params)
+
+    async def get_screenshot(self, url: str, full_page: bool = False, **params) -> str:
+        """Get screenshot URL"""
+        return await self.get_format(url, 'pageshot' if full_page else 'screenshot', **params)
+
+    async def get_queue_status(self) -> Dict[str, Any]:
+        """Get current queue status"""
+        return await self._request('queue', as_json=True)
+
+    async def check_queue_ui(self) -> bool:
+        """Check if queue UI is accessible"""
+        try:
+            await self._request('queue-ui')
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def fetch_many(self, urls: Iterable[str], format: str = 'markdown',
+                         concurrency: Optional[int] = None, index: Optional[UrlIndex] = None,
+                         **params) -> AsyncIterator[Tuple[str, Union[Any, BaseException]]]:
+        """Fetch many URLs, yielding ``(url, result)`` pairs as they complete.
+
+        At most ``concurrency`` requests are in flight (default and upper
+        bound: the client's own limit), and ``urls`` is consumed lazily, so
+        arbitrarily large inputs never get materialized. A failed request
+        yields its exception in place of the result instead of aborting the
+        batch. With an ``index``, already-fetched canonical URLs are skipped and
+        successful URLs are added to it.
+        """
+        limit = min(concurrency or self.concurrency, self.concurrency)
+        url_iter = _dispatch_urls(urls, index)
+        pending: Dict[asyncio.Future, str] = {}
+
+        def refill() -> None:
+            while len(pending) < limit:
+                try:
+                    url = next(url_iter)
+                except StopIteration:
+                    return
+                task = asyncio.ensure_future(self.get_format(url, format, **params))
+                pending[task] = url
+
+        refill()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = pending.pop(task)
+                    exc = task.exception()
+                    if exc is None and index is not None:
+                        index.mark_done(url)
+                    yield url, exc if exc is not None else task.result()
+                refill()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending.keys(), return_exceptions=True)
+
+
 def print_separator(title: str):
     """Print a nice separator for demo sections"""
     print(f"\n{'='*60}")
@@ -330,7 +791,8 @@ Examples:
     parser.add_argument('--server-only', action='store_true',
                        help='Test only server connectivity and basic endpoints')
     parser.add_argument('--base-url', type=str,
-                       help='Override default base URL (default: http://127.0.0.1:3000)')
+                       help='Override default base URL; comma-separate several instances to load balance '
+                            '(default: http://127.0.0.1:3000)')
 
     args = parser.parse_args()
 
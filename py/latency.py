@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Compact latency histograms for the speed and load tests.
+
+``LatencyHistogram`` follows the HDR histogram layout: values are recorded in
+microseconds into log-linear buckets that keep ``significant_figures`` decimal
+digits of precision (0.1% relative error by default) across any range, so a
+run of millions of requests costs a few kilobytes instead of a list of floats.
+Only non-empty buckets are stored, histograms from several runs or threads can
+be merged, and ``to_dict``/``from_dict`` round-trip through JSON so reports can
+be diffed between runs.
+"""
+
+import math
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Percentiles reported by ``summary``, keyed as they appear in reports
+REPORT_PERCENTILES: Tuple[Tuple[str, float], ...] = (
+    ('p50', 50.0), ('p90', 90.0), ('p95', 95.0), ('p99', 99.0), ('p99.9', 99.9),
+)
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of latencies (seconds in, microseconds stored)"""
+
+    def __init__(self, significant_figures: int = 3):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        self.significant_figures = significant_figures
+        self._sub_bits = int(math.ceil(math.log2(2 * 10 ** significant_figures)))
+        self._half = 1 << (self._sub_bits - 1)
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_values(cls, seconds: Iterable[float], significant_figures: int = 3) -> 'LatencyHistogram':
+        histogram = cls(significant_figures)
+        for value in seconds:
+            histogram.record(value)
+        return histogram
+
+    def _index(self, value_us: int) -> int:
+        shift = max(0, value_us.bit_length() - self._sub_bits)
+        return shift * self._half + (value_us >> shift)
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        """Lowest and highest microsecond value that map to ``index``"""
+        if index < 2 * self._half:
+            return index, index
+        shift = index // self._half - 1
+        low = (index - shift * self._half) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        """Record a latency in seconds (negative values are clamped to zero)"""
+        value_us = max(0, int(round(seconds * 1_000_000)))
+        index = self._index(value_us)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + count
+            self.count += count
+            self.total_us += value_us * count
+            self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+            self.max_us = value_us if self.max_us is None else max(self.max_us, value_us)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """Add another histogram's samples into this one; returns self"""
+        if other.significant_figures != self.significant_figures:
+            raise ValueError("cannot merge histograms with different precision")
+        with self._lock:
+            for index, count in other.counts.items():
+                self.counts[index] = self.counts.get(index, 0) + count
+            self.count += other.count
+            self.total_us += other.total_us
+            for attr, pick in (('min_us', min), ('max_us', max)):
+                theirs = getattr(other, attr)
+                if theirs is not None:
+                    ours = getattr(self, attr)
+                    setattr(self, attr, theirs if ours is None else pick(ours, theirs))
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total_us / self.count / 1_000_000 if self.count else 0.0
+
+    @property
+    def min(self) -> float:
+        return (self.min_us or 0) / 1_000_000
+
+    @property
+    def max(self) -> float:
+        return (self.max_us or 0) / 1_000_000
+
+    def percentile(self, q: float) -> float:
+        """Latency in seconds at percentile ``q`` (nearest rank, 0 when empty)"""
+        if not self.count or self.min_us is None or self.max_us is None:
+            return 0.0
+        rank = max(1, int(math.ceil(q / 100.0 * self.count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = self._bounds(index)
+                value = min(max((low + high) // 2, self.min_us), self.max_us)
+                return value / 1_000_000
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, min, max and the report percentiles, in seconds"""
+        result: Dict[str, float] = {'count': self.count, 'mean': self.mean, 'min': self.min}
+        for name, q in REPORT_PERCENTILES:
+            result[name] = self.percentile(q)
+        result['max'] = self.max
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form: bucket lower bounds (µs) with their counts"""
+        return {
+            'unit': 'us',
+            'significant_figures': self.significant_figures,
+            'count': self.count,
+            'total': self.total_us,
+            'min': self.min_us,
+            'max': self.max_us,
+            'buckets': [[self._bounds(index)[0], self.counts[index]] for index in sorted(self.counts)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencyHistogram':
+        histogram = cls(data.get('significant_figures', 3))
+        for value_us, count in data.get('buckets', []):
+            index = histogram._index(int(value_us))
+            histogram.counts[index] = histogram.counts.get(index, 0) + int(count)
+        histogram.count = data.get('count', sum(histogram.counts.values()))
+        histogram.total_us = data.get('total', 0)
+        histogram.min_us = data.get('min')
+        histogram.max_us = data.get('max')
+        return histogram
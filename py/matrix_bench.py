@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Pipeline route and scraping-option matrix benchmark.
+
+Reads ``pipeline_routing.routes`` from ``crawl_pipeline.yaml`` and crosses
+every route with a grid of option headers (``x-target-selector``,
+``x-with-links-summary`` and so on). Each cell of the matrix is fetched a few
+times, and the report gives its latency and payload size, plus the cost
+relative to the same route without options. This shows which pipelines and
+options are expensive.
+
+Routes map to the paths the server actually serves: ``/`` and ``/json/`` are
+used as they are, and every other route reaches its pipeline through
+``/task/<pipeline>/``. PDF pipelines get the PDF URLs from the URL list; the
+other pipelines get the rest. Pipelines that need AI are skipped unless asked
+for, since they fail with AI disabled and cost money with it enabled.
+
+A grid file is YAML mapping header names to lists of values, where ``null``
+means "header not sent":
+
+    x-with-links-summary: [null, "true"]
+    x-target-selector: [null, "article", "main"]
+
+``each`` mode varies one header at a time against the no-options baseline;
+``product`` mode runs the full cartesian product.
+"""
+
+import itertools
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import yaml
+
+from latency import LatencyHistogram
+
+DEFAULT_PIPELINE_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                       'crawl_pipeline.yaml')
+
+# Option headers swept when no grid file is given
+DEFAULT_OPTION_GRID: Dict[str, List[Optional[str]]] = {
+    'x-with-links-summary': [None, 'true'],
+    'x-with-images-summary': [None, 'true'],
+    'x-target-selector': [None, 'article'],
+    'x-wait-for-selector': [None, 'body'],
+    'x-timeout': [None, '10'],
+}
+
+
+def load_routes(path: str = DEFAULT_PIPELINE_CONFIG, include_ai: bool = False) -> List[Dict[str, Any]]:
+    """Routes from ``pipeline_routing`` with the request path prefix for each"""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    routing = config.get('pipeline_routing') or {}
+    pipelines = routing.get('pipelines') or {}
+
+    routes = []
+    for route, pipeline in (routing.get('routes') or {}).items():
+        spec = pipelines.get(pipeline) or {}
+        if spec.get('ai_required') and not include_ai:
+            continue
+        if route == '/':
+            prefix = ''
+        elif route.strip('/') == 'json':
+            prefix = 'json/'
+        else:
+            prefix = f"task/{pipeline}/"
+        routes.append({
+            'route': route,
+            'pipeline': pipeline,
+            'prefix': prefix,
+            'content_type': spec.get('content_type', 'html'),
+            'ai_required': bool(spec.get('ai_required')),
+        })
+    return routes
+
+
+def load_grid(path: Optional[str] = None) -> Dict[str, List[Optional[str]]]:
+    """Option grid from a YAML file, or ``DEFAULT_OPTION_GRID``"""
+    if not path:
+        return dict(DEFAULT_OPTION_GRID)
+    with open(path, 'r', encoding='utf-8') as f:
+        grid = yaml.safe_load(f) or {}
+    if not isinstance(grid, dict) or not all(isinstance(v, list) and v for v in grid.values()):
+        raise ValueError(f"{path}: expected a mapping of header names to non-empty lists")
+    return {str(header).lower(): [None if v is None else str(v) for v in values]
+            for header, values in grid.items()}
+
+
+def option_combinations(grid: Dict[str, List[Optional[str]]], mode: str = 'each') -> List[Dict[str, str]]:
+    """Header sets to try; the first is always the no-options baseline"""
+    if mode not in ('each', 'product'):
+        raise ValueError("mode must be 'each' or 'product'")
+    combos: List[Dict[str, str]] = [{}]
+    if mode == 'each':
+        for header, values in grid.items():
+            combos += [{header: value} for value in values if value is not None]
+    else:
+        for values in itertools.product(*grid.values()):
+            combo = {header: value for header, value in zip(grid, values) if value is not None}
+            if combo:
+                combos.append(combo)
+    return combos
+
+
+def _label(options: Dict[str, str]) -> str:
+    return ', '.join(f"{header}={value}" for header, value in options.items()) or '(none)'
+
+
+def run_matrix(tester: Any, urls: Sequence[str], routes: List[Dict[str, Any]],
+               combos: List[Dict[str, str]], formats: Sequence[str] = ('markdown',),
+               iterations: int = 2) -> Dict[str, Any]:
+    """Fetch every route x options x format cell and summarize its cost
+
+    ``tester`` is a ``speedtest.SpeedTester`` (anything with a compatible
+    ``test_url``).
+    """
+    pdf_urls = [u for u in urls if u.lower().split('?')[0].endswith('.pdf')]
+    html_urls = [u for u in urls if u not in pdf_urls]
+    cells = []
+    skipped = []
+    total = 0
+    for route in routes:
+        targets = pdf_urls if route['content_type'] == 'pdf' else html_urls
+        if not targets:
+            skipped.append({'route': route['route'], 'reason': f"no {route['content_type']} URLs"})
+            continue
+        for options in combos:
+            for format_type in formats:
+                histogram = LatencyHistogram()
+                sizes = []
+                failures = 0
+                for _ in range(iterations):
+                    for url in targets:
+                        result = tester.test_url(url, format_type, prefix=route['prefix'], extra_headers=options)
+                        total += 1
+                        if result['success']:
+                            histogram.record(result['response_time'])
+                            sizes.append(result.get('content_length', 0))
+                        else:
+                            failures += 1
+                cells.append({
+                    'route': route['route'],
+                    'pipeline': route['pipeline'],
+                    'options': options,
+                    'label': _label(options),
+                    'format': format_type,
+                    'requests': histogram.count + failures,
+                    'failures': failures,
+                    'latency': histogram.summary(),
+                    'bytes': sum(sizes) / len(sizes) if sizes else 0.0,
+                })
+                print(f"   {route['route']:<20} {format_type:<9} {_label(options):<40} "
+                      f"p50 {histogram.percentile(50):.3f}s")
+
+    # Cost relative to the same route and format without options
+    baselines = {(c['route'], c['format']): c for c in cells if not c['options']}
+    for cell in cells:
+        base = baselines.get((cell['route'], cell['format']))
+        cell['latency_ratio'] = (cell['latency']['p50'] / base['latency']['p50']
+                                 if base and base['latency']['p50'] else None)
+        cell['bytes_ratio'] = cell['bytes'] / base['bytes'] if base and base['bytes'] else None
+
+    return {
+        'mode': 'matrix',
+        'routes': [r['route'] for r in routes],
+        'combinations': len(combos),
+        'iterations': iterations,
+        'total_requests': total,
+        'success_rate': (sum(c['requests'] - c['failures'] for c in cells) / total * 100) if total else 0,
+        'cells': cells,
+        'skipped': skipped,
+    }
+
+
+def print_matrix_report(report: Dict[str, Any], top: int = 10) -> None:
+    """Print formatted matrix benchmark report"""
+    print("\n" + "="*80)
+    print("📊 PIPELINE / OPTION MATRIX RESULTS")
+    print("="*80)
+    print(f"\n🎯 {len(report['routes'])} routes x {report['combinations']} option sets, "
+          f"{report['total_requests']} requests, {report['success_rate']:.1f}% successful")
+    for skip in report['skipped']:
+        print(f"   ⚠️ Skipped {skip['route']}: {skip['reason']}")
+
+    def ratio(value: Optional[float]) -> str:
+        return f"{value:.2f}x" if value is not None else '-'
+
+    print(f"\n   {'Route':<20}{'Format':<10}{'Options':<36}{'p50':>8}{'p99':>8}{'KB':>9}{'Time':>7}{'Size':>7}")
+    for cell in report['cells']:
+        failed = f"  ❌ {cell['failures']} failed" if cell['failures'] else ''
+        print(f"   {cell['route']:<20}{cell['format']:<10}{cell['label'][:35]:<36}"
+              f"{cell['latency']['p50']:>7.3f}s{cell['latency']['p99']:>7.3f}s{cell['bytes'] / 1024:>9.1f}"
+              f"{ratio(cell['latency_ratio']):>7}{ratio(cell['bytes_ratio']):>7}{failed}")
+
+    costly = sorted((c for c in report['cells'] if c['options'] and c['latency_ratio']),
+                    key=lambda c: c['latency_ratio'], reverse=True)[:top]
+    if costly:
+        print("\n💸 MOST EXPENSIVE OPTIONS (p50 vs. the same route without options):")
+        for cell in costly:
+            print(f"   {ratio(cell['latency_ratio']):>7}  {cell['route']} {cell['label']}")
+    pipelines = {}
+    for cell in report['cells']:
+        if not cell['options'] and cell['latency']['count']:
+            pipelines.setdefault(cell['pipeline'], []).append(cell['latency']['p50'])
+    if pipelines:
+        print("\n🛤️  PIPELINES BY BASELINE p50:")
+        for pipeline, values in sorted(pipelines.items(), key=lambda item: -max(item[1])):
+            print(f"   {max(values):>7.3f}s  {pipeline}")
+
+    print("\n" + "="*80)
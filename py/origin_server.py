@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Hermetic origin server for offline Reader benchmarks.
+
+Serves named corpora of synthetic pages that are generated deterministically
+from a seed, so every run (and every machine) crawls byte-identical content and
+benchmark numbers reflect DearReader rather than the internet. Each corpus
+controls page count, text size, DOM nesting depth, images and links per page,
+slow-loading resources and linked PDFs.
+
+URL layout (``<corpus>`` is a name from ``CORPORA``):
+
+    /<corpus>/index.html          links to every page and PDF
+    /<corpus>/page/<n>.html       synthetic article page
+    /<corpus>/img/<n>-<k>.png     image (deterministic PNG)
+    /<corpus>/slow/<n>-<k>.png    image served after the corpus ``slow_delay``
+    /<corpus>/doc/<n>.pdf         multi-page text PDF
+    /robots.txt                   allows everything
+
+The Reader must be able to reach the server: when it runs in Docker, bind to
+``0.0.0.0`` and pass ``--public-host host.docker.internal`` so page URLs use a
+name the container resolves. Dotted-quad hosts only pass the Reader's TLD
+check with ``domain.allow_all_tlds`` enabled.
+
+Usage:
+    uv run origin_server.py --port 8800
+    uv run origin_server.py --host 0.0.0.0 --public-host host.docker.internal --list medium
+"""
+
+import argparse
+import functools
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Named corpora: pages, paragraphs per page, words per paragraph, nesting depth
+# of the content container, images/links/slow resources per page, slow
+# resource delay in seconds and number of PDFs (with pages per PDF)
+CORPORA: Dict[str, Dict[str, Any]] = {
+    'small': {'pages': 10, 'paragraphs': 5, 'words': 60, 'depth': 3, 'images': 1, 'links': 5,
+              'slow': 0, 'slow_delay': 0.0, 'pdfs': 0, 'pdf_pages': 1},
+    'medium': {'pages': 50, 'paragraphs': 20, 'words': 80, 'depth': 6, 'images': 4, 'links': 25,
+               'slow': 0, 'slow_delay': 0.0, 'pdfs': 2, 'pdf_pages': 3},
+    'large': {'pages': 50, 'paragraphs': 200, 'words': 120, 'depth': 8, 'images': 10, 'links': 150,
+              'slow': 0, 'slow_delay': 0.0, 'pdfs': 2, 'pdf_pages': 20},
+    'deep-dom': {'pages': 20, 'paragraphs': 20, 'words': 60, 'depth': 120, 'images': 2, 'links': 20,
+                 'slow': 0, 'slow_delay': 0.0, 'pdfs': 0, 'pdf_pages': 1},
+    'media-heavy': {'pages': 20, 'paragraphs': 10, 'words': 60, 'depth': 4, 'images': 60, 'links': 10,
+                    'slow': 0, 'slow_delay': 0.0, 'pdfs': 0, 'pdf_pages': 1},
+    'slow': {'pages': 20, 'paragraphs': 10, 'words': 60, 'depth': 4, 'images': 2, 'links': 10,
+             'slow': 3, 'slow_delay': 2.0, 'pdfs': 0, 'pdf_pages': 1},
+    'pdf': {'pages': 5, 'paragraphs': 5, 'words': 60, 'depth': 3, 'images': 0, 'links': 5,
+            'slow': 0, 'slow_delay': 0.0, 'pdfs': 20, 'pdf_pages': 10},
+}
+
+WORDS = (
+    'reader library literacy chapter archive index margin quote author edition volume page '
+    'story lesson study language grammar phrase sentence paragraph summary notes column review '
+    'essay letter journal record source method result figure table measure sample signal model '
+    'system network request response render extract content format markdown document browser '
+    'cache queue worker latency throughput memory process thread socket stream buffer header '
+    'river mountain harbor valley garden forest meadow island bridge tower market station'
+).split()
+
+_PAGE_PATH = re.compile(r'^/([\w-]+)/(page|img|slow|doc)/(\d+)(?:-(\d+))?\.(html|png|pdf)$')
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[:1].upper() + text[1:] + '.'
+
+
+def _paragraph(rng: random.Random, words: int) -> str:
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(8, 18))
+        sentences.append(_sentence(rng, length))
+        words -= length
+    return ' '.join(sentences)
+
+
+def _png(width: int, height: int, rgb: Tuple[int, int, int]) -> bytes:
+    """Solid-colour RGB PNG"""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+    row = b'\x00' + bytes(rgb) * width
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(row * height)) + chunk(b'IEND', b''))
+
+
+def _pdf(title: str, pages: List[List[str]]) -> bytes:
+    """Minimal PDF with one Helvetica text stream per page"""
+    page_count = len(pages)
+    font_id = 3 + 2 * page_count
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        ('<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            ' '.join(f'{3 + 2 * i} 0 R' for i in range(page_count)), page_count)).encode(),
+    ]
+    for i, lines in enumerate(pages):
+        text = ['BT /F1 11 Tf 72 740 Td 14 TL', f'({title} - page {i + 1}) Tj T*']
+        text.extend(f'({line}) Tj T*' for line in lines)
+        text.append('ET')
+        stream = '\n'.join(text).encode('latin-1')
+        objects.append((f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                        f'/Contents {4 + 2 * i} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>').encode())
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class Corpus:
+    """Deterministic synthetic site generated from a spec and a seed"""
+
+    def __init__(self, name: str, spec: Optional[Dict[str, Any]] = None, seed: int = 0):
+        if spec is None:
+            if name not in CORPORA:
+                raise ValueError(f"Unknown corpus: {name} (known: {', '.join(sorted(CORPORA))})")
+            spec = CORPORA[name]
+        self.name = name
+        self.spec = {**CORPORA['small'], **spec}
+        self.seed = seed
+
+    def _rng(self, *key: Any) -> random.Random:
+        return random.Random(f"{self.seed}:{self.name}:" + ':'.join(map(str, key)))
+
+    def page_paths(self) -> List[str]:
+        return [f"/{self.name}/page/{n}.html" for n in range(self.spec['pages'])]
+
+    def pdf_paths(self) -> List[str]:
+        return [f"/{self.name}/doc/{n}.pdf" for n in range(self.spec['pdfs'])]
+
+    def urls(self, base_url: str, include_pdfs: bool = True) -> List[str]:
+        """Absolute URLs of every page (and PDF) when served from ``base_url``"""
+        base = base_url.rstrip('/')
+        paths = self.page_paths() + (self.pdf_paths() if include_pdfs else [])
+        return [base + path for path in paths]
+
+    def title(self, n: int) -> str:
+        return _sentence(self._rng('title', n), 5).rstrip('.')
+
+    @functools.lru_cache(maxsize=256)
+    def page(self, n: int) -> bytes:
+        spec, rng = self.spec, self._rng('page', n)
+        prefix = f"/{self.name}"
+        title = self.title(n)
+        parts = [
+            '<!DOCTYPE html>', '<html lang="en">', '<head>', '<meta charset="utf-8">',
+            f'<title>{title}</title>',
+            f'<meta name="description" content="{_sentence(rng, 12)}">',
+            '</head>', '<body>',
+            f'<header><nav><a href="{prefix}/index.html">Index</a> '
+            f'<a href="{prefix}/page/{(n + 1) % spec["pages"]}.html">Next</a></nav></header>',
+        ]
+        parts.extend(f'<div class="level-{d}">' for d in range(spec['depth']))
+        parts.append(f'<article><h1>{title}</h1>')
+
+        paragraphs, links = spec['paragraphs'], spec['links']
+        images, slow, pdfs = spec['images'], spec['slow'], spec['pdfs']
+        for p in range(paragraphs):
+            if p and p % 5 == 0:
+                parts.append(f'<h2>{_sentence(rng, 4).rstrip(".")}</h2>')
+            text = _paragraph(rng, spec['words'])
+            # Spread the page's links evenly over its paragraphs
+            for _ in range(links * (p + 1) // paragraphs - links * p // paragraphs):
+                target = rng.randrange(spec['pages'])
+                text += f' <a href="{prefix}/page/{target}.html">{rng.choice(WORDS)} {rng.choice(WORDS)}</a>'
+            parts.append(f'<p>{text}</p>')
+            for k in range(images * p // paragraphs, images * (p + 1) // paragraphs):
+                parts.append(f'<figure><img src="{prefix}/img/{n}-{k}.png" alt="{_sentence(rng, 4)}" '
+                             f'width="64" height="64"><figcaption>{_sentence(rng, 6)}</figcaption></figure>')
+        for k in range(slow):
+            parts.append(f'<img src="{prefix}/slow/{n}-{k}.png" alt="Slow resource {k}" width="64" height="64">')
+        if pdfs:
+            parts.append('<ul class="documents">')
+            parts.extend(f'<li><a href="{prefix}/doc/{(n + k) % pdfs}.pdf">Document {(n + k) % pdfs}</a></li>'
+                         for k in range(min(pdfs, 3)))
+            parts.append('</ul>')
+
+        parts.append('</article>')
+        parts.extend('</div>' for _ in range(spec['depth']))
+        parts.extend([f'<footer><p>Synthetic corpus {self.name}, page {n}</p></footer>', '</body>', '</html>'])
+        return '\n'.join(parts).encode('utf-8')
+
+    def index(self) -> bytes:
+        items = [f'<li><a href="{path}">{self.title(n)}</a></li>' for n, path in enumerate(self.page_paths())]
+        items += [f'<li><a href="{path}">Document {n}</a></li>' for n, path in enumerate(self.pdf_paths())]
+        return ('<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8">'
+                f'<title>Corpus {self.name}</title></head><body><h1>Corpus {self.name}</h1><ul>'
+                + ''.join(items) + '</ul></body></html>').encode('utf-8')
+
+    def image(self, n: int, k: int) -> bytes:
+        rng = self._rng('img', n, k)
+        return _png(64, 64, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+
+    @functools.lru_cache(maxsize=64)
+    def pdf(self, n: int) -> bytes:
+        rng = self._rng('pdf', n)
+        pages = [[_sentence(rng, 10) for _ in range(40)] for _ in range(self.spec['pdf_pages'])]
+        return _pdf(f"{self.name} document {n}", pages)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: 'ThreadingHTTPServer'
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body: bool) -> None:
+        origin: OriginServer = self.server.origin  # type: ignore[attr-defined]
+        path = self.path.split('?', 1)[0]
+        found = origin.resolve(path)
+        if found is None:
+            self._send(404, 'text/plain; charset=utf-8', b'Not found\n', send_body)
+            return
+        content_type, body, delay = found
+        if delay:
+            time.sleep(delay)
+        self._send(200, content_type, body, send_body)
+
+    def _send(self, status: int, content_type: str, body: bytes, send_body: bool) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class OriginServer:
+    """Threaded HTTP server for the synthetic corpora, runnable in the background"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, public_host: Optional[str] = None,
+                 seed: int = 0, corpora: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.corpora = {name: Corpus(name, spec, seed) for name, spec in (corpora or CORPORA).items()}
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.origin = self  # type: ignore[attr-defined]
+        self.port = self.httpd.server_address[1]
+        self.public_host = public_host or (host if host not in ('0.0.0.0', '') else '127.0.0.1')
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.public_host}:{self.port}"
+
+    def corpus(self, name: str) -> Corpus:
+        if name not in self.corpora:
+            raise ValueError(f"Unknown corpus: {name} (known: {', '.join(sorted(self.corpora))})")
+        return self.corpora[name]
+
+    def urls(self, name: str, include_pdfs: bool = True) -> List[str]:
+        """Page (and PDF) URLs of a corpus as the Reader should request them"""
+        return self.corpus(name).urls(self.base_url, include_pdfs)
+
+    def resolve(self, path: str) -> Optional[Tuple[str, bytes, float]]:
+        """Return ``(content_type, body, delay)`` for a request path, or None"""
+        with self._lock:
+            self.requests_served += 1
+        if path == '/robots.txt':
+            return 'text/plain; charset=utf-8', b'User-agent: *\nAllow: /\n', 0.0
+        if path.endswith('/index.html') and path.count('/') == 2:
+            corpus = self.corpora.get(path.split('/')[1])
+            return ('text/html; charset=utf-8', corpus.index(), 0.0) if corpus else None
+
+        match = _PAGE_PATH.match(path)
+        corpus = self.corpora.get(match.group(1)) if match else None
+        if not match or corpus is None:
+            return None
+        kind, n, k, ext = match.group(2), int(match.group(3)), match.group(4), match.group(5)
+        spec = corpus.spec
+        if kind == 'page' and ext == 'html' and k is None and n < spec['pages']:
+            return 'text/html; charset=utf-8', corpus.page(n), 0.0
+        if kind == 'doc' and ext == 'pdf' and k is None and n < spec['pdfs']:
+            return 'application/pdf', corpus.pdf(n), 0.0
+        if kind in ('img', 'slow') and ext == 'png' and k is not None and n < spec['pages']:
+            delay = spec['slow_delay'] if kind == 'slow' else 0.0
+            return 'image/png', corpus.image(n, int(k)), delay
+        return None
+
+    def start(self) -> 'OriginServer':
+        """Serve from a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.httpd.serve_forever, name='origin-server', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'OriginServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main():
+    """Run the origin server in the foreground"""
+    parser = argparse.ArgumentParser(
+        description="Hermetic origin server with deterministic synthetic corpora",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s --port 8800                                  # Serve every corpus locally
+  %(prog)s --host 0.0.0.0 --public-host host.docker.internal --port 8800
+  %(prog)s --list medium                                # Print the medium corpus URLs
+        """
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8800, help='Port to listen on (default: 8800)')
+    parser.add_argument('--public-host', help='Host name the Reader uses to reach this server')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--list', metavar='CORPUS', choices=sorted(CORPORA),
+                        help='Print the URLs of a corpus and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        host = args.public_host or (args.host if args.host != '0.0.0.0' else '127.0.0.1')
+        for url in Corpus(args.list, seed=args.seed).urls(f"http://{host}:{args.port}"):
+            print(url)
+        return
+
+    server = OriginServer(args.host, args.port, args.public_host, seed=args.seed)
+    print(f"🌐 Origin server on {args.host}:{server.port} (public URL {server.base_url})")
+    for name, corpus in sorted(server.corpora.items()):
+        spec = corpus.spec
+        print(f"   {name:<12} {spec['pages']:>3} pages, {spec['pdfs']:>2} PDFs  "
+              f"{server.base_url}/{name}/index.html")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopped")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Adaptive client-side rate control for the Reader API.
+
+The server's ``concurrencyMiddleware`` queues requests per client (keyed by
+``x-api-key``) and answers HTTP 429 with a ``Retry-After`` header once that
+queue is full. ``AdaptiveController`` keeps each key just under that limit:
+
+- concurrency follows AIMD: every successful response raises the limit by
+  ``1 / limit`` (about +1 per round trip of the window), while a 429 or 503
+  multiplies it by ``decrease_factor``;
+- a ``Retry-After`` pauses new requests for that key until it has elapsed;
+- an optional token bucket per key caps the request rate.
+
+The controller is thread-safe, so one instance can be shared by every worker
+of ``ReaderAPI.map`` or by several clients using the same key.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Iterator, Optional
+
+# Responses signalling that the server is shedding load
+THROTTLE_STATUS_CODES = (429, 503)
+
+ANONYMOUS_KEY = 'anon'
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, bursts up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self, now: Optional[float] = None) -> float:
+        """Take a token if available; otherwise return seconds until one is"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class _KeyState:
+    def __init__(self, limit: float, bucket: Optional[TokenBucket]):
+        self.limit = limit
+        self.in_flight = 0
+        self.bucket = bucket
+        self.paused_until = 0.0
+        self.completed = 0
+        self.throttled = 0
+        self.completions: Deque[float] = deque()
+
+
+class AdaptiveController:
+    """AIMD concurrency control with Retry-After pauses and per-key token buckets"""
+
+    def __init__(self, initial_concurrency: float = 4, min_concurrency: float = 1,
+                 max_concurrency: float = 64, rate: Optional[float] = None,
+                 burst: Optional[float] = None, decrease_factor: float = 0.5,
+                 default_retry_after: float = 1.0, max_throttle_retries: int = 5,
+                 rate_window: float = 10.0):
+        if not 0 < min_concurrency <= initial_concurrency <= max_concurrency:
+            raise ValueError("expected 0 < min_concurrency <= initial_concurrency <= max_concurrency")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.decrease_factor = decrease_factor
+        self.default_retry_after = default_retry_after
+        self.max_throttle_retries = max_throttle_retries
+        self.rate_window = rate_window
+        self._states: Dict[str, _KeyState] = {}
+        self._cond = threading.Condition()
+
+    def _state(self, api_key: Optional[str]) -> _KeyState:
+        key = api_key or ANONYMOUS_KEY
+        state = self._states.get(key)
+        if state is None:
+            bucket = TokenBucket(self.rate, self.burst) if self.rate else None
+            state = _KeyState(self.initial_concurrency, bucket)
+            self._states[key] = state
+        return state
+
+    def acquire(self, api_key: Optional[str] = None, timeout: Optional[float] = None) -> None:
+        """Block until a request for ``api_key`` may be sent"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            state = self._state(api_key)
+            while True:
+                now = time.monotonic()
+                wait_for: Optional[float] = None
+                if now < state.paused_until:
+                    wait_for = state.paused_until - now
+                elif state.in_flight >= max(1, int(state.limit)):
+                    wait_for = None  # Woken by release()
+                else:
+                    wait_for = state.bucket.try_take(now) if state.bucket else 0.0
+                    if wait_for == 0.0:
+                        state.in_flight += 1
+                        return
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise TimeoutError("timed out waiting for a rate-control slot")
+                    wait_for = remaining if wait_for is None else min(wait_for, remaining)
+                self._cond.wait(wait_for)
+
+    def release(self, api_key: Optional[str] = None, status: Optional[int] = None,
+                retry_after: Optional[float] = None) -> None:
+        """Report the outcome of a request started with ``acquire``
+
+        ``status`` is the HTTP status (None when no response was received) and
+        ``retry_after`` the parsed Retry-After delay, if any.
+        """
+        with self._cond:
+            state = self._state(api_key)
+            state.in_flight = max(0, state.in_flight - 1)
+            now = time.monotonic()
+
+            if status in THROTTLE_STATUS_CODES:
+                state.throttled += 1
+                state.limit = max(self.min_concurrency, state.limit * self.decrease_factor)
+                delay = retry_after if retry_after is not None else self.default_retry_after
+                state.paused_until = max(state.paused_until, now + delay)
+            elif status is not None and status < 500:
+                state.completed += 1
+                state.limit = min(self.max_concurrency, state.limit + 1.0 / state.limit)
+                state.completions.append(now)
+
+            while state.completions and now - state.completions[0] > self.rate_window:
+                state.completions.popleft()
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, api_key: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Hold a request slot; set ``outcome['status']``/``['retry_after']`` inside"""
+        self.acquire(api_key)
+        outcome: Dict[str, Any] = {'status': None, 'retry_after': None}
+        try:
+            yield outcome
+        finally:
+            self.release(api_key, status=outcome['status'], retry_after=outcome['retry_after'])
+
+    def current_rate(self, api_key: Optional[str] = None) -> float:
+        """Successful requests per second over the recent window"""
+        with self._cond:
+            state = self._state(api_key)
+            now = time.monotonic()
+            while state.completions and now - state.completions[0] > self.rate_window:
+                state.completions.popleft()
+            return len(state.completions) / self.rate_window
+
+    def stats(self, api_key: Optional[str] = None) -> Dict[str, Any]:
+        """Current limit, in-flight count, pause and rate for ``api_key``"""
+        rate = self.current_rate(api_key)
+        with self._cond:
+            state = self._state(api_key)
+            return {
+                'concurrency_limit': state.limit,
+                'in_flight': state.in_flight,
+                'paused_for': max(0.0, state.paused_until - time.monotonic()),
+                'token_rate': state.bucket.rate if state.bucket else None,
+                'completed': state.completed,
+                'throttled': state.throttled,
+                'current_rate': rate,
+            }
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Persistent client-side cache for Reader API responses.
+
+Entries are stored one file per response under a cache directory, keyed by a
+hash of the normalized (url, response format, option headers, query params)
+request. Entries expire after a TTL, and the directory is kept under a byte
+budget by evicting least-recently-used entries. A file's mtime is its creation
+time (what the TTL is measured from) and its atime is the last time it was
+read (what LRU order uses). Once over budget, eviction trims to 90% of the
+budget so the next writes do not each rescan the directory. Writes go to a
+temporary file that is atomically renamed into place, so concurrent readers
+never see a partial entry.
+
+The Reader server's ``x-no-cache`` and ``x-cache-tolerance`` headers are
+honored on the client side as well:
+
+    x-no-cache: <any value>   skip the cached entry and refresh it
+    x-cache-tolerance: <sec>  only accept entries at most <sec> seconds old
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+# Headers that control caching rather than the content of the response
+CACHE_CONTROL_HEADERS = ('x-no-cache', 'x-cache-tolerance')
+
+# Fraction of max_bytes that eviction trims down to
+LOW_WATER_MARK = 0.9
+
+# Headers that never affect the extracted content and must not be persisted
+IGNORED_HEADERS = ('x-api-key', 'authorization', 'user-agent') + CACHE_CONTROL_HEADERS
+
+
+def normalize_url(url: str) -> str:
+    """Normalize the parts of a URL that never change the fetched page"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    path = parts.path or '/'
+    return urlunsplit((scheme, netloc, path, parts.query, ''))
+
+
+def cache_directives(headers: Optional[Mapping[str, str]]) -> Tuple[bool, Optional[float]]:
+    """Return ``(no_cache, tolerance_seconds)`` from request headers"""
+    lowered = {k.lower(): v for k, v in (headers or {}).items()}
+    # Like the server's Boolean(header): any non-empty value, even "false", disables the cache
+    no_cache = bool(str(lowered.get('x-no-cache', '')).strip())
+    tolerance: Optional[float] = None
+    raw = lowered.get('x-cache-tolerance')
+    if raw is not None:
+        try:
+            tolerance = max(0.0, float(raw))
+        except (TypeError, ValueError):
+            tolerance = None
+    if no_cache and tolerance is None:
+        # Mirrors the server: x-no-cache implies a cache tolerance of zero
+        tolerance = 0.0
+    return no_cache, tolerance
+
+
+class DiskCache:
+    """Size-bounded on-disk LRU cache with per-entry TTL"""
+
+    def __init__(self, directory: str, ttl: float = 24 * 3600, max_bytes: int = 512 * 1024 * 1024):
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.directory = os.path.abspath(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = sum(entry[1] for entry in self._entries())
+
+    @staticmethod
+    def make_key(url: str, response_format: str, headers: Optional[Mapping[str, str]] = None,
+                 params: Optional[Mapping[str, Any]] = None) -> str:
+        """Build the cache key for a request"""
+        option_headers = sorted(
+            (k.lower(), str(v)) for k, v in (headers or {}).items()
+            if k.lower() not in IGNORED_HEADERS
+        )
+        query = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        material = json.dumps([normalize_url(url), response_format, option_headers, query])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _entries(self):
+        """Yield ``(path, size, last_used, created)`` for every stored entry"""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_size, st.st_atime, st.st_mtime
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Return the cached value, or None when missing, expired or too old"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        age = time.time() - entry.get('created', 0)
+        if age > self.ttl:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        if max_age is not None and age > max_age:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path, (time.time(), entry.get('created', 0)))  # Mark as recently used for LRU eviction
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry.get('value')
+
+    def set(self, key: str, value: Any, url: str = '', response_format: str = '') -> None:
+        """Store a value atomically, evicting old entries to stay within budget"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        created = time.time()
+        payload = json.dumps({'url': url, 'format': response_format, 'created': created, 'value': value})
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            try:
+                previous = os.path.getsize(path)
+            except FileNotFoundError:
+                previous = 0
+            os.utime(tmp_path, (created, created))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        with self._lock:
+            self._size += os.path.getsize(path) - previous
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def _remove(self, path: str) -> None:
+        try:
+            size = os.path.getsize(path)
+            os.unlink(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._size -= size
+
+    def evict(self) -> int:
+        """Drop expired entries and, when over budget, least-recently-used ones down to the low-water mark"""
+        now = time.time()
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(entry[1] for entry in entries)
+        target = self.max_bytes * LOW_WATER_MARK if total > self.max_bytes else total
+        removed = 0
+        for path, size, _, created in entries:
+            if now - created <= self.ttl and total <= target:
+                continue  # Keep it, but later (more recently used) entries may still be expired
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._size = total
+        return removed
+
+    def clear(self) -> None:
+        """Remove every cached entry"""
+        for path, *_ in list(self._entries()):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size, shaped like the server's /cache/stats"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': self.hits / lookups if lookups else 0,
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+            }
@@ -10,26 +10,199 @@ Requirements:
 
 Usage:
     uv run speedtest.py
+    uv run speedtest.py --load --rate 20 --duration 60
+    uv run speedtest.py --load --users 50 --duration 60
 """
 
+import argparse
+import itertools
+import json
+import math
+import random
 import requests
+import threading
 import time
 import statistics
 import sys
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from urllib.parse import quote
 
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from bench_history import DEFAULT_STORE, HistoryStore, compare, format_diff_table, make_record
+from latency import LatencyHistogram, REPORT_PERCENTILES
+from matrix_bench import (DEFAULT_PIPELINE_CONFIG, load_grid, load_routes, option_combinations,
+                          print_matrix_report, run_matrix)
+from origin_server import CORPORA, Corpus, OriginServer
+from telemetry import LEAK_SERIES, TelemetrySampler, growth_trend, leak_trends, print_telemetry, write_csv
+
+# Exit code when the run is a significant regression against the stored baseline
+REGRESSION_EXIT_CODE = 3
+
+DEFAULT_TEST_URLS = [
+    "https://www.ala.org",  # American Library Association
+    "https://www.readingpartners.org",  # Reading Partners
+    "https://literacy.org",  # ProLiteracy
+    "https://en.wikipedia.org/wiki/Reading"  # Reading on Wikipedia
+]
+
+
+# Request phases timed by test_url, in report order
+PHASES = ('connect', 'ttfb', 'download')
+
+# Connect time of the request currently running on each thread
+_phase_state = threading.local()
+
+
+def _record_connect(seconds: float) -> None:
+    _phase_state.connect = getattr(_phase_state, 'connect', 0.0) + seconds
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    """Connection that reports DNS + TCP connect time to the current thread"""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(time.perf_counter() - started)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    """Connection that reports DNS + TCP connect + TLS handshake time"""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(time.perf_counter() - started)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections record their connect time"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+def zipf_mix(urls: Sequence[str], count: int, skew: float = 1.0,
+             rng: Optional[random.Random] = None) -> List[str]:
+    """Draw ``count`` URLs with Zipf-distributed popularity
+
+    The URL at rank ``k`` (1-based, in the given order) is drawn with weight
+    ``1 / k ** skew``: a skew of 0 is uniform, higher skews concentrate the
+    traffic on the first few URLs.
+    """
+    rng = rng or random.Random(0)
+    weights = [1.0 / rank ** skew for rank in range(1, len(urls) + 1)]
+    return rng.choices(list(urls), weights=weights, k=count)
+
+
+def _percentiles(histogram: LatencyHistogram) -> Dict[str, float]:
+    return {name: histogram.percentile(q) for name, q in REPORT_PERCENTILES}
+
+
+def _format_percentiles(percentiles: Dict[str, float]) -> str:
+    return '  '.join(f"{name}: {value:.3f}s" for name, value in percentiles.items())
+
+
+def _phase_histograms() -> Dict[str, LatencyHistogram]:
+    return {phase: LatencyHistogram() for phase in PHASES}
+
+
+def _record_phases(histograms: Dict[str, LatencyHistogram], result: Dict[str, Any]) -> None:
+    for phase, seconds in result.get('phases', {}).items():
+        histograms[phase].record(seconds)
+
+
+def print_phase_table(phases: Dict[str, Dict[str, float]], indent: str = '   '):
+    """Print p50/p90/p99/max for each request phase"""
+    print(f"{indent}{'Phase':<10}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for phase in PHASES:
+        stats = phases.get(phase)
+        if not stats or not stats['count']:
+            continue
+        print(f"{indent}{phase:<10}" + ''.join(f"{stats[k]:>8.3f}s" for k in ('p50', 'p90', 'p99', 'max')))
+
 
 class SpeedTester:
     """Performance testing for Reader API"""
 
-    def __init__(self, base_url: str = "http://127.0.0.1:3000"):
+    def __init__(self, base_url: str = "http://127.0.0.1:3000", timeout: float = 30.0):
         self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
         self.session = requests.Session()
+        self._mount(TimedAdapter())
+        self.origin: Optional[OriginServer] = None
+
+    def close(self) -> None:
+        """Stop the local origin server, if one was started, and close connections"""
+        if self.origin is not None:
+            self.origin.stop()
+            self.origin = None
+        self.session.close()
+
+    def corpus_urls(self, name: str, origin_url: Optional[str] = None,
+                    public_host: Optional[str] = None, include_pdfs: bool = True) -> List[str]:
+        """URLs of a synthetic corpus from ``origin_server.CORPORA``
+
+        Without ``origin_url`` a local ``OriginServer`` is started (and kept
+        until ``close``); ``public_host`` is the name the Reader uses to reach
+        it, e.g. ``host.docker.internal`` when the Reader runs in Docker.
+        """
+        if origin_url:
+            return Corpus(name).urls(origin_url, include_pdfs)
+        if self.origin is None:
+            bind = '0.0.0.0' if public_host else '127.0.0.1'
+            self.origin = OriginServer(bind, public_host=public_host).start()
+        return self.origin.urls(name, include_pdfs)
+
+    def _mount(self, adapter: HTTPAdapter) -> None:
+        """Route all requests through ``adapter``, closing the adapters it replaces
+
+        Old pools would otherwise keep their keep-alive connections open for
+        the rest of the run, which soak tests would report as server leaks.
+        """
+        previous = {id(old): old for old in map(self.session.adapters.get, ('http://', 'https://'))
+                    if old is not None and old is not adapter}
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        for old in previous.values():
+            old.close()
+
+    def test_url(self, url: str, format_type: str = "json", prefix: str = '',
+                 extra_headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Test a single URL and return timing data
 
-    def test_url(self, url: str, format_type: str = "json") -> Dict[str, Any]:
-        """Test a single URL and return timing data"""
-        start_time = time.time()
+        ``prefix`` is a route path put before the target URL (for example
+        ``task/default_pdf/``) and ``extra_headers`` are option headers such
+        as ``X-With-Links-Summary`` sent with the request.
+
+        Times come from the monotonic ``perf_counter`` clock and are split into
+        phases: ``connect`` (DNS, TCP and TLS setup; 0 on a reused keep-alive
+        connection), ``ttfb`` (request start until the response headers
+        arrive, so it includes ``connect`` and server processing) and
+        ``download`` (reading the body).
+        """
+        _phase_state.connect = 0.0
+        start_time = time.perf_counter()
 
         try:
             if format_type == "json":
@@ -40,6 +213,7 @@ class SpeedTester:
                 headers = {'X-Respond-With': 'html'}
             else:
                 headers = {}
+            headers.update(extra_headers or {})
 
             # Only encode the path/query part, not the protocol
             from urllib.parse import urlparse, urlunparse
@@ -51,39 +225,57 @@ class SpeedTester:
             encoded_url = f"{parsed.scheme}://{parsed.netloc}{encoded_path}{query_part}"
 
             response = self.session.get(
-                f"{self.base_url}/{encoded_url}",
+                f"{self.base_url}/{prefix}{encoded_url}",
                 headers=headers,
-                timeout=30
+                timeout=self.timeout,
+                stream=True
             )
-            response.raise_for_status()
+            headers_time = time.perf_counter()
+            try:
+                response.raise_for_status()
+                # Count body bytes as they arrive instead of buffering and decoding the text
+                content_length = sum(len(chunk) for chunk in response.iter_content(chunk_size=64 * 1024))
+            finally:
+                response.close()
 
-            end_time = time.time()
+            end_time = time.perf_counter()
             response_time = end_time - start_time
 
             return {
                 'success': True,
                 'response_time': response_time,
+                'phases': {
+                    'connect': _phase_state.connect,
+                    'ttfb': headers_time - start_time,
+                    'download': end_time - headers_time,
+                },
                 'status_code': response.status_code,
-                'content_length': len(response.text),
+                'content_length': content_length,
                 'url': url,
                 'format': format_type
             }
 
         except Exception as e:
-            end_time = time.time()
+            end_time = time.perf_counter()
             response_time = end_time - start_time
 
-            return {
+            result = {
                 'success': False,
                 'response_time': response_time,
                 'error': str(e),
                 'url': url,
                 'format': format_type
             }
+            status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+            if status_code is not None:
+                result['status_code'] = status_code
+            return result
 
     def run_speed_test(self, urls: List[str], iterations: int = 3) -> Dict[str, Any]:
         """Run comprehensive speed test"""
         results = []
+        histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        phase_histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
 
         print(f"🚀 Starting speed test with {len(urls)} URLs, {iterations} iterations each")
         print("=" * 60)
@@ -109,6 +301,11 @@ class SpeedTester:
 
                 # Calculate statistics for this format
                 successful_results = [r for r in format_results if r['success']]
+                histogram = LatencyHistogram.from_values(r['response_time'] for r in successful_results)
+                histograms.setdefault(url, {})[format_type] = histogram
+                by_phase = phase_histograms.setdefault(format_type, _phase_histograms())
+                for r in successful_results:
+                    _record_phases(by_phase, r)
                 if successful_results:
                     response_times = [r['response_time'] for r in successful_results]
                     avg_time = statistics.mean(response_times)
@@ -123,6 +320,7 @@ class SpeedTester:
                         'avg_time': avg_time,
                         'min_time': min_time,
                         'max_time': max_time,
+                        'percentiles': _percentiles(histogram),
                         'success_rate': len(successful_results) / iterations * 100
                     })
                 else:
@@ -139,30 +337,433 @@ class SpeedTester:
                 'formats': url_results
             })
 
-        return self._generate_report(results)
+        return self._generate_report(results, histograms, phase_histograms)
+
+    def run_load_test(self, urls: List[str], formats: Sequence[str] = ('markdown',),
+                      rate: Optional[float] = None, users: Optional[int] = None,
+                      duration: float = 30.0, max_in_flight: int = 256,
+                      poisson: bool = False, warmup: float = 0.0,
+                      telemetry: Optional[TelemetrySampler] = None) -> Dict[str, Any]:
+        """Drive the server at a target request rate or with N virtual users
+
+        With ``rate`` the test is open-loop: requests are scheduled at fixed
+        (or, with ``poisson``, exponentially distributed) intervals whether or
+        not earlier ones have finished, so a slow server cannot slow down the
+        arrivals. Latency is measured from each request's scheduled start, so
+        time spent waiting for a free client thread is included rather than
+        hidden. With ``users`` the test is closed-loop: each virtual user sends
+        its next request as soon as the previous one completes.
+
+        URL/format pairs are cycled in order. Only responses that complete
+        within ``duration`` count towards the achieved rate. The load is first
+        held for ``warmup`` seconds without measuring, so the report reflects
+        steady state rather than cold connections and caches. A ``telemetry``
+        sampler runs for the length of the test on the same clock and its
+        correlation with latency is added to the report.
+        """
+        if (rate is None) == (users is None):
+            raise ValueError("pass exactly one of rate or users")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        if users is not None and users < 1:
+            raise ValueError("users must be at least 1")
+        if duration <= 0:
+            raise ValueError("duration must be positive")
+        if warmup < 0:
+            raise ValueError("warmup must not be negative")
+
+        threads = users if users is not None else max_in_flight
+        self._mount(TimedAdapter(pool_connections=threads, pool_maxsize=threads))
+
+        targets = itertools.cycle(list(itertools.product(urls, formats)))
+        lock = threading.Lock()
+        records: List[Dict[str, Any]] = []
+        in_flight = {'now': 0, 'peak': 0}
+
+        def next_target():
+            with lock:
+                return next(targets)
+
+        def timed_request(url: str, format_type: str, scheduled: float) -> None:
+            started = time.monotonic()
+            with lock:
+                in_flight['now'] += 1
+                in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+            try:
+                result = self.test_url(url, format_type)
+            finally:
+                finished = time.monotonic()
+                with lock:
+                    in_flight['now'] -= 1
+            result['latency'] = finished - scheduled
+            result['queue_delay'] = started - scheduled
+            result['started_at'] = scheduled - start
+            result['finished_at'] = finished - start
+            with lock:
+                records.append(result)
+
+        mode = 'open' if rate is not None else 'closed'
+        label = f"{rate:g} req/s" if rate is not None else f"{users} virtual users"
+        warming = f" after {warmup:g}s warmup" if warmup else ''
+        print(f"🚀 Load test ({mode}-loop): {label} for {duration:g}s{warming} over "
+              f"{len(urls)} URLs x {len(formats)} formats")
+
+        issued = 0
+        start = time.monotonic()
+        deadline = start + warmup + duration
+        if telemetry is not None:
+            telemetry.start(origin=start)
+        if rate is not None:
+            with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+                next_at = start
+                while next_at < deadline:
+                    delay = next_at - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    url, format_type = next_target()
+                    pool.submit(timed_request, url, format_type, next_at)
+                    issued += 1
+                    # Schedule from the plan, not the clock, so late wakeups catch up
+                    next_at += random.expovariate(rate) if poisson else 1.0 / rate
+        else:
+            counter = itertools.count()
+
+            def virtual_user() -> None:
+                while time.monotonic() < deadline:
+                    next(counter)
+                    url, format_type = next_target()
+                    timed_request(url, format_type, time.monotonic())
+
+            workers = [threading.Thread(target=virtual_user, daemon=True) for _ in range(users or 0)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            issued = next(counter)
+        drained = time.monotonic() - start - warmup
+
+        # Leave the warmup out and measure from the end of it
+        measured = [dict(r, started_at=r['started_at'] - warmup, finished_at=r['finished_at'] - warmup)
+                    for r in records if r['started_at'] >= warmup]
+        issued -= len(records) - len(measured)
+        report = self._generate_load_report(measured, mode, rate, users, duration, issued, drained,
+                                            in_flight['peak'])
+        if telemetry is not None:
+            telemetry.stop()
+            report['telemetry'] = telemetry.correlate(records)
+        return report
+
+    def run_capacity_search(self, urls: List[str], formats: Sequence[str] = ('markdown',),
+                            by: str = 'rate', start: float = 1.0, step: float = 1.0,
+                            max_level: float = 100.0, step_duration: float = 30.0,
+                            warmup: float = 10.0, slo_p99: float = 5.0,
+                            max_error_rate: float = 0.01, max_throttled_rate: float = 0.01,
+                            poisson: bool = False) -> Dict[str, Any]:
+        """Ramp the load in steps until the knee to find the highest sustainable level
+
+        ``by`` is ``'rate'`` (open-loop requests per second) or ``'users'``
+        (closed-loop concurrency). Each step runs a load test held for
+        ``warmup`` seconds before ``step_duration`` seconds of measurement.
+        A step fails, and the ramp stops there (the knee), when:
+
+        - its p99 latency exceeds ``slo_p99`` seconds;
+        - more than ``max_throttled_rate`` of requests get 429s from the
+          server's admission limit;
+        - more than ``max_error_rate`` of requests fail for other reasons;
+        - in rate mode, the achieved rate falls below 90% of the offered rate.
+        """
+        if by not in ('rate', 'users'):
+            raise ValueError("by must be 'rate' or 'users'")
+        if start <= 0 or step <= 0 or max_level < start:
+            raise ValueError("need 0 < start <= max_level and a positive step")
+
+        unit = 'req/s' if by == 'rate' else 'users'
+        print(f"📈 Capacity search by {by}: {start:g} to {max_level:g} {unit} in steps of {step:g}, "
+              f"p99 SLO {slo_p99:g}s")
+        ramp: List[Dict[str, Any]] = []
+        knee: Optional[Dict[str, Any]] = None
+        level = start
+        while level <= max_level + 1e-9:
+            load = {'rate': level} if by == 'rate' else {'users': int(level)}
+            report = self.run_load_test(urls, formats, duration=step_duration, warmup=warmup,
+                                        poisson=poisson, **load)
+            row = _capacity_step(level, by, report, slo_p99, max_error_rate, max_throttled_rate)
+            ramp.append(row)
+            verdict = '✅' if row['passed'] else f"❌ {'; '.join(row['reasons'])}"
+            print(f"   {level:g} {unit}: {row['achieved_rps']:.2f} req/s, p99 {row['p99']:.3f}s {verdict}")
+            if not row['passed']:
+                knee = row
+                break
+            level += step
+
+        passing = [row for row in ramp if row['passed']]
+        return {
+            'mode': 'capacity',
+            'by': by,
+            'slo_p99': slo_p99,
+            'max_error_rate': max_error_rate,
+            'max_throttled_rate': max_throttled_rate,
+            'step_duration': step_duration,
+            'warmup': warmup,
+            'ramp': ramp,
+            'max_passing': passing[-1] if passing else None,
+            'knee': knee,
+            'max_sustainable_rps': max((row['achieved_rps'] for row in passing), default=0.0),
+        }
+
+    def run_soak_test(self, urls: List[str], formats: Sequence[str] = ('json', 'markdown', 'html'),
+                      rate: Optional[float] = None, users: Optional[int] = None,
+                      hours: float = 1.0, segment: float = 300.0, poisson: bool = False,
+                      sampler: Optional[TelemetrySampler] = None) -> Dict[str, Any]:
+        """Hold a steady mixed workload for hours and look for resource leaks
+
+        The run is a series of back-to-back load tests of ``segment`` seconds
+        each, so memory use stays bounded and latency can be tracked over
+        time. The ``sampler`` (by default every 10s) records server RSS,
+        Chromium processes, open file descriptors and ``/queue`` counters
+        for the whole run. Each series then gets a trend fit, and steady
+        growth is flagged as a leak.
+        """
+        if hours <= 0 or segment <= 0:
+            raise ValueError("hours and segment must be positive")
+        duration = hours * 3600
+        count = max(1, math.ceil(duration / segment))
+        length = duration / count
+        sampler = sampler or TelemetrySampler(self.base_url, interval=10.0)
+
+        print(f"🕰️  Soak test: {hours:g}h as {count} segments of {length:g}s, sampling every "
+              f"{sampler.interval:g}s")
+        segments = []
+        sampler.start()
+        try:
+            for n in range(count):
+                report = self.run_load_test(urls, formats, rate=rate, users=users, duration=length,
+                                            poisson=poisson)
+                segments.append({
+                    't': time.monotonic() - sampler.origin,
+                    'completed': report['completed'],
+                    'successful': report['successful_requests'],
+                    'success_rate': report['success_rate'],
+                    'achieved_rps': report['achieved_rps'],
+                    'p50': report['latency']['p50'],
+                    'p99': report['latency']['p99'],
+                    'status_codes': report['status_codes'],
+                })
+                print(f"   [{n + 1}/{count}] {report['achieved_rps']:.2f} req/s, "
+                      f"{report['success_rate']:.1f}% ok, p99 {report['latency']['p99']:.3f}s")
+        finally:
+            sampler.stop()
+
+        trends = leak_trends(sampler.samples)
+        if len(segments) >= 3:
+            trends['latency_p99'] = growth_trend([row['t'] for row in segments],
+                                                 [row['p99'] for row in segments])
+        completed = sum(row['completed'] for row in segments)
+        successful = sum(row['successful'] for row in segments)
+        return {
+            'mode': 'soak',
+            'hours': hours,
+            'segment': length,
+            'rate': rate,
+            'users': users,
+            'completed': completed,
+            'success_rate': successful / completed * 100 if completed else 0,
+            'p99_median': statistics.median(row['p99'] for row in segments),
+            'segments': segments,
+            'samples': sampler.samples,
+            'trends': trends,
+            'leaks': [key for key, trend in trends.items() if trend['growing']],
+        }
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Current ``/cache/stats`` of the server, or None if unavailable"""
+        try:
+            response = self.session.get(f"{self.base_url}/cache/stats", timeout=10)
+            try:
+                return response.json() if response.ok else None
+            finally:
+                response.close()
+        except (requests.RequestException, ValueError):
+            return None
+
+    def run_cache_test(self, urls: List[str], formats: Sequence[str] = ('markdown',),
+                       warm_passes: int = 3, pass_size: Optional[int] = None,
+                       skew: float = 1.0, seed: int = 0) -> Dict[str, Any]:
+        """Measure what the response cache buys: a cold pass, then warm passes
+
+        The cache is cleared with ``POST /cache/clear`` and every URL/format
+        pair is fetched once (the cold pass). Each warm pass then draws
+        ``pass_size`` URLs (default: twice the URL count) from a Zipf mix with
+        the given ``skew``, so popular URLs repeat as they would in real
+        traffic. Requests run one at a time so each can be classified as a
+        hit or a miss from the change in ``/cache/stats`` across it. A request
+        is ``unavailable`` when the stats could not be read and ``unchanged``
+        when neither counter moved (the response bypassed the cache).
+        """
+        if warm_passes < 1:
+            raise ValueError("warm_passes must be at least 1")
+        pass_size = pass_size or 2 * len(urls)
+        rng = random.Random(seed)
+
+        print(f"🧊 Cache test: clearing the cache, then 1 cold + {warm_passes} warm passes "
+              f"of {pass_size} requests (Zipf skew {skew:g})")
+        cleared = False
+        try:
+            response = self.session.post(f"{self.base_url}/cache/clear", timeout=10)
+            cleared = response.ok
+            response.close()
+        except requests.RequestException:
+            pass
+
+        passes = [('cold', list(urls))]
+        passes += [(f'warm {n}', zipf_mix(urls, pass_size, skew, rng)) for n in range(1, warm_passes + 1)]
+        records = []
+        for name, mix in passes:
+            for url in mix:
+                for format_type in formats:
+                    before = self.cache_stats()
+                    result = self.test_url(url, format_type)
+                    after = self.cache_stats()
+                    result['pass'] = name
+                    if before is None or after is None:
+                        result['cache'] = 'unavailable'
+                    elif after.get('hits', 0) > before.get('hits', 0):
+                        result['cache'] = 'hit'
+                    elif after.get('misses', 0) > before.get('misses', 0):
+                        result['cache'] = 'miss'
+                    else:
+                        result['cache'] = 'unchanged'
+                    records.append(result)
+        return self._generate_cache_report(records, cleared, skew, pass_size, self.cache_stats())
+
+    def _generate_cache_report(self, records: List[Dict[str, Any]], cleared: bool, skew: float,
+                               pass_size: int, final_stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Summarize a cache test run"""
+        successes = [r for r in records if r['success']]
+        by_pass: Dict[str, Dict[str, Any]] = {}
+        for r in records:
+            stats = by_pass.setdefault(r['pass'], {'requests': 0, 'successful': 0, 'hits': 0, 'misses': 0,
+                                                   'histogram': LatencyHistogram()})
+            stats['requests'] += 1
+            if r['cache'] == 'hit':
+                stats['hits'] += 1
+            elif r['cache'] == 'miss':
+                stats['misses'] += 1
+            if r['success']:
+                stats['successful'] += 1
+                stats['histogram'].record(r['response_time'])
+        passes = {}
+        for name, stats in by_pass.items():
+            lookups = stats['hits'] + stats['misses']
+            passes[name] = {
+                'requests': stats['requests'],
+                'successful': stats['successful'],
+                'hits': stats['hits'],
+                'misses': stats['misses'],
+                'hit_ratio': stats['hits'] / lookups if lookups else None,
+                'latency': stats['histogram'].summary(),
+            }
+        warm = [r for r in records if r['pass'] != 'cold']
+        warm_hits = sum(1 for r in warm if r['cache'] == 'hit')
+        warm_lookups = sum(1 for r in warm if r['cache'] in ('hit', 'miss'))
+
+        return {
+            'mode': 'cache',
+            'cleared': cleared,
+            'skew': skew,
+            'pass_size': pass_size,
+            'unique_urls': len({r['url'] for r in records}),
+            'total_requests': len(records),
+            'successful_requests': len(successes),
+            'success_rate': len(successes) / len(records) * 100 if records else 0,
+            'warm_hit_ratio': warm_hits / warm_lookups if warm_lookups else None,
+            'unclassified': sum(1 for r in records if r['cache'] not in ('hit', 'miss')),
+            'stats_unavailable': sum(1 for r in records if r['cache'] == 'unavailable'),
+            'counters_unchanged': sum(1 for r in records if r['cache'] == 'unchanged'),
+            'passes': passes,
+            'latency': {
+                kind: LatencyHistogram.from_values(
+                    r['response_time'] for r in successes if r['cache'] == kind).summary()
+                for kind in ('hit', 'miss')
+            },
+            'cold': passes['cold']['latency'],
+            'warm': LatencyHistogram.from_values(r['response_time'] for r in warm if r['success']).summary(),
+            'cache_stats': final_stats,
+        }
+
+    def _generate_load_report(self, records: List[Dict[str, Any]], mode: str,
+                              rate: Optional[float], users: Optional[int], duration: float,
+                              issued: int, drained: float, peak_in_flight: int) -> Dict[str, Any]:
+        """Summarize a load test run"""
+        successes = [r for r in records if r['success']]
+        in_window = [r for r in successes if r['finished_at'] <= duration]
+        phases = _phase_histograms()
+        for r in successes:
+            _record_phases(phases, r)
+        status_codes: Dict[str, int] = {}
+        for r in records:
+            key = str(r.get('status_code', 'error'))
+            status_codes[key] = status_codes.get(key, 0) + 1
 
-    def _generate_report(self, results: List[Dict]) -> Dict[str, Any]:
-        """Generate comprehensive performance report"""
+        return {
+            'mode': mode,
+            'target_rps': rate,
+            'users': users,
+            'duration': duration,
+            'issued': issued,
+            'completed': len(records),
+            'successful_requests': len(successes),
+            'failed_requests': len(records) - len(successes),
+            'success_rate': len(successes) / len(records) * 100 if records else 0,
+            'status_codes': status_codes,
+            'offered_rps': issued / duration,
+            'achieved_rps': len(in_window) / duration,
+            'drain_time': max(0.0, drained - duration),
+            'peak_in_flight': peak_in_flight,
+            'latency': LatencyHistogram.from_values(r['latency'] for r in successes).summary(),
+            'queue_delay': LatencyHistogram.from_values(r['queue_delay'] for r in records).summary(),
+            'phases': {phase: histogram.summary() for phase, histogram in phases.items()},
+        }
+
+    def _generate_report(self, results: List[Dict],
+                         histograms: Optional[Dict[str, Dict[str, LatencyHistogram]]] = None,
+                         phase_histograms: Optional[Dict[str, Dict[str, LatencyHistogram]]] = None
+                         ) -> Dict[str, Any]:
+        """Generate comprehensive performance report
+
+        Statistics come from per-request latencies: ``histograms`` maps each
+        URL to a ``LatencyHistogram`` per format, which are merged per format
+        and overall. They are also exported under ``histograms`` so reports
+        saved as JSON can be compared or merged later. ``phase_histograms``
+        maps each format to one histogram per request phase.
+        """
+        histograms = histograms or {}
+        phase_histograms = phase_histograms or {}
+        overall_phases = _phase_histograms()
+        for by_phase in phase_histograms.values():
+            for phase, histogram in by_phase.items():
+                overall_phases[phase].merge(histogram)
         total_requests = 0
         successful_requests = 0
-        all_response_times = []
+        overall = LatencyHistogram()
 
         format_stats = {
-            'json': {'times': [], 'successes': 0, 'total': 0},
-            'markdown': {'times': [], 'successes': 0, 'total': 0},
-            'html': {'times': [], 'successes': 0, 'total': 0}
+            format_type: {'histogram': LatencyHistogram(), 'successes': 0, 'total': 0}
+            for format_type in ('json', 'markdown', 'html')
         }
 
         for url_result in results:
             for format_result in url_result['formats']:
                 format_type = format_result['format']
-                format_stats[format_type]['total'] += format_result['total_count']
-                format_stats[format_type]['successes'] += format_result['success_count']
+                stats = format_stats.setdefault(format_type, {'histogram': LatencyHistogram(),
+                                                              'successes': 0, 'total': 0})
+                stats['total'] += format_result['total_count']
+                stats['successes'] += format_result['success_count']
 
-                if 'avg_time' in format_result:
-                    # Add average time for each successful iteration
-                    format_stats[format_type]['times'].extend([format_result['avg_time']] * format_result['success_count'])
-                    all_response_times.extend([format_result['avg_time']] * format_result['success_count'])
+                histogram = histograms.get(url_result['url'], {}).get(format_type)
+                if histogram is not None:
+                    stats['histogram'].merge(histogram)
+                    overall.merge(histogram)
 
                 total_requests += format_result['total_count']
                 successful_requests += format_result['success_count']
@@ -175,24 +776,38 @@ class SpeedTester:
                 'total_requests': total_requests,
                 'successful_requests': successful_requests,
                 'overall_success_rate': overall_success_rate,
-                'average_response_time': statistics.mean(all_response_times) if all_response_times else 0,
-                'median_response_time': statistics.median(all_response_times) if all_response_times else 0,
-                'min_response_time': min(all_response_times) if all_response_times else 0,
-                'max_response_time': max(all_response_times) if all_response_times else 0
+                'average_response_time': overall.mean,
+                'median_response_time': overall.percentile(50),
+                'min_response_time': overall.min,
+                'max_response_time': overall.max,
+                'percentiles': _percentiles(overall),
             },
             'format_breakdown': {},
-            'url_results': results
+            'phase_breakdown': {
+                'overall': {phase: h.summary() for phase, h in overall_phases.items()},
+                'formats': {f: {phase: h.summary() for phase, h in by_phase.items()}
+                            for f, by_phase in phase_histograms.items()},
+            },
+            'url_results': results,
+            'histograms': {
+                'overall': overall.to_dict(),
+                'formats': {f: stats['histogram'].to_dict() for f, stats in format_stats.items()},
+                'urls': {url: {f: h.to_dict() for f, h in by_format.items()}
+                         for url, by_format in histograms.items()},
+            },
         }
 
         # Format-specific statistics
         for format_type, stats in format_stats.items():
-            if stats['times']:
+            histogram = stats['histogram']
+            if histogram.count:
                 report['format_breakdown'][format_type] = {
                     'success_rate': stats['successes'] / stats['total'] * 100,
-                    'average_time': statistics.mean(stats['times']),
-                    'median_time': statistics.median(stats['times']),
-                    'min_time': min(stats['times']),
-                    'max_time': max(stats['times']),
+                    'average_time': histogram.mean,
+                    'median_time': histogram.percentile(50),
+                    'min_time': histogram.min,
+                    'max_time': histogram.max,
+                    'percentiles': _percentiles(histogram),
                     'total_requests': stats['total'],
                     'successful_requests': stats['successes']
                 }
@@ -206,6 +821,13 @@ class SpeedTester:
         return report
 
 
+def save_report(report: Dict[str, Any], path: str) -> None:
+    """Write a report as JSON for later comparison"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"💾 Report saved to {path}")
+
+
 def print_report(report: Dict[str, Any]):
     """Print formatted performance report"""
     print("\n" + "="*80)
@@ -221,6 +843,12 @@ def print_report(report: Dict[str, Any]):
     print(f"   Median Response Time: {summary['median_response_time']:.2f}s")
     print(f"   Min Response Time: {summary['min_response_time']:.2f}s")
     print(f"   Max Response Time: {summary['max_response_time']:.2f}s")
+    if 'percentiles' in summary:
+        print(f"   Percentiles: {_format_percentiles(summary['percentiles'])}")
+
+    if 'phase_breakdown' in report:
+        print("\n⏱️  PHASE BREAKDOWN (connect + server = ttfb, then download):")
+        print_phase_table(report['phase_breakdown']['overall'])
 
     print("\n📋 FORMAT BREAKDOWN:")
     for format_type, stats in report['format_breakdown'].items():
@@ -231,6 +859,10 @@ def print_report(report: Dict[str, Any]):
             print(f"   Median Time: {stats['median_time']:.2f}s")
             print(f"   Min Time: {stats['min_time']:.2f}s")
             print(f"   Max Time: {stats['max_time']:.2f}s")
+            print(f"   Percentiles: {_format_percentiles(stats['percentiles'])}")
+            phases = report.get('phase_breakdown', {}).get('formats', {}).get(format_type)
+            if phases:
+                print_phase_table(phases)
 
     print("\n📈 INDIVIDUAL URL RESULTS:")
     for url_result in report['url_results']:
@@ -241,6 +873,177 @@ def print_report(report: Dict[str, Any]):
             print(f"   {status} {format_result['format'].upper()}: {format_result['success_rate']:.1f}% success")
             if 'avg_time' in format_result:
                 print(f"      Average: {format_result['avg_time']:.2f}s")
+            if 'percentiles' in format_result:
+                p = format_result['percentiles']
+                print(f"      p50: {p['p50']:.3f}s  p99: {p['p99']:.3f}s")
+
+    print("\n" + "="*80)
+
+
+def print_load_report(report: Dict[str, Any]):
+    """Print formatted load test report"""
+    print("\n" + "="*80)
+    print("📊 LOAD TEST RESULTS")
+    print("="*80)
+
+    if report['mode'] == 'open':
+        print(f"\n🎯 Open-loop at {report['target_rps']:g} req/s for {report['duration']:g}s")
+    else:
+        print(f"\n🎯 Closed-loop with {report['users']} virtual users for {report['duration']:g}s")
+    print(f"   Issued: {report['issued']}  Completed: {report['completed']}  "
+          f"Failed: {report['failed_requests']}")
+    print(f"   Success Rate: {report['success_rate']:.1f}%")
+    print(f"   Offered Rate: {report['offered_rps']:.2f} req/s")
+    print(f"   Achieved Rate: {report['achieved_rps']:.2f} successful req/s")
+    print(f"   Peak In-Flight: {report['peak_in_flight']}  Drain Time: {report['drain_time']:.2f}s")
+    codes = ', '.join(f"{code}: {count}" for code, count in sorted(report['status_codes'].items()))
+    print(f"   Status Codes: {codes or 'none'}")
+
+    latency = report['latency']
+    print("\n⏱️  LATENCY UNDER LOAD (successful requests):")
+    print(f"   Mean: {latency['mean']:.3f}s  Max: {latency['max']:.3f}s")
+    print(f"   {_format_percentiles({name: latency[name] for name, _ in REPORT_PERCENTILES})}")
+    if report['mode'] == 'open':
+        delay = report['queue_delay']
+        print(f"   Client queueing: p99 {delay['p99']:.3f}s, max {delay['max']:.3f}s")
+    print("\n⏱️  PHASE BREAKDOWN:")
+    print_phase_table(report['phases'])
+    if 'telemetry' in report:
+        print_telemetry(report['telemetry'])
+
+    print("\n" + "="*80)
+
+
+def _capacity_step(level: float, by: str, report: Dict[str, Any], slo_p99: float,
+                   max_error_rate: float, max_throttled_rate: float) -> Dict[str, Any]:
+    """Judge one capacity search step against the SLO and error budgets"""
+    completed = report['completed']
+    throttled = report['status_codes'].get('429', 0)
+    errors = report['failed_requests'] - throttled
+    row = {
+        'level': level,
+        'offered_rps': report['offered_rps'],
+        'achieved_rps': report['achieved_rps'],
+        'p50': report['latency']['p50'],
+        'p99': report['latency']['p99'],
+        'throttled_rate': throttled / completed if completed else 0.0,
+        'error_rate': errors / completed if completed else 0.0,
+        'completed': completed,
+    }
+    reasons = []
+    if not report['successful_requests']:
+        reasons.append("no successful requests")
+    elif row['p99'] > slo_p99:
+        reasons.append(f"p99 {row['p99']:.2f}s over the {slo_p99:g}s SLO")
+    if row['throttled_rate'] > max_throttled_rate:
+        reasons.append(f"{row['throttled_rate'] * 100:.1f}% throttled (429)")
+    if row['error_rate'] > max_error_rate:
+        reasons.append(f"{row['error_rate'] * 100:.1f}% errors")
+    if by == 'rate' and row['achieved_rps'] < 0.9 * level:
+        reasons.append(f"only {row['achieved_rps']:.2f} of {level:g} req/s achieved")
+    row['passed'] = not reasons
+    row['reasons'] = reasons
+    return row
+
+
+def print_capacity_report(report: Dict[str, Any]):
+    """Print formatted capacity search report"""
+    print("\n" + "="*80)
+    print("📊 CAPACITY SEARCH RESULTS")
+    print("="*80)
+
+    unit = 'req/s' if report['by'] == 'rate' else 'users'
+    print(f"\n🎯 SLO: p99 <= {report['slo_p99']:g}s, <= {report['max_throttled_rate'] * 100:g}% throttled, "
+          f"<= {report['max_error_rate'] * 100:g}% errors ({report['step_duration']:g}s steps after "
+          f"{report['warmup']:g}s warmup)")
+    print(f"\n   {'Level':>8} {'Offered':>9} {'Achieved':>9} {'p50':>8} {'p99':>8} {'429s':>6} {'Errors':>7}")
+    for row in report['ramp']:
+        mark = '✅' if row['passed'] else '❌'
+        print(f"   {row['level']:>8g} {row['offered_rps']:>9.2f} {row['achieved_rps']:>9.2f} "
+              f"{row['p50']:>7.3f}s {row['p99']:>7.3f}s {row['throttled_rate'] * 100:>5.1f}% "
+              f"{row['error_rate'] * 100:>6.1f}% {mark}")
+
+    best = report['max_passing']
+    if best:
+        print(f"\n🏁 Highest passing level: {best['level']:g} {unit} "
+              f"({report['max_sustainable_rps']:.2f} successful req/s)")
+    else:
+        print("\n❌ Even the first step failed the SLO")
+    if report['knee']:
+        print(f"   Knee at {report['knee']['level']:g} {unit}: {'; '.join(report['knee']['reasons'])}")
+    else:
+        print(f"   No knee up to {report['ramp'][-1]['level']:g} {unit}: raise --max-level to search further")
+
+    print("\n" + "="*80)
+
+
+def print_soak_report(report: Dict[str, Any]):
+    """Print formatted soak test report"""
+    print("\n" + "="*80)
+    print("📊 SOAK TEST RESULTS")
+    print("="*80)
+
+    load = f"{report['rate']:g} req/s" if report['rate'] is not None else f"{report['users']} users"
+    print(f"\n🎯 {report['hours']:g}h at {load}: {report['completed']} requests, "
+          f"{report['success_rate']:.1f}% successful, median segment p99 {report['p99_median']:.3f}s")
+    print(f"   {len(report['samples'])} telemetry samples, {len(report['segments'])} segments")
+
+    labels = dict(LEAK_SERIES, latency_p99='segment p99 latency (s)')
+    print(f"\n   {'Series':<24}{'Start':>10}{'End':>10}{'Per hour':>11}{'Tau':>7}  Verdict")
+    for key, trend in report['trends'].items():
+        verdict = '❌ growing' if trend['growing'] else '✅ stable'
+        print(f"   {labels.get(key, key):<24}{trend['start']:>10.2f}{trend['end']:>10.2f}"
+              f"{trend['slope_per_hour']:>+11.2f}{trend['tau']:>7.2f}  {verdict}")
+    if not report['trends']:
+        print("   Not enough samples for trends: run longer or lower the sample interval")
+    if report['leaks']:
+        print(f"\n❌ POSSIBLE LEAKS: {', '.join(labels.get(key, key) for key in report['leaks'])}")
+    elif report['trends']:
+        print("\n✅ No steady growth detected")
+
+    print("\n" + "="*80)
+
+
+def print_cache_report(report: Dict[str, Any]):
+    """Print formatted cache test report"""
+    print("\n" + "="*80)
+    print("📊 CACHE TEST RESULTS")
+    print("="*80)
+
+    if not report['cleared']:
+        print("\n⚠️ POST /cache/clear failed: the cold pass may include warm entries")
+    print(f"\n🎯 {report['unique_urls']} URLs, {report['total_requests']} requests, "
+          f"Zipf skew {report['skew']:g}, {report['pass_size']} requests per warm pass")
+    print(f"   Success Rate: {report['success_rate']:.1f}%")
+    ratio = report['warm_hit_ratio']
+    print(f"   Warm Hit Ratio: {'n/a' if ratio is None else f'{ratio * 100:.1f}%'}")
+
+    print("\n🔁 PASSES:")
+    for name, stats in report['passes'].items():
+        pass_ratio = 'n/a' if stats['hit_ratio'] is None else f"{stats['hit_ratio'] * 100:.0f}%"
+        print(f"   {name:<8} hits {stats['hits']:>4}  misses {stats['misses']:>4}  hit ratio {pass_ratio:>4}  "
+              f"p50 {stats['latency']['p50']:.3f}s  p99 {stats['latency']['p99']:.3f}s")
+
+    print("\n⏱️  LATENCY BY CACHE OUTCOME:")
+    for kind, latency in report['latency'].items():
+        if latency['count']:
+            print(f"   {kind.upper():<5} ({latency['count']} requests): "
+                  f"{_format_percentiles({name: latency[name] for name, _ in REPORT_PERCENTILES})}")
+    hit, miss = report['latency']['hit'], report['latency']['miss']
+    if hit['count'] and miss['count'] and hit['p50']:
+        print(f"   A hit is {miss['p50'] / hit['p50']:.1f}x faster than a miss at the median")
+
+    stats = report['cache_stats']
+    if stats:
+        print(f"\n🗄️  CACHE: {stats.get('keys', 0)} keys, {stats.get('vsize', 0) / 1024:.0f} KB of values "
+              f"(cache.enabled: {stats.get('enabled')})")
+    if report['stats_unavailable']:
+        print(f"   {report['stats_unavailable']} requests could not be classified (/cache/stats unavailable)")
+    if report['counters_unchanged']:
+        print(f"   {report['counters_unchanged']} requests left the /cache/stats counters unchanged "
+              f"(the responses bypassed the response cache)")
+    if report['stats_unavailable'] < report['total_requests'] and not report['latency']['hit']['count']:
+        print("⚠️ No cache hits on warm passes: check cache.enable_response_cache and cache_size_limit")
 
     print("\n" + "="*80)
 
@@ -267,32 +1070,100 @@ def check_server_status(base_url: str) -> bool:
         return False
 
 
-def main():
-    """Main speed test function"""
-    print("🚀 DearReader API Speed Test")
-    print("="*50)
+def run_load(tester: SpeedTester, args: argparse.Namespace,
+             test_urls: List[str]) -> Tuple[int, Dict[str, Any]]:
+    """Run the load test mode; returns the exit code and the report"""
+    telemetry = None
+    if args.telemetry:
+        telemetry = TelemetrySampler(args.base_url, interval=args.telemetry_interval,
+                                     server_pid=args.server_pid, api_key=args.api_key)
+    report = tester.run_load_test(test_urls, args.formats, rate=args.rate, users=args.users,
+                                  duration=args.duration, poisson=args.poisson, warmup=args.warmup,
+                                  telemetry=telemetry)
+    print_load_report(report)
+    if args.json:
+        save_report(report, args.json)
+    if report['success_rate'] < 50.0:
+        print("⚠️ WARNING: Success rate under load is below 50%")
+        return 1, report
+    return 0, report
 
-    # Initialize speed tester
-    tester = SpeedTester()
 
-    # Check server status
-    if not check_server_status(tester.base_url):
-        sys.exit(1)
+def run_capacity(tester: SpeedTester, args: argparse.Namespace,
+                 test_urls: List[str]) -> Tuple[int, Dict[str, Any]]:
+    """Run the capacity search; returns the exit code and the report"""
+    report = tester.run_capacity_search(
+        test_urls, args.formats, by=args.capacity, start=args.start, step=args.step,
+        max_level=args.max_level, step_duration=args.duration, warmup=args.warmup,
+        slo_p99=args.slo_p99, max_error_rate=args.max_error_rate,
+        max_throttled_rate=args.max_throttled, poisson=args.poisson)
+    print_capacity_report(report)
+    if args.json:
+        save_report(report, args.json)
+    return (0 if report['max_passing'] else 1), report
+
+
+def run_soak(tester: SpeedTester, args: argparse.Namespace,
+             test_urls: List[str]) -> Tuple[int, Dict[str, Any]]:
+    """Run the soak test; returns the exit code and the report"""
+    sampler = TelemetrySampler(args.base_url, interval=args.telemetry_interval,
+                               server_pid=args.server_pid, api_key=args.api_key)
+    report = tester.run_soak_test(test_urls, args.formats, rate=args.rate, users=args.users,
+                                  hours=args.soak, segment=args.segment, poisson=args.poisson,
+                                  sampler=sampler)
+    print_soak_report(report)
+    if args.json:
+        save_report(report, args.json)
+    if args.timeseries:
+        write_csv(report['samples'], args.timeseries)
+        print(f"📈 Time series written to {args.timeseries}")
+    if report['success_rate'] < 50.0:
+        print("⚠️ WARNING: Success rate during the soak is below 50%")
+        return 1, report
+    return (1 if report['leaks'] else 0), report
+
+
+def run_matrix_bench(tester: SpeedTester, args: argparse.Namespace,
+                     test_urls: List[str]) -> Tuple[int, Dict[str, Any]]:
+    """Run the pipeline route x option matrix; returns the exit code and the report"""
+    routes = load_routes(args.pipeline_config, include_ai=args.include_ai)
+    combos = option_combinations(load_grid(args.grid), args.grid_mode)
+    print(f"🧮 Matrix: {len(routes)} routes from {args.pipeline_config} x {len(combos)} option sets "
+          f"x {len(args.formats)} formats, {args.iterations} iterations")
+    report = run_matrix(tester, test_urls, routes, combos, args.formats, iterations=args.iterations)
+    print_matrix_report(report)
+    if args.json:
+        save_report(report, args.json)
+    if report['success_rate'] < 50.0:
+        print("⚠️ WARNING: Success rate across the matrix is below 50%")
+        return 1, report
+    return 0, report
+
 
-    # Test URLs focused on reading and education
-    test_urls = [
-        "https://www.ala.org",  # American Library Association
-        "https://www.readingpartners.org",  # Reading Partners
-        "https://literacy.org",  # ProLiteracy
-        "https://en.wikipedia.org/wiki/Reading"  # Reading on Wikipedia
-    ]
+def run_cache(tester: SpeedTester, args: argparse.Namespace,
+              test_urls: List[str]) -> Tuple[int, Dict[str, Any]]:
+    """Run the cold-versus-warm cache test; returns the exit code and the report"""
+    report = tester.run_cache_test(test_urls, args.formats, warm_passes=args.warm_passes,
+                                   pass_size=args.pass_size, skew=args.zipf, seed=args.seed)
+    print_cache_report(report)
+    if args.json:
+        save_report(report, args.json)
+    if report['success_rate'] < 50.0:
+        print("⚠️ WARNING: Success rate in the cache test is below 50%")
+        return 1, report
+    return 0, report
 
-    # Run speed test
+
+def run_sequential(tester: SpeedTester, args: argparse.Namespace,
+                   test_urls: List[str]) -> Tuple[int, Dict[str, Any]]:
+    """Run the sequential speed test; returns the exit code and the report"""
     print("\n🏃 Running comprehensive speed test...")
-    report = tester.run_speed_test(test_urls, iterations=3)
+    report = tester.run_speed_test(test_urls, iterations=args.iterations)
 
     # Print results
     print_report(report)
+    if args.json:
+        save_report(report, args.json)
 
     # Check if test should fail based on success rate
     summary = report['summary']
@@ -303,17 +1174,230 @@ def main():
     if overall_success_rate == 0.0:
         print("❌ CRITICAL FAILURE: All requests failed!")
         print("💡 This indicates the API is not functioning properly.")
-        sys.exit(1)
+        return 1, report
     elif overall_success_rate < 50.0:
         print("⚠️ WARNING: Success rate is below 50%")
         print("💡 The API may have issues that need attention.")
-        sys.exit(1)
+        return 1, report
     else:
         print("✅ Speed test completed successfully!")
         print("💡 Tips for better performance:")
         print("   • Use caching for repeated requests")
         print("   • Consider rate limiting for production use")
         print("   • Monitor server resources during high load")
+    return 0, report
+
+
+def selected_mode(args: argparse.Namespace) -> str:
+    """The test mode chosen on the command line"""
+    if args.load:
+        return 'load'
+    if args.cache:
+        return 'cache'
+    if args.capacity:
+        return 'capacity'
+    if args.soak:
+        return 'soak'
+    if args.matrix:
+        return 'matrix'
+    return 'sequential'
+
+
+def check_history(report: Dict[str, Any], args: argparse.Namespace, test_urls: List[str]) -> int:
+    """Record the run in the history store and gate on regressions; returns the exit code"""
+    mode = selected_mode(args)
+    settings: Dict[str, Any] = {
+        'mode': mode,
+        'base_url': args.base_url,
+        # Corpus URLs embed the origin's random port, so identify them by name
+        'targets': {'corpus': args.corpus, 'pdfs': not args.no_pdfs} if args.corpus else sorted(test_urls),
+        'formats': ['html', 'json', 'markdown'] if mode == 'sequential' else sorted(args.formats),
+    }
+    if mode == 'sequential':
+        settings['iterations'] = args.iterations
+    elif mode == 'load':
+        settings.update(rate=args.rate, users=args.users, duration=args.duration, poisson=args.poisson,
+                        warmup=args.warmup)
+    elif mode == 'matrix':
+        settings.update(iterations=args.iterations, grid=load_grid(args.grid), grid_mode=args.grid_mode,
+                        include_ai=args.include_ai)
+    elif mode == 'soak':
+        settings.update(rate=args.rate, users=args.users, hours=args.soak, poisson=args.poisson)
+    elif mode == 'capacity':
+        settings.update(by=args.capacity, start=args.start, step=args.step, max_level=args.max_level,
+                        duration=args.duration, warmup=args.warmup, poisson=args.poisson,
+                        slo_p99=args.slo_p99, max_error_rate=args.max_error_rate,
+                        max_throttled=args.max_throttled)
+    else:
+        settings.update(warm_passes=args.warm_passes, pass_size=args.pass_size, zipf=args.zipf, seed=args.seed)
+    store = HistoryStore(args.history)
+    record = make_record(report, settings)
+    baseline = store.baseline(record['config_fingerprint'], record['env_fingerprint'], args.baseline_runs)
+    rows = compare(record, baseline, tolerance=args.tolerance)
+    regressed = [row['metric'] for row in rows if row['status'] == 'regressed']
+    record['regressed'] = bool(regressed) and not args.accept
+    record['rebaseline'] = args.accept
+    store.append(record)
+
+    revision = (record['git']['revision'] or 'unknown')[:12]
+    print(f"\n📚 BASELINE COMPARISON (revision {revision}, {len(baseline)} comparable runs):")
+    print(format_diff_table(rows))
+    print(f"   History: {store.path}")
+    if args.accept:
+        print("📌 Accepted this run as the new baseline; earlier runs no longer count")
+    elif regressed:
+        print(f"❌ PERFORMANCE REGRESSION: {', '.join(regressed)}")
+        if not args.no_gate:
+            return REGRESSION_EXIT_CODE
+    return 0
+
+
+def main():
+    """Main speed test function"""
+    parser = argparse.ArgumentParser(
+        description="DearReader API Speed Test",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                                   # Sequential latency test
+  %(prog)s --load --rate 20 --duration 60    # Open-loop: 20 requests/s for a minute
+  %(prog)s --load --users 50 --duration 60   # Closed-loop: 50 concurrent users
+  %(prog)s --load --rate 5 --url https://example.com --formats markdown html
+  %(prog)s --json run.json                   # Save the report (with histograms) for diffing
+  %(prog)s --load --rate 10 --telemetry      # Correlate latency spikes with server state
+  %(prog)s --cache --corpus medium --zipf 1.2   # Cold vs. warm response cache
+  %(prog)s --capacity rate --start 2 --step 2 --slo-p99 3   # Max req/s with p99 under 3s
+  %(prog)s --capacity users --max-level 64 --duration 60    # Max concurrency
+  %(prog)s --soak 8 --rate 2 --timeseries soak.csv          # Overnight leak hunt
+  %(prog)s --matrix --corpus medium --iterations 2          # Cost of each pipeline and option
+  %(prog)s --matrix --grid grid.yaml --grid-mode product    # Your own option grid
+  %(prog)s --corpus medium                   # Offline: synthetic pages from a local origin
+  %(prog)s --corpus slow --origin-host host.docker.internal   # Reader running in Docker
+  %(prog)s --corpus medium --tolerance 0.2   # Gate on >20%% (or noisier-than-usual) regressions
+        """
+    )
+    parser.add_argument('--base-url', type=str, default="http://127.0.0.1:3000",
+                        help='Reader server to test (default: http://127.0.0.1:3000)')
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help='Per-request timeout in seconds (default: 30)')
+    parser.add_argument('--url', action='append', dest='urls',
+                        help='URL to test (repeatable; default: built-in test URLs)')
+    parser.add_argument('--corpus', choices=sorted(CORPORA),
+                        help='Test a synthetic corpus served by a local origin server instead of live sites')
+    parser.add_argument('--origin-host',
+                        help='Host name the Reader uses to reach the local origin (default: 127.0.0.1)')
+    parser.add_argument('--origin-url', help='Use an already running origin_server.py at this URL')
+    parser.add_argument('--no-pdfs', action='store_true', help='Leave the corpus PDFs out of the test')
+    parser.add_argument('--iterations', type=int, default=3,
+                        help='Iterations per URL and format in sequential and matrix tests (default: 3)')
+    parser.add_argument('--load', action='store_true',
+                        help='Run a load test instead of the sequential test')
+    load_target = parser.add_mutually_exclusive_group()
+    load_target.add_argument('--rate', type=float, help='Open-loop target requests per second')
+    load_target.add_argument('--users', type=int,
+                             help='Closed-loop virtual users (e.g. the server max_api_concurrency)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Load test (or capacity search step) duration in seconds (default: 30)')
+    parser.add_argument('--formats', nargs='+', choices=['json', 'markdown', 'html'],
+                        help='Formats to cycle through (default: markdown; all three for --soak)')
+    parser.add_argument('--poisson', action='store_true',
+                        help='Open-loop: exponentially distributed arrivals instead of evenly spaced')
+    parser.add_argument('--warmup', type=float, default=None,
+                        help='Seconds of load before measuring (default: 0 for --load, 10 for --capacity)')
+    parser.add_argument('--capacity', choices=['rate', 'users'],
+                        help='Capacity search: ramp the request rate or concurrency until the knee')
+    parser.add_argument('--start', type=float, default=1.0, help='Capacity search: first level (default: 1)')
+    parser.add_argument('--step', type=float, default=1.0, help='Capacity search: level increment (default: 1)')
+    parser.add_argument('--max-level', type=float, default=100.0,
+                        help='Capacity search: highest level to try (default: 100)')
+    parser.add_argument('--slo-p99', type=float, default=5.0,
+                        help='Capacity search: p99 latency SLO in seconds (default: 5)')
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                        help='Capacity search: tolerated fraction of failed requests (default: 0.01)')
+    parser.add_argument('--max-throttled', type=float, default=0.01,
+                        help='Capacity search: tolerated fraction of 429 responses (default: 0.01)')
+    parser.add_argument('--matrix', action='store_true',
+                        help='Matrix: every pipeline route x option header set from a grid')
+    parser.add_argument('--pipeline-config', default=DEFAULT_PIPELINE_CONFIG,
+                        help='Matrix: pipeline config with pipeline_routing.routes (default: crawl_pipeline.yaml)')
+    parser.add_argument('--grid', metavar='PATH',
+                        help='Matrix: YAML mapping option headers to value lists (default: built-in grid)')
+    parser.add_argument('--grid-mode', choices=['each', 'product'], default='each',
+                        help='Matrix: vary one header at a time, or every combination (default: each)')
+    parser.add_argument('--include-ai', action='store_true', help='Matrix: include pipelines that need AI')
+    parser.add_argument('--soak', type=float, metavar='HOURS',
+                        help='Soak test: hold --rate or --users for this many hours and look for leaks')
+    parser.add_argument('--segment', type=float, default=300.0,
+                        help='Soak test: seconds per latency segment (default: 300)')
+    parser.add_argument('--timeseries', metavar='PATH', help='Soak test: write telemetry samples as CSV')
+    parser.add_argument('--cache', action='store_true',
+                        help='Cache test: clear the cache, run a cold pass, then warm passes over a Zipf mix')
+    parser.add_argument('--warm-passes', type=int, default=3, help='Cache test: warm passes (default: 3)')
+    parser.add_argument('--pass-size', type=int,
+                        help='Cache test: requests per warm pass (default: twice the URL count)')
+    parser.add_argument('--zipf', type=float, default=1.0,
+                        help='Cache test: popularity skew, 0 = uniform (default: 1.0)')
+    parser.add_argument('--seed', type=int, default=0, help='Cache test: random seed for the URL mix')
+    parser.add_argument('--telemetry', action='store_true',
+                        help='Load test: sample server queue, cache, health and process stats during the run')
+    parser.add_argument('--telemetry-interval', type=float,
+                        help='Seconds between telemetry samples (default: 1; 10 for --soak)')
+    parser.add_argument('--server-pid', type=int,
+                        help='Reader server PID for process stats (default: whatever listens on the port)')
+    parser.add_argument('--api-key', help='Also sample /rate-limit/stats for this API key')
+    parser.add_argument('--json', metavar='PATH', help='Also save the full report as JSON')
+    parser.add_argument('--history', default=DEFAULT_STORE,
+                        help='Benchmark history store (default: py/.benchmarks/history.jsonl)')
+    parser.add_argument('--no-history', action='store_true', help='Neither record this run nor compare it')
+    parser.add_argument('--baseline-runs', type=int, default=10,
+                        help='Comparable past runs forming the baseline (default: 10)')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Relative slack before a worse metric counts as a regression (default: 0.10)')
+    parser.add_argument('--no-gate', action='store_true', help='Report regressions without failing the run')
+    parser.add_argument('--accept', action='store_true',
+                        help='Accept this run as the new baseline level (after an intended slowdown)')
+    args = parser.parse_args()
+    if (args.load or args.soak) and args.rate is None and args.users is None:
+        parser.error("--load and --soak need --rate or --users")
+    if args.telemetry and not args.load:
+        parser.error("--telemetry needs --load")
+    if sum(map(bool, (args.load, args.cache, args.capacity, args.soak, args.matrix))) > 1:
+        parser.error("--load, --cache, --capacity, --soak and --matrix are separate modes")
+    if args.warmup is None:
+        args.warmup = 10.0 if args.capacity else 0.0
+    if args.telemetry_interval is None:
+        args.telemetry_interval = 10.0 if args.soak else 1.0
+    if args.formats is None:
+        args.formats = ['json', 'markdown', 'html'] if args.soak else ['markdown']
+
+    print("🚀 DearReader API Speed Test")
+    print("="*50)
+
+    # Initialize speed tester
+    tester = SpeedTester(args.base_url, timeout=args.timeout)
+
+    # Check server status
+    if not check_server_status(tester.base_url):
+        sys.exit(1)
+
+    try:
+        if args.corpus:
+            test_urls = tester.corpus_urls(args.corpus, args.origin_url, args.origin_host,
+                                           include_pdfs=not args.no_pdfs)
+            origin = args.origin_url or (tester.origin.base_url if tester.origin else '')
+            print(f"🌐 Corpus '{args.corpus}': {len(test_urls)} URLs from {origin}")
+        else:
+            # Test URLs focused on reading and education
+            test_urls = args.urls or DEFAULT_TEST_URLS
+
+        runner = {'load': run_load, 'cache': run_cache, 'capacity': run_capacity, 'soak': run_soak,
+                  'matrix': run_matrix_bench, 'sequential': run_sequential}[selected_mode(args)]
+        code, report = runner(tester, args, test_urls)
+        if not args.no_history:
+            code = code or check_history(report, args, test_urls)
+    finally:
+        tester.close()
+    if code:
+        sys.exit(code)
 
 
 if __name__ == "__main__":
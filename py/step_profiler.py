@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Resource profiling for app.py pipeline steps.
+
+For every step the profiler records wall time and CPU time, plus the peak RSS
+and the largest process count of the processes the step started through
+``run_cmd``. A background thread samples each step's process tree with psutil
+every ``interval`` seconds. CPU time is the Python thread's own CPU time plus
+the last CPU times sampled for each child process. Processes that live for
+less than one interval can be missed. Work done by a daemon on the step's
+behalf (``docker build`` runs in dockerd) is not part of the tree.
+
+Results come out as a JSON summary (``summary()``) and as Chrome trace events
+(``trace()``), which chrome://tracing or https://ui.perfetto.dev can open.
+Each step is a span on its own track with its commands nested inside it.
+RSS and process counts appear as counter tracks.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import psutil
+
+
+class StepProfiler:
+    """Profiles pipeline steps and the commands they run"""
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.origin = time.monotonic()
+        self.started_at = time.time()
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.samples: List[Dict[str, Any]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _now(self) -> float:
+        return time.monotonic() - self.origin
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='step-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 5)
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Profile the step running on the current thread"""
+        record: Dict[str, Any] = {
+            'name': name, 'track': 0, 'start': self._now(), 'end': None,
+            'returncode': None, 'python_cpu_s': 0.0, 'peak_rss_mb': 0.0, 'max_processes': 0,
+            'commands': [], '_cpu': {},
+        }
+        with self._lock:
+            record['track'] = len(self.steps) + 1
+            self.steps[name] = record
+        self._local.record = record
+        thread_cpu = time.thread_time()
+        try:
+            yield record
+        finally:
+            record['python_cpu_s'] = time.thread_time() - thread_cpu
+            record['end'] = self._now()
+            self._local.record = None
+
+    def track(self, pid: int, cmd: Sequence[str]) -> None:
+        """Attribute a command just started on this thread to the current step"""
+        record = getattr(self._local, 'record', None)
+        if record is None:
+            return
+        command = {'cmd': ' '.join(cmd), 'pid': pid, 'start': self._now(), 'end': None, 'returncode': None}
+        with self._lock:
+            record['commands'].append(command)
+        self._local.command = command
+        self._sample_step(record)
+
+    def finish(self, returncode: int) -> None:
+        """Mark the command last started on this thread as done"""
+        command = getattr(self._local, 'command', None)
+        if command is not None:
+            command['end'] = self._now()
+            command['returncode'] = returncode
+            self._local.command = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = [r for r in self.steps.values() if r['end'] is None]
+            for record in active:
+                self._sample_step(record)
+
+    def _sample_step(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            roots = [c['pid'] for c in record['commands'] if c['end'] is None]
+        procs: Dict[int, psutil.Process] = {}
+        for pid in roots:
+            try:
+                root = psutil.Process(pid)
+                for proc in [root] + root.children(recursive=True):
+                    procs[proc.pid] = proc
+            except psutil.Error:
+                continue
+        rss = 0
+        count = 0
+        for pid, proc in procs.items():
+            try:
+                with proc.oneshot():
+                    rss += proc.memory_info().rss
+                    cpu = proc.cpu_times()
+            except psutil.Error:
+                continue
+            count += 1
+            with self._lock:
+                record['_cpu'][pid] = cpu.user + cpu.system
+        rss_mb = rss / 2 ** 20
+        with self._lock:
+            record['peak_rss_mb'] = max(record['peak_rss_mb'], rss_mb)
+            record['max_processes'] = max(record['max_processes'], count)
+            if roots:
+                self.samples.append({'t': self._now(), 'step': record['name'],
+                                     'rss_mb': rss_mb, 'processes': count})
+
+    def summary(self) -> Dict[str, Any]:
+        """Machine-readable per-step results"""
+        steps = []
+        with self._lock:
+            records = list(self.steps.values())
+        for record in records:
+            end = record['end'] if record['end'] is not None else self._now()
+            children_cpu = sum(record['_cpu'].values())
+            steps.append({
+                'name': record['name'],
+                'returncode': record['returncode'],
+                'start_s': round(record['start'], 3),
+                'wall_s': round(end - record['start'], 3),
+                'cpu_s': round(record['python_cpu_s'] + children_cpu, 3),
+                'children_cpu_s': round(children_cpu, 3),
+                'peak_rss_mb': round(record['peak_rss_mb'], 1),
+                'max_processes': record['max_processes'],
+                'commands': [{'cmd': c['cmd'], 'returncode': c['returncode'],
+                              'wall_s': round((c['end'] if c['end'] is not None else end) - c['start'], 3)}
+                             for c in record['commands']],
+            })
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started_at)),
+            'wall_s': round(max((s['start_s'] + s['wall_s'] for s in steps), default=0.0), 3),
+            'sample_interval_s': self.interval,
+            'steps': steps,
+        }
+
+    def trace(self) -> Dict[str, Any]:
+        """Chrome trace-event JSON (timestamps in microseconds)"""
+        def us(seconds: float) -> int:
+            return int(seconds * 1e6)
+
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'app.py pipeline'}}]
+        with self._lock:
+            records = list(self.steps.values())
+            samples = list(self.samples)
+        summary = {s['name']: s for s in self.summary()['steps']}
+        for record in records:
+            end = record['end'] if record['end'] is not None else self._now()
+            tid = record['track']
+            stats = summary[record['name']]
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': record['name']}})
+            events.append({'name': record['name'], 'cat': 'step', 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': us(record['start']), 'dur': us(end - record['start']),
+                           'args': {k: stats[k] for k in ('returncode', 'cpu_s', 'peak_rss_mb', 'max_processes')}})
+            for command in record['commands']:
+                command_end = command['end'] if command['end'] is not None else end
+                events.append({'name': command['cmd'], 'cat': 'command', 'ph': 'X', 'pid': pid, 'tid': tid,
+                               'ts': us(command['start']), 'dur': us(command_end - command['start']),
+                               'args': {'pid': command['pid'], 'returncode': command['returncode']}})
+        for sample in samples:
+            events.append({'name': f"{sample['step']} resources", 'ph': 'C', 'pid': pid, 'ts': us(sample['t']),
+                           'args': {'rss_mb': round(sample['rss_mb'], 1), 'processes': sample['processes']}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, directory: str) -> Dict[str, str]:
+        """Write ``profile.json`` and ``trace.json`` into ``directory``"""
+        os.makedirs(directory, exist_ok=True)
+        paths = {'summary': os.path.join(directory, 'profile.json'),
+                 'trace': os.path.join(directory, 'trace.json')}
+        with open(paths['summary'], 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(paths['trace'], 'w', encoding='utf-8') as f:
+            json.dump(self.trace(), f)
+        return paths
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Server-side telemetry sampled alongside load tests.
+
+``TelemetrySampler`` polls the Reader every ``interval`` seconds from a
+background thread:
+
+- ``/queue`` for active and pending requests (queue depth);
+- ``/cache/stats`` for response cache hits and misses;
+- ``/rate-limit/stats`` for the API key's request counts (only with an API key);
+- ``/health`` for the overall health status.
+
+When the server runs on this machine it also samples the server's process
+tree with ``psutil``: CPU, RSS, and the number and memory of Chromium
+processes. The process is found by ``server_pid`` or by the port it listens
+on; inside Docker the tree is not visible and those fields stay empty.
+
+Samples are taken on the ``time.monotonic`` clock that the load test uses for
+requests, so ``correlate`` can line them up. It splits the run into windows
+of one interval, takes the p99 latency of the requests started in each window,
+and relates it to queue depth, cache hit rate, CPU and browser memory in that
+window.
+
+For soak tests, ``growth_trend`` fits a trend to a long series and flags
+steady growth (a leak) while ignoring sawtooth patterns from garbage
+collection and idle-page cleanup.
+"""
+
+import csv
+import math
+import statistics
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import psutil
+import requests
+
+from latency import LatencyHistogram
+
+# Process names that belong to the headless browser
+BROWSER_PROCESS_NAMES = ('chrome', 'chromium', 'headless_shell')
+
+# Window signals correlated with latency, as (key, label)
+SIGNALS = (
+    ('queue_depth', 'queue depth'),
+    ('cache_hit_rate', 'cache hit rate'),
+    ('cpu_percent', 'server CPU %'),
+    ('browser_rss_mb', 'browser RSS (MB)'),
+)
+
+# Series checked for steady growth in soak tests, as (key, label)
+LEAK_SERIES = (
+    ('rss_mb', 'server RSS (MB)'),
+    ('browser_processes', 'Chromium processes'),
+    ('browser_rss_mb', 'browser RSS (MB)'),
+    ('open_fds', 'open file descriptors'),
+    ('node_rss_mb', 'Node RSS (MB)'),
+    ('heap_used_mb', 'Node heap (MB)'),
+    ('active_requests', 'active requests'),
+)
+
+
+def find_server_pid(base_url: str) -> Optional[int]:
+    """PID of the local process listening on the base URL's port, if visible"""
+    port = urlparse(base_url).port or 80
+    try:
+        for conn in psutil.net_connections(kind='inet'):
+            if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port and conn.pid:
+                return conn.pid
+    except (psutil.Error, OSError):  # Listing sockets needs privileges on some platforms
+        pass
+    return None
+
+
+def pearson(xs: List[float], ys: List[float]) -> Optional[float]:
+    """Correlation coefficient, or None with fewer than 3 points or no variance"""
+    if len(xs) < 3:
+        return None
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    var_y = sum((y - mean_y) ** 2 for y in ys)
+    if var_x == 0 or var_y == 0:
+        return None
+    return cov / math.sqrt(var_x * var_y)
+
+
+def downsample(values: List[float], points: int = 50) -> List[float]:
+    """Medians of ``points`` equal chunks, smoothing out short-lived spikes"""
+    if len(values) <= points:
+        return list(values)
+    size = len(values) / points
+    return [statistics.median(values[int(i * size):int((i + 1) * size)]) for i in range(points)]
+
+
+def kendall_tau(values: List[float]) -> float:
+    """Rank correlation of a series with time: 1 is strictly increasing, -1 decreasing"""
+    concordant = discordant = 0
+    for i in range(len(values)):
+        for j in range(i + 1, len(values)):
+            if values[j] > values[i]:
+                concordant += 1
+            elif values[j] < values[i]:
+                discordant += 1
+    pairs = len(values) * (len(values) - 1) / 2
+    return (concordant - discordant) / pairs if pairs else 0.0
+
+
+def linear_slope(ts: List[float], values: List[float]) -> float:
+    """Least-squares slope of ``values`` over ``ts`` (units per second)"""
+    if len(ts) < 2:
+        return 0.0
+    mean_t, mean_v = statistics.fmean(ts), statistics.fmean(values)
+    var_t = sum((t - mean_t) ** 2 for t in ts)
+    if var_t == 0:
+        return 0.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in zip(ts, values)) / var_t
+
+
+def growth_trend(ts: List[float], values: List[float], min_growth: float = 0.10,
+                 min_tau: float = 0.6) -> Dict[str, Any]:
+    """Fit a trend to a series and decide whether it grows steadily
+
+    The series is growing when the smoothed values rise consistently (Kendall
+    tau of at least ``min_tau``) and the last tenth of the run sits at least
+    ``min_growth`` (relative) above the first tenth.
+    """
+    edge = max(1, len(values) // 10)
+    start, end = statistics.median(values[:edge]), statistics.median(values[-edge:])
+    if start:
+        growth: Optional[float] = (end - start) / abs(start)
+    else:
+        growth = None
+    tau = kendall_tau(downsample(values))
+    slope = linear_slope(ts, values)
+    rising = growth >= min_growth if growth is not None else end > start
+    return {
+        'start': start,
+        'end': end,
+        'growth': growth,
+        'slope_per_hour': slope * 3600,
+        'tau': tau,
+        'points': len(values),
+        'growing': bool(slope > 0 and tau >= min_tau and rising),
+    }
+
+
+def leak_trends(samples: List[Dict[str, Any]], min_points: int = 10, **thresholds: float) -> Dict[str, Any]:
+    """``growth_trend`` for every leak series with enough samples"""
+    trends = {}
+    for key, _ in LEAK_SERIES:
+        points = [(s['t'], s[key]) for s in samples if s.get(key) is not None]
+        if len(points) >= min_points:
+            trends[key] = growth_trend([t for t, _ in points], [v for _, v in points], **thresholds)
+    return trends
+
+
+def write_csv(samples: List[Dict[str, Any]], path: str) -> None:
+    """Write numeric sample fields as a CSV time series (one row per sample)"""
+    columns = ['t'] + sorted({key for s in samples for key, value in s.items()
+                              if key != 't' and isinstance(value, (int, float)) and not isinstance(value, bool)})
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for s in samples:
+            writer.writerow([round(s[c], 3) if isinstance(s.get(c), float) else s.get(c, '') for c in columns])
+
+
+class TelemetrySampler:
+    """Periodically sample Reader endpoints and the server process tree"""
+
+    def __init__(self, base_url: str, interval: float = 1.0, server_pid: Optional[int] = None,
+                 api_key: Optional[str] = None, session: Optional[requests.Session] = None):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.base_url = base_url.rstrip('/')
+        self.interval = interval
+        self.api_key = api_key
+        self.server_pid = server_pid if server_pid is not None else find_server_pid(self.base_url)
+        self.samples: List[Dict[str, Any]] = []
+        self.origin = 0.0
+        self._session = session or requests.Session()
+        self._processes: Dict[int, Any] = {}
+        self._last_cache: Optional[Dict[str, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, origin: Optional[float] = None) -> None:
+        """Start sampling; ``origin`` is the monotonic time that sample times are relative to"""
+        self.origin = time.monotonic() if origin is None else origin
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='reader-telemetry', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling after taking one final sample"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 4 + 5)
+            self._thread = None
+        self.sample()
+        self._session.close()
+
+    def _loop(self) -> None:
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            self.sample()
+            next_at += self.interval
+            self._stop.wait(max(0.0, next_at - time.monotonic()))
+
+    def _get_json(self, path: str, **params: Any) -> Optional[Any]:
+        try:
+            response = self._session.get(f"{self.base_url}/{path}", params=params or None,
+                                         timeout=self.interval)
+            try:
+                # /health answers 503 with a body describing what failed
+                return response.json() if response.ok or path == 'health' else None
+            finally:
+                response.close()
+        except (requests.RequestException, ValueError):
+            return None
+
+    def sample(self) -> Dict[str, Any]:
+        """Take one sample and append it to ``samples``"""
+        sample: Dict[str, Any] = {'t': time.monotonic() - self.origin}
+
+        queue = self._get_json('queue')
+        if isinstance(queue, dict):
+            sample['active_requests'] = queue.get('active_requests')
+            sample['pending_requests'] = queue.get('pending_requests')
+            sample['queue_depth'] = (queue.get('active_requests') or 0) + (queue.get('pending_requests') or 0)
+            for key in ('total_requests', 'completed_requests', 'failed_requests', 'rejected_requests'):
+                if isinstance(queue.get(key), int):
+                    sample[key] = queue[key]
+            # The Node process reports its own memory, which works even inside Docker
+            memory = queue.get('memory_usage')
+            if isinstance(memory, dict) and 'rss' in memory:
+                sample['node_rss_mb'] = memory['rss'] / 2 ** 20
+                sample['heap_used_mb'] = memory.get('heapUsed', 0) / 2 ** 20
+
+        cache = self._get_json('cache/stats')
+        if isinstance(cache, dict) and 'hits' in cache:
+            hits, misses = int(cache.get('hits', 0)), int(cache.get('misses', 0))
+            sample['cache_keys'] = cache.get('keys')
+            sample['cache_hits'], sample['cache_misses'] = hits, misses
+            # Hit rate over this interval, not since the server started
+            if self._last_cache is not None:
+                lookups = (hits - self._last_cache['hits']) + (misses - self._last_cache['misses'])
+                if lookups > 0:
+                    sample['cache_hit_rate'] = (hits - self._last_cache['hits']) / lookups
+            self._last_cache = {'hits': hits, 'misses': misses}
+
+        if self.api_key:
+            usage = self._get_json('rate-limit/stats', api_key=self.api_key)
+            if isinstance(usage, dict):
+                sample['rate_limit_minute'] = sum(int(r.get('requests_this_minute', 0))
+                                                  for r in usage.values() if isinstance(r, dict))
+
+        health = self._get_json('health')
+        sample['health'] = health.get('status') if isinstance(health, dict) else 'unreachable'
+
+        sample.update(self._process_stats())
+        self.samples.append(sample)
+        return sample
+
+    def _process_stats(self) -> Dict[str, Any]:
+        if self.server_pid is None:
+            return {}
+        try:
+            root = psutil.Process(self.server_pid)
+            tree = [root] + root.children(recursive=True)
+        except (psutil.Error, ValueError):  # Gone, not ours, or not a valid PID
+            return {}
+
+        cpu = rss = browser_rss = 0.0
+        browsers = fds = 0
+        alive = {}
+        for proc in tree:
+            # Reuse Process objects so cpu_percent measures since the previous sample
+            proc = self._processes.get(proc.pid, proc)
+            try:
+                usage = proc.cpu_percent(None)
+                memory = proc.memory_info().rss
+                name = proc.name().lower()
+            except psutil.Error:
+                continue
+            alive[proc.pid] = proc
+            cpu += usage
+            rss += memory
+            if any(browser in name for browser in BROWSER_PROCESS_NAMES):
+                browsers += 1
+                browser_rss += memory
+            try:
+                fds += proc.num_fds() if hasattr(proc, 'num_fds') else proc.num_handles()
+            except psutil.Error:
+                pass
+        self._processes = alive
+        return {
+            'cpu_percent': cpu,
+            'rss_mb': rss / 2 ** 20,
+            'browser_processes': browsers,
+            'browser_rss_mb': browser_rss / 2 ** 20,
+            'open_fds': fds,
+            'processes': len(alive),
+        }
+
+    def correlate(self, records: List[Dict[str, Any]], spike_factor: float = 2.0,
+                  max_spikes: int = 5) -> Dict[str, Any]:
+        """Relate per-window p99 latency to the sampled server signals
+
+        ``records`` are load test results with ``started_at`` (seconds since
+        the same origin) and ``latency``. A window is a spike when its p99 is
+        more than ``spike_factor`` times the median window p99.
+        """
+        windows: Dict[int, LatencyHistogram] = {}
+        for record in records:
+            if record.get('success') and 'started_at' in record:
+                index = max(0, int(record['started_at'] // self.interval))
+                windows.setdefault(index, LatencyHistogram()).record(record['latency'])
+
+        signals: Dict[int, Dict[str, float]] = {}
+        for sample in self.samples:
+            by_window = signals.setdefault(max(0, int(sample['t'] // self.interval)), {})
+            for key, _ in SIGNALS:
+                if sample.get(key) is not None:
+                    by_window[key] = sample[key]
+
+        rows = []
+        for index in sorted(windows):
+            row: Dict[str, Any] = {'t': index * self.interval, 'requests': windows[index].count,
+                                   'p99': windows[index].percentile(99)}
+            # Fall back to the nearest earlier sample when a window got none
+            earlier = [i for i in signals if i <= index]
+            if earlier:
+                row.update(signals[max(earlier)])
+            rows.append(row)
+
+        correlations = {}
+        for key, _ in SIGNALS:
+            paired = [(row[key], row['p99']) for row in rows if key in row]
+            correlations[key] = pearson([x for x, _ in paired], [y for _, y in paired])
+
+        spikes = []
+        if rows:
+            median = statistics.median(row['p99'] for row in rows)
+            spikes = sorted((row for row in rows if median and row['p99'] > spike_factor * median),
+                            key=lambda row: row['p99'], reverse=True)[:max_spikes]
+
+        return {
+            'interval': self.interval,
+            'server_pid': self.server_pid,
+            'samples': self.samples,
+            'windows': rows,
+            'correlations': correlations,
+            'spikes': spikes,
+        }
+
+
+def print_telemetry(telemetry: Dict[str, Any]) -> None:
+    """Print the correlation summary of a telemetry report"""
+    samples = telemetry['samples']
+    print(f"\n🛰️  SERVER TELEMETRY ({len(samples)} samples every {telemetry['interval']:g}s):")
+    depths = [s['queue_depth'] for s in samples if s.get('queue_depth') is not None]
+    if depths:
+        print(f"   Queue depth: max {max(depths)}, mean {statistics.fmean(depths):.1f}")
+    rss = [s['rss_mb'] for s in samples if 'rss_mb' in s]
+    if rss:
+        browsers = max(s['browser_processes'] for s in samples if 'browser_processes' in s)
+        print(f"   Server RSS: {rss[0]:.0f} → {rss[-1]:.0f} MB (peak {max(rss):.0f} MB), "
+              f"up to {browsers} browser processes")
+    elif telemetry['server_pid'] is None:
+        print("   Process stats unavailable (server not visible locally; pass --server-pid)")
+    unhealthy = sum(1 for s in samples if s.get('health') not in ('healthy', 'degraded'))
+    if unhealthy:
+        print(f"   ⚠️ {unhealthy} samples where /health was not healthy")
+
+    print("   Correlation with window p99 latency:")
+    for key, label in SIGNALS:
+        value = telemetry['correlations'].get(key)
+        print(f"     {label:<18} {'n/a' if value is None else f'{value:+.2f}'}")
+    if telemetry['spikes']:
+        print("   Latency spikes:")
+        for spike in telemetry['spikes']:
+            context = ', '.join(f"{label} {spike[key]:.2f}" for key, label in SIGNALS if key in spike)
+            print(f"     t={spike['t']:.0f}s p99 {spike['p99']:.3f}s ({context or 'no samples'})")
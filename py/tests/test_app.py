@@ -1,6 +1,13 @@
 import pytest
 from unittest.mock import patch, MagicMock
 import app
+from build_cache import BuildCache
+
+@pytest.fixture(autouse=True)
+def no_build_cache(monkeypatch):
+    """main() installs a build cache and profiler; keep them from leaking into other tests."""
+    monkeypatch.setattr(app, 'BUILD_CACHE', None)
+    monkeypatch.setattr(app, 'PROFILER', None)
 
 @patch('app.run_cmd')
 def test_step_npm_success(mock_run_cmd):
@@ -53,9 +60,20 @@ def test_step_npm_test_fails(mock_run_cmd):
 def test_step_docker_success(mock_run_cmd):
     """Test the docker step succeeds."""
     mock_run_cmd.return_value = (0, '', '')
-    with patch('app.ensure_port_available', return_value=True):
+    with patch('app.ensure_port_available', return_value=True), \
+         patch('app.wait_until_ready', return_value=True) as mock_ready:
         result = app.step_docker()
         assert result == 0
+        mock_ready.assert_called_once_with(app.READY_URL, app.READY_TIMEOUT)
+
+@patch('app.run_cmd')
+def test_step_docker_fails_when_container_never_ready(mock_run_cmd):
+    """A container that never passes /health/ready fails the step and shows its logs."""
+    mock_run_cmd.return_value = (0, 'server crashed', '')
+    with patch('app.ensure_port_available', return_value=True), \
+         patch('app.wait_until_ready', return_value=False):
+        assert app.step_docker() == 1
+    assert mock_run_cmd.call_args.args[0][:2] == ['docker', 'logs']
 
 @patch('app.run_cmd')
 def test_step_pyright_success(mock_run_cmd):
@@ -88,6 +106,68 @@ def test_step_stop_success(mock_run_cmd):
     result = app.step_stop()
     assert result == 0
 
+@patch('app.run_cmd')
+def test_step_pyright_skips_unchanged_inputs(mock_run_cmd, tmp_path, monkeypatch):
+    """A successful pyright run is skipped next time unless inputs change or --no-skip is given."""
+    (tmp_path / 'py').mkdir()
+    (tmp_path / 'py' / 'mod.py').write_text('x = 1')
+    monkeypatch.setitem(app.STEP_INPUTS, 'pyright', {'inputs': ['py/**/*.py']})
+    monkeypatch.setattr(app, 'BUILD_CACHE', BuildCache(path=str(tmp_path / 'manifest.json'), root=str(tmp_path)))
+    mock_run_cmd.return_value = (0, '', '')
+
+    with patch('shutil.which', return_value='/usr/bin/pyright'):
+        assert app.step_pyright() == 0
+        assert app.step_pyright() == 0
+        assert mock_run_cmd.call_count == 1
+
+        (tmp_path / 'py' / 'mod.py').write_text('x = 2')
+        assert app.step_pyright() == 0
+        assert mock_run_cmd.call_count == 2
+
+        app.BUILD_CACHE.skip = False
+        assert app.step_pyright() == 0
+        assert mock_run_cmd.call_count == 3
+
+@patch('app.run_cmd')
+def test_step_pyright_reruns_when_inputs_change_during_the_run(mock_run_cmd, tmp_path, monkeypatch):
+    """An input edited while the step runs is not recorded as passed."""
+    (tmp_path / 'py').mkdir()
+    (tmp_path / 'py' / 'mod.py').write_text('x = 1')
+    monkeypatch.setitem(app.STEP_INPUTS, 'pyright', {'inputs': ['py/**/*.py']})
+    monkeypatch.setattr(app, 'BUILD_CACHE', BuildCache(path=str(tmp_path / 'manifest.json'), root=str(tmp_path)))
+
+    def edit_during_run(*args, **kwargs):
+        (tmp_path / 'py' / 'mod.py').write_text('x = "edited"')
+        return (0, '', '')
+
+    mock_run_cmd.side_effect = edit_during_run
+    with patch('shutil.which', return_value='/usr/bin/pyright'):
+        assert app.step_pyright() == 0
+        mock_run_cmd.side_effect = None
+        mock_run_cmd.return_value = (0, '', '')
+        assert app.step_pyright() == 0  # Checks the edited file
+        assert app.step_pyright() == 0  # Now unchanged
+        assert mock_run_cmd.call_count == 2
+
+@patch('app.run_cmd')
+def test_step_docker_rebuilds_only_when_needed(mock_run_cmd, tmp_path, monkeypatch):
+    """The container is always restarted; the image build is skipped when unchanged."""
+    (tmp_path / 'Dockerfile').write_text('FROM scratch')
+    monkeypatch.setitem(app.STEP_INPUTS, 'docker build', {'inputs': ['Dockerfile'], 'check': lambda: True})
+    monkeypatch.setattr(app, 'BUILD_CACHE', BuildCache(path=str(tmp_path / 'manifest.json'), root=str(tmp_path)))
+    mock_run_cmd.return_value = (0, '', '')
+
+    def built():
+        return sum(1 for call in mock_run_cmd.call_args_list if call.args[0][:2] == ['docker', 'build'])
+
+    with patch('app.ensure_port_available', return_value=True), patch('app.wait_until_ready', return_value=True):
+        assert app.step_docker() == 0
+        assert app.step_docker() == 0
+        assert built() == 1
+        assert sum(1 for call in mock_run_cmd.call_args_list if call.args[0][:2] == ['docker', 'run']) == 2
+        assert app.step_docker(clear_cache=True) == 0
+        assert built() == 2
+
 @patch('argparse.ArgumentParser.parse_args')
 @patch('app.step_npm')
 @patch('app.step_pyright')
@@ -95,7 +175,7 @@ def test_step_stop_success(mock_run_cmd):
 def test_main_start_command(mock_step_demo, mock_step_pyright, mock_step_npm, mock_parse_args):
     """Test the main function with the 'start' command."""
     # Arrange
-    mock_parse_args.return_value = MagicMock(command='start', verbose=False, debug=False, force=False, no_cache=False, url='http://localhost:3000')
+    mock_parse_args.return_value = MagicMock(command='start', verbose=False, debug=False, force=False, no_cache=False, jobs=4, profile=None, url='http://localhost:3000')
     mock_step_npm.return_value = 0
     mock_step_pyright.return_value = 0
     mock_step_demo.return_value = 0
@@ -111,15 +191,40 @@ def test_main_start_command(mock_step_demo, mock_step_pyright, mock_step_npm, mo
         mock_step_demo.assert_called_once()
 
 @patch('argparse.ArgumentParser.parse_args')
-@patch('app.step_npm')
+@patch('app.step_npm', return_value=0)
+@patch('app.step_pyright', return_value=0)
+@patch('app.step_demo', return_value=0)
+def test_main_profiles_only_with_profile_flag(mock_step_demo, mock_step_pyright, mock_step_npm, mock_parse_args,
+                                              tmp_path, monkeypatch, capsys):
+    """Without --profile no profiler runs and no profile table is printed."""
+    monkeypatch.chdir(tmp_path)  # main() changes directory; restore it afterwards
+    args = dict(command='start', verbose=False, debug=False, force=False, no_cache=False, jobs=1,
+                url='http://localhost:3000')
+    mock_parse_args.return_value = MagicMock(profile=None, **args)
+    with patch('shutil.which', return_value=True), patch('app.StepProfiler') as mock_profiler:
+        assert app.main() == 0
+    mock_profiler.assert_not_called()
+    assert 'Step Profile' not in capsys.readouterr().out
+
+    monkeypatch.chdir(tmp_path)
+    mock_parse_args.return_value = MagicMock(profile='profile', **args)  # Relative to the caller's cwd
+    with patch('shutil.which', return_value=True):
+        assert app.main() == 0
+    assert 'Step Profile' in capsys.readouterr().out
+    assert (tmp_path / 'profile' / 'trace.json').exists()
+
+@patch('argparse.ArgumentParser.parse_args')
+@patch('app.step_npm_install')
+@patch('app.step_npm_test')
 @patch('app.step_docker')
 @patch('app.step_pyright')
 @patch('app.step_demo')
 @patch('app.step_speedtest')
-def test_main_all_command(mock_speedtest, mock_demo, mock_pyright, mock_docker, mock_npm, mock_parse_args):
+def test_main_all_command(mock_speedtest, mock_demo, mock_pyright, mock_docker, mock_npm_test, mock_npm_install, mock_parse_args):
     """Test the main function with the 'all' command."""
-    mock_parse_args.return_value = MagicMock(command='all', verbose=False, debug=False, force=False, no_cache=False, url='http://localhost:3000')
-    mock_npm.return_value = 0
+    mock_parse_args.return_value = MagicMock(command='all', verbose=False, debug=False, force=False, no_cache=False, jobs=4, profile=None, url='http://localhost:3000')
+    mock_npm_install.return_value = 0
+    mock_npm_test.return_value = 0
     mock_docker.return_value = 0
     mock_pyright.return_value = 0
     mock_demo.return_value = 0
@@ -133,12 +238,12 @@ def test_main_all_command(mock_speedtest, mock_demo, mock_pyright, mock_docker,
 @patch('app.step_tests')
 def test_main_tests_command(mock_step_tests, mock_parse_args):
     """Test the main function with the 'tests' command."""
-    mock_parse_args.return_value = MagicMock(command='tests', verbose=False, debug=False, force=False, no_cache=False, url='http://localhost:3000')
+    mock_parse_args.return_value = MagicMock(command='tests', verbose=False, debug=False, force=False, no_cache=False, jobs=4, profile=None, url='http://localhost:3000')
     mock_step_tests.return_value = 0
     with patch('shutil.which', return_value=True):
         result = app.main()
         assert result == 0
-        mock_step_tests.assert_called_once()
+        mock_step_tests.assert_called_once_with(verbose=False, debug=False, force=False, jobs=4)
 
 def test_run_pipeline():
     """Test the run_pipeline function."""
@@ -170,6 +275,136 @@ def test_run_pipeline_force():
     step1.assert_called_once()
     step2.assert_called_once()
 
+def test_run_pipeline_runs_independent_steps_concurrently():
+    """Independent steps overlap; dependents wait for their dependencies."""
+    import threading
+    import time
+    both_running = threading.Barrier(2, timeout=5)
+    order = []
+
+    def independent(name):
+        def step():
+            both_running.wait()  # Deadlocks unless both steps run at once
+            order.append(name)
+            return 0
+        return step
+
+    def dependent():
+        order.append('demo')
+        return 0
+
+    pipeline = {
+        'npm': independent('npm'),
+        'docker': independent('docker'),
+        'demo': (dependent, ['docker']),
+    }
+    start = time.monotonic()
+    results = app.run_pipeline(pipeline, force=False, jobs=2)
+
+    assert results == {'npm': 0, 'docker': 0, 'demo': 0}
+    assert order.index('demo') > order.index('docker')
+    assert time.monotonic() - start < 5
+
+def test_run_pipeline_fail_fast_and_force_skip_dependents():
+    """Without force nothing new starts after a failure; with force only dependents are skipped."""
+    pipeline = {
+        'docker': MagicMock(return_value=1),
+        'pyright': (MagicMock(return_value=0), ['docker']),
+        'demo': (MagicMock(return_value=0), ['docker']),
+        'lint': MagicMock(return_value=0),
+    }
+    assert app.run_pipeline(pipeline, force=False, jobs=1) == {'docker': 1}
+    assert app.run_pipeline(pipeline, force=True, jobs=2) == {'docker': 1, 'lint': 0}
+    pipeline['demo'][0].assert_not_called()
+
+def test_run_pipeline_after_orders_steps_without_blocking():
+    """'after' steps wait for each other, but a failure there does not skip the later step."""
+    import threading
+    import time
+    lock = threading.Lock()
+    active, overlaps = set(), []
+    ordered = {'test', 'build', 'image'}
+
+    def step(name, rc=0):
+        def run():
+            with lock:
+                if name in ordered and active & ordered:
+                    overlaps.append((name, set(active)))
+                active.add(name)
+            time.sleep(0.05)
+            with lock:
+                active.discard(name)
+            return rc
+        return run
+
+    pipeline = {
+        'install': step('install'),
+        'test': (step('test', rc=1), ['install']),
+        'build': (step('build'), ['install'], ['test']),
+        'image': (step('image'), ['install'], ['test', 'build']),
+        'lint': step('lint'),
+    }
+    results = app.run_pipeline(pipeline, force=True, jobs=4)
+    assert results == {'install': 0, 'test': 1, 'build': 0, 'image': 0, 'lint': 0}
+    assert overlaps == []
+    with pytest.raises(ValueError, match='unknown'):
+        app.run_pipeline({'a': (step('a'), [], ['b'])}, force=False)
+
+def test_tests_pipeline_keeps_js_steps_apart():
+    """npm test, the TypeScript build and the image build never run at the same time."""
+    import threading
+    import time
+    lock = threading.Lock()
+    active, overlaps = set(), []
+
+    def track(name):
+        def run(*args, **kwargs):
+            with lock:
+                if name != 'pyright' and active - {'pyright'}:
+                    overlaps.append((name, set(active)))
+                active.add(name)
+            time.sleep(0.05)
+            with lock:
+                active.discard(name)
+            return (0, '', '') if name == 'build' else 0
+        return run
+
+    with patch('app.step_npm_install', side_effect=track('install')), \
+         patch('app.step_npm_test', side_effect=track('test')), \
+         patch('app.run_cmd', side_effect=track('build')), \
+         patch('app.step_pyright', side_effect=track('pyright')), \
+         patch('app.step_docker', side_effect=track('docker')), \
+         patch('app.step_demo', side_effect=track('demo')), \
+         patch('app.step_speedtest', side_effect=track('speedtest')):
+        assert app.step_tests(jobs=4) == 0
+    assert overlaps == []
+
+def test_run_pipeline_keeps_step_output_together(capsys):
+    """Output of concurrent steps is printed per step, not interleaved."""
+    import threading
+    turn = threading.Barrier(2, timeout=5)
+
+    def chatty(name):
+        def step():
+            for i in range(3):
+                turn.wait()  # Alternate the two steps line by line
+                print(f"{name} line {i}")
+            return 0
+        return step
+
+    app.run_pipeline({'a': chatty('a'), 'b': chatty('b')}, force=False, jobs=2)
+    lines = [line for line in capsys.readouterr().out.splitlines() if ' line ' in line]
+    assert lines in (['a line 0', 'a line 1', 'a line 2', 'b line 0', 'b line 1', 'b line 2'],
+                     ['b line 0', 'b line 1', 'b line 2', 'a line 0', 'a line 1', 'a line 2'])
+
+def test_run_pipeline_rejects_bad_graphs():
+    step = MagicMock(return_value=0)
+    with pytest.raises(ValueError, match='unknown'):
+        app.run_pipeline({'demo': (step, ['docker'])}, force=False)
+    with pytest.raises(ValueError, match='cycle'):
+        app.run_pipeline({'a': (step, ['b']), 'b': (step, ['a'])}, force=False)
+    step.assert_not_called()
+
 @patch('argparse.ArgumentParser.parse_args')
 @patch('app.step_docker')
 def test_main_docker_clear_command(mock_step_docker, mock_parse_args):
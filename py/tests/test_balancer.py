@@ -0,0 +1,160 @@
+import pytest
+import requests
+
+import demo
+from balancer import SATURATED_LOAD, EndpointPool
+
+
+class Resp:
+    def __init__(self, status_code=200, payload=None, text=''):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self._payload = payload
+        self.text = text
+        self.headers = {}
+
+    def json(self):
+        return self._payload
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f'Status {self.status_code}')
+
+
+class ProbeSession:
+    """Answers probes from a per-URL table of (ready status, queue payload)"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def get(self, url, timeout=None):
+        base, _, path = url.rpartition('/')
+        if path == 'queue':
+            status, payload = 200, self.table[base][1]
+        else:
+            base = base.rsplit('/health', 1)[0]
+            status, payload = self.table[base][0], {}
+        if isinstance(status, Exception):
+            raise status
+        return Resp(status, payload)
+
+    def close(self):
+        pass
+
+
+def make_pool(table):
+    return EndpointPool(list(table), probe_interval=0, session=ProbeSession(table))
+
+
+def test_routes_to_least_loaded_using_queue_samples():
+    table = {
+        'http://a.test': (200, {'active_requests': 3, 'pending_requests': 2}),
+        'http://b.test': (200, {'active_requests': 1, 'pending_requests': 0}),
+    }
+    pool = make_pool(table)
+    pool.refresh()
+    assert pool.choose().url == 'http://b.test'
+
+    with pool.acquire() as first:
+        assert first.url == 'http://b.test' and first.load == 2
+    assert first.outstanding == 0
+
+
+def test_outstanding_requests_count_as_load():
+    pool = EndpointPool(['http://a.test', 'http://b.test'], probe_interval=0)
+    with pool.acquire() as busy:
+        for _ in range(3):
+            assert pool.choose() is not busy
+
+
+
+def test_own_requests_are_not_counted_twice():
+    table = {
+        'http://a.test': (200, {'active_requests': 0, 'pending_requests': 0}),
+        'http://b.test': (200, {'active_requests': 1, 'pending_requests': 0}),
+    }
+    pool = make_pool(table)
+    pool.refresh()
+    with pool.acquire() as mine:
+        assert mine.url == 'http://a.test'
+        # The server now reports our request; the load must stay at 1, not 2
+        table['http://a.test'] = (200, {'active_requests': 1, 'pending_requests': 0})
+        pool.refresh()
+        assert mine.server_load == 0 and mine.load == 1
+    assert pool.endpoints[1].load == 1
+
+def test_equal_loads_rotate():
+    pool = EndpointPool(['http://a.test', 'http://b.test', 'http://c.test'], probe_interval=0)
+    assert {pool.choose().url for _ in range(3)} == {'http://a.test', 'http://b.test', 'http://c.test'}
+
+
+def test_readiness_ejects_and_readmits():
+    table = {
+        'http://a.test': (503, {}),
+        'http://b.test': (200, {'active_requests': 9, 'pending_requests': 0}),
+    }
+    pool = make_pool(table)
+    pool.refresh()
+    assert [e['healthy'] for e in pool.stats()] == [False, True]
+    assert pool.stats()[0]['last_error'] == 'readiness returned 503'
+    assert pool.choose().url == 'http://b.test'
+
+    table['http://a.test'] = (200, {'active_requests': 0, 'pending_requests': 0})
+    pool.refresh()
+    assert pool.choose().url == 'http://a.test'
+    assert pool.stats()[0]['ejections'] == 1
+
+
+def test_throttled_probe_keeps_endpoint_but_marks_it_saturated():
+    table = {'http://a.test': (429, {}), 'http://b.test': (requests.ConnectionError('down'), {})}
+    pool = make_pool(table)
+    pool.refresh()
+    a, b = pool.endpoints
+    assert a.healthy and a.server_load == SATURATED_LOAD
+    assert not b.healthy
+    assert pool.choose() is a
+
+
+def test_connection_error_ejects_and_all_ejected_falls_back():
+    pool = EndpointPool(['http://a.test', 'http://b.test'], probe_interval=0)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            with pool.acquire():
+                raise requests.ConnectionError('refused')
+    assert not any(e.healthy for e in pool.endpoints)
+    assert pool.choose() is pool.endpoints[0]  # Ejected longest ago
+    assert all(e.outstanding == 0 for e in pool.endpoints)
+
+
+def test_reader_api_balances_and_fails_over(monkeypatch):
+    monkeypatch.delenv('READER_BASE_URL', raising=False)
+    pool = EndpointPool(['http://a.test', 'http://b.test'], probe_interval=0)
+    reader = demo.ReaderAPI(endpoints=pool)
+    calls = []
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(url)
+        if url.startswith('http://a.test'):
+            raise requests.ConnectionError('refused')
+        return Resp(text='ok')
+
+    monkeypatch.setattr(reader.session, 'get', fake_get)
+    assert reader.get_markdown('https://example.com') == 'ok'
+    assert reader.get_markdown('https://example.com') == 'ok'
+    assert sum(url.startswith('http://a.test') for url in calls) == 1
+    assert pool.stats()[0]['healthy'] is False
+    reader.close()
+
+
+def test_reader_api_parses_endpoint_list(monkeypatch):
+    monkeypatch.setenv('READER_BASE_URL', 'http://a.test:3000/, http://b.test:3000')
+    reader = demo.ReaderAPI()
+    assert reader.base_url == 'http://a.test:3000'
+    assert [e.url for e in reader.endpoints.endpoints] == ['http://a.test:3000', 'http://b.test:3000']
+    reader.close()
+
+    single = demo.ReaderAPI('http://only.test/')
+    assert single.endpoints is None and single.base_url == 'http://only.test'
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+import bench_history
+from bench_history import (HIGHER_IS_BETTER, LOWER_IS_BETTER, HistoryStore, compare,
+                           environment_fingerprint, environment_info, extract_metrics,
+                           format_diff_table, make_record)
+
+
+def run(p99, rps=100.0, config='c', env='e', regressed=False):
+    return {'config_fingerprint': config, 'env_fingerprint': env, 'regressed': regressed,
+            'metrics': {'latency_p99': p99, 'achieved_rps': rps},
+            'directions': {'latency_p99': LOWER_IS_BETTER, 'achieved_rps': HIGHER_IS_BETTER}}
+
+
+def statuses(rows):
+    return {row['metric']: row['status'] for row in rows}
+
+
+def test_store_round_trip_skips_torn_lines(tmp_path):
+    store = HistoryStore(str(tmp_path / 'nested' / 'history.jsonl'))
+    assert store.runs() == []
+    store.append(run(1.0))
+    with open(store.path, 'a') as f:
+        f.write('{"truncated": ')
+    store.append(run(2.0))
+    assert [r['metrics']['latency_p99'] for r in store.runs()] == [1.0, 2.0]
+
+
+def test_baseline_filters_fingerprints_and_regressions(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.jsonl'))
+    for record in (run(1.0), run(9.0, config='other'), run(9.0, env='other'),
+                   run(9.0, regressed=True), run(1.1), run(1.2)):
+        store.append(record)
+    assert [r['metrics']['latency_p99'] for r in store.baseline('c', 'e')] == [1.0, 1.1, 1.2]
+    assert [r['metrics']['latency_p99'] for r in store.baseline('c', 'e', limit=2)] == [1.1, 1.2]
+
+
+
+def test_rebaseline_drops_earlier_runs(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.jsonl'))
+    for record in (run(1.0), run(1.1), run(2.0, regressed=True), dict(run(2.0), rebaseline=True),
+                   run(2.1), run(9.0, config='other')):
+        store.append(record)
+    assert [r['metrics']['latency_p99'] for r in store.baseline('c', 'e')] == [2.0, 2.1]
+
+def test_compare_needs_enough_runs():
+    assert statuses(compare(run(5.0), [])) == {'latency_p99': 'new', 'achieved_rps': 'new'}
+    rows = compare(run(5.0), [run(1.0), run(1.0)])
+    assert statuses(rows)['latency_p99'] == 'warming up'
+    assert rows[0]['baseline'] == 1.0
+
+
+@pytest.mark.parametrize('p99, rps, expected', [
+    (1.05, 100.0, {'latency_p99': 'ok', 'achieved_rps': 'ok'}),
+    (1.5, 100.0, {'latency_p99': 'regressed', 'achieved_rps': 'ok'}),
+    (1.0, 70.0, {'latency_p99': 'ok', 'achieved_rps': 'regressed'}),
+    (0.5, 150.0, {'latency_p99': 'improved', 'achieved_rps': 'improved'}),
+])
+def test_compare_directions(p99, rps, expected):
+    baseline = [run(1.0), run(0.98), run(1.02), run(1.01)]
+    assert statuses(compare(run(p99, rps), baseline)) == expected
+
+
+
+def test_slope_metrics_use_an_absolute_tolerance():
+    def soak(slope):
+        return {'metrics': {'rss_mb_per_hour': slope}, 'directions': {'rss_mb_per_hour': LOWER_IS_BETTER}}
+
+    baseline = [soak(0.1), soak(0.0), soak(-0.1), soak(0.05)]
+    assert compare(soak(3.0), baseline)[0]['status'] == 'ok'  # Noise around 0
+    assert compare(soak(120.0), baseline)[0]['status'] == 'regressed'
+
+def test_noisy_baseline_widens_tolerance():
+    noisy = [run(1.0), run(1.6), run(0.7), run(1.3), run(0.9)]
+    row = compare(run(1.5), noisy)[0]
+    assert row['status'] == 'ok' and row['allowed'] > 0.5
+
+
+def test_extract_metrics_for_both_report_kinds():
+    load = {'achieved_rps': 42.0, 'success_rate': 99.0,
+            'latency': {'p50': 0.1, 'p90': 0.2, 'p99': 0.4}}
+    metrics = extract_metrics(load)
+    assert metrics['achieved_rps'] == (42.0, HIGHER_IS_BETTER)
+    assert metrics['latency_p99'] == (0.4, LOWER_IS_BETTER)
+
+    sequential = {
+        'summary': {'overall_success_rate': 100.0, 'average_response_time': 0.3,
+                    'percentiles': {'p50': 0.2, 'p90': 0.5, 'p99': 0.9}},
+        'format_breakdown': {'markdown': {'percentiles': {'p50': 0.1, 'p99': 0.3}}},
+    }
+    metrics = extract_metrics(sequential)
+    assert metrics['latency_mean'] == (0.3, LOWER_IS_BETTER)
+    assert metrics['markdown_p99'] == (0.3, LOWER_IS_BETTER)
+
+    cache = {'mode': 'cache', 'success_rate': 100.0, 'warm_hit_ratio': None,
+             'cold': {'p50': 1.0, 'p99': 2.0}, 'warm': {'p50': 0.1, 'p99': 0.5}}
+    metrics = extract_metrics(cache)
+    assert metrics['warm_hit_ratio'] == (0.0, HIGHER_IS_BETTER)
+    assert metrics['warm_p99'] == (0.5, LOWER_IS_BETTER)
+
+
+def test_make_record_fingerprints_settings(tmp_path):
+    (tmp_path / 'config.yaml').write_text('a: 1\n')
+    report = {'achieved_rps': 1.0, 'success_rate': 100.0, 'latency': {'p50': 0, 'p90': 0, 'p99': 0}}
+    first = make_record(report, {'rate': 10}, root=str(tmp_path))
+    assert make_record(report, {'rate': 10}, root=str(tmp_path))['config_fingerprint'] == first['config_fingerprint']
+    assert make_record(report, {'rate': 20}, root=str(tmp_path))['config_fingerprint'] != first['config_fingerprint']
+    (tmp_path / 'config.yaml').write_text('a: 2\n')
+    assert make_record(report, {'rate': 10}, root=str(tmp_path))['config_fingerprint'] != first['config_fingerprint']
+    json.dumps(first)
+
+
+
+def test_env_fingerprint_ignores_hostname_and_platform_string(monkeypatch, tmp_path):
+    env = environment_info()
+    assert env['python'].count('.') == 1
+    runner = dict(env, hostname='runner-a1b2c3', platform='Linux-6.1.0-1234-azure-x86_64-with-glibc2.35',
+                  python_version='3.11.9', memory_gb=7)
+    assert environment_fingerprint(runner) == environment_fingerprint(env)
+    assert environment_fingerprint(dict(env, cpu_count=(env['cpu_count'] or 1) + 1)) != environment_fingerprint(env)
+
+    monkeypatch.setattr(bench_history.socket, 'gethostname', lambda: 'ephemeral-42')
+    record = make_record({'achieved_rps': 1.0, 'success_rate': 100.0,
+                          'latency': {'p50': 0, 'p90': 0, 'p99': 0}}, {'rate': 10}, root=str(tmp_path))
+    assert record['environment']['hostname'] == 'ephemeral-42'
+    assert record['env_fingerprint'] == environment_fingerprint(env)
+
+def test_format_diff_table():
+    rows = compare(run(1.5), [run(1.0), run(1.0), run(1.0)])
+    table = format_diff_table(rows)
+    assert 'latency_p99' in table and '+50.0%' in table and 'regressed' in table
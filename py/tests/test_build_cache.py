@@ -0,0 +1,81 @@
+import json
+import sys
+
+from build_cache import BuildCache, expand_inputs
+
+
+def write(root, rel_path, text):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_expand_inputs_globs_and_excludes(tmp_path):
+    for rel_path in ('py/app.py', 'py/tests/test_app.py', 'py/__pycache__/app.pyc', 'py/README.md',
+                     'js/src/server.ts', 'js/node_modules/x/index.js', 'js/build/server.js',
+                     'js/package-lock.json'):
+        write(tmp_path, rel_path, rel_path)
+
+    assert expand_inputs(['py/**/*.py'], str(tmp_path)) == ['py/app.py', 'py/tests/test_app.py']
+    assert expand_inputs(['js/**', 'missing.json'], str(tmp_path), exclude=['node_modules', 'js/build']) == [
+        'js/package-lock.json', 'js/src/server.ts']
+    assert expand_inputs(['js/package-lock.json'], str(tmp_path)) == ['js/package-lock.json']
+
+
+def test_record_and_skip_until_inputs_change(tmp_path):
+    write(tmp_path, 'py/app.py', 'print(1)')
+    cache = BuildCache(path=str(tmp_path / 'manifest.json'), root=str(tmp_path))
+    spec = {'inputs': ['py/**/*.py']}
+
+    assert not cache.is_fresh('pyright', spec)  # Never ran
+    cache.record('pyright', cache.fingerprint(spec))
+    assert cache.is_fresh('pyright', spec)
+    assert json.loads((tmp_path / 'manifest.json').read_text())['steps']['pyright']['files'] == 1
+
+    write(tmp_path, 'py/app.py', 'print(2)')
+    assert not cache.is_fresh('pyright', spec)
+    write(tmp_path, 'py/app.py', 'print(1)')
+    assert cache.is_fresh('pyright', spec)  # Back to the recorded content
+    write(tmp_path, 'py/new.py', '')
+    assert not cache.is_fresh('pyright', spec)
+
+
+def test_tools_outputs_and_check_invalidate(tmp_path):
+    write(tmp_path, 'js/package-lock.json', '{}')
+    manifest = str(tmp_path / 'manifest.json')
+    spec = {'inputs': ['js/package-lock.json'], 'tools': [[sys.executable, '--version']],
+            'outputs': ['js/node_modules']}
+    cache = BuildCache(path=manifest, root=str(tmp_path))
+    cache.record('npm install', cache.fingerprint(spec))
+    assert cache.fingerprint(spec)['tools'][f'{sys.executable} --version'].startswith('Python')
+
+    assert not cache.is_fresh('npm install', spec)  # node_modules missing
+    (tmp_path / 'js' / 'node_modules').mkdir()
+    assert cache.is_fresh('npm install', spec)
+    assert not cache.is_fresh('npm install', dict(spec, check=lambda: False))
+    assert not BuildCache(path=manifest, root=str(tmp_path), skip=False).is_fresh('npm install', spec)
+
+    upgraded = dict(spec, tools=[[sys.executable, '-c', 'print("v2")']])
+    assert not cache.is_fresh('npm install', upgraded)
+    assert cache.tool_version(['definitely-not-a-tool', '--version']) == 'missing'
+
+
+def test_corrupt_manifest_is_ignored(tmp_path):
+    (tmp_path / 'manifest.json').write_text('{not json')
+    cache = BuildCache(path=str(tmp_path / 'manifest.json'), root=str(tmp_path))
+    assert not cache.is_fresh('pyright', {'inputs': []})
+    cache.record('pyright', cache.fingerprint({'inputs': []}))
+    assert cache.is_fresh('pyright', {'inputs': []})
+
+
+def test_record_keeps_the_fingerprint_taken_before_the_step(tmp_path):
+    write(tmp_path, 'py/app.py', 'print(1)')
+    cache = BuildCache(path=str(tmp_path / 'manifest.json'), root=str(tmp_path))
+    spec = {'inputs': ['py/**/*.py']}
+
+    before = cache.fingerprint(spec)
+    write(tmp_path, 'py/app.py', 'print(2)')  # Edited while the step runs
+    cache.record('pyright', before)
+    assert not cache.is_fresh('pyright', spec)
+    write(tmp_path, 'py/app.py', 'print(1)')
+    assert cache.is_fresh('pyright', spec)
@@ -0,0 +1,106 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+import bulk
+
+
+class FakeReader:
+    """Stands in for ReaderAPI.map, failing URLs that contain 'bad'"""
+
+    def __init__(self):
+        self.requested = []
+
+    def map(self, urls, response_format, workers=4):
+        for url in urls:
+            self.requested.append(url)
+            if 'bad' in url:
+                yield url, requests.HTTPError('Status 500')
+            else:
+                yield url, f'{response_format}:{url}'
+
+
+def test_read_urls_plain_and_csv(tmp_path):
+    plain = tmp_path / 'urls.txt'
+    plain.write_text('https://a.test\n\n# comment\n  https://b.test  \n')
+    assert list(bulk.read_urls(str(plain))) == ['https://a.test', 'https://b.test']
+
+    with_header = tmp_path / 'urls.csv'
+    with_header.write_text('id,URL\n1,https://a.test\n2,https://b.test\n3\n')
+    assert list(bulk.read_urls(str(with_header))) == ['https://a.test', 'https://b.test']
+
+
+
+def test_read_urls_keeps_commas_in_plain_lists(tmp_path):
+    plain = tmp_path / 'urls.txt'
+    plain.write_text('https://example.com/a?x=1,2\nhttps://example.com/b\n')
+    assert list(bulk.read_urls(str(plain))) == ['https://example.com/a?x=1,2', 'https://example.com/b']
+
+    headed = tmp_path / 'urls.list'
+    headed.write_text('url,note\n"https://example.com/a?x=1,2",first\n')
+    assert list(bulk.read_urls(str(headed))) == ['https://example.com/a?x=1,2']
+
+    no_header = tmp_path / 'plain.csv'
+    no_header.write_text('https://a.test,ignored\n"https://example.com/a?x=1,2"\n')
+    assert list(bulk.read_urls(str(no_header))) == ['https://a.test', 'https://example.com/a?x=1,2']
+
+
+def test_run_bulk_appends_records_and_journal(tmp_path):
+    out = tmp_path / 'out.jsonl'
+    journal = bulk.CheckpointJournal(str(tmp_path / 'out.checkpoint'))
+    reader = FakeReader()
+
+    counts = bulk.run_bulk(reader, ['https://a.test', 'https://bad.test'], str(out), journal,
+                           response_format='text')
+    journal.close()
+
+    assert counts == {'succeeded': 1, 'failed': 1, 'skipped': 0}
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert records[0] == {**records[0], 'url': 'https://a.test', 'content': 'text:https://a.test'}
+    assert records[1]['error'].startswith('HTTPError')
+    assert (tmp_path / 'out.checkpoint').read_text() == 'ok\thttps://a.test\nerr\thttps://bad.test\n'
+
+
+def test_resume_skips_finished_and_retries_failed(tmp_path):
+    checkpoint = tmp_path / 'out.checkpoint'
+    checkpoint.write_text('ok\thttps://a.test\nerr\thttps://bad.test\nok\thttps://torn')
+
+    journal = bulk.CheckpointJournal(str(checkpoint))
+    assert journal.is_done('https://a.test')
+    assert not journal.is_done('https://torn')
+    assert journal.previous_failures == 1
+
+    reader = FakeReader()
+    counts = bulk.run_bulk(reader, ['https://a.test', 'https://bad.test', 'https://c.test'],
+                           str(tmp_path / 'out.jsonl'), journal)
+    journal.close()
+
+    assert reader.requested == ['https://bad.test', 'https://c.test']
+    assert counts == {'succeeded': 1, 'failed': 1, 'skipped': 1}
+    assert checkpoint.read_text() == ('ok\thttps://a.test\nerr\thttps://bad.test\n'
+                                      'err\thttps://bad.test\nok\thttps://c.test\n')
+
+
+def test_main_runs_and_reports_failures(tmp_path):
+    urls = tmp_path / 'urls.txt'
+    urls.write_text('https://a.test\nhttps://bad.test\n')
+    reader = FakeReader()
+    reader.close = MagicMock()
+
+    argv = ['bulk', str(urls), '--workers', '2']
+    with patch('sys.argv', argv), patch('bulk.ReaderAPI', return_value=reader):
+        with pytest.raises(SystemExit) as e:
+            bulk.main()
+    assert e.value.code == 1
+    assert (tmp_path / 'urls.txt.jsonl').exists()
+    assert (tmp_path / 'urls.txt.jsonl.checkpoint').exists()
+    reader.close.assert_called_once()
+
+
+def test_main_missing_input(tmp_path):
+    with patch('sys.argv', ['bulk', str(tmp_path / 'missing.txt')]):
+        with pytest.raises(SystemExit) as e:
+            bulk.main()
+    assert e.value.code == 2
@@ -88,34 +88,34 @@ def test_main_server_not_running(mock_parse_args, mock_check_server_status):
     assert e.type == SystemExit
     assert e.value.code == 1
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_demo_json_api(mock_get):
     mock_get.return_value.status_code = 200
     mock_get.return_value.json.return_value = {'data': {'title': 'Test'}}
     reader = demo.ReaderAPI()
     demo.demo_json_api(reader, 'http://example.com')
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_demo_markdown_api(mock_get):
     mock_get.return_value.status_code = 200
     mock_get.return_value.text = '# Test'
     reader = demo.ReaderAPI()
     demo.demo_markdown_api(reader, 'http://example.com')
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_demo_screenshot_api(mock_get):
     mock_get.return_value.status_code = 200
     mock_get.return_value.text = 'http://example.com/screenshot.png'
     reader = demo.ReaderAPI()
     demo.demo_screenshot_api(reader, 'http://example.com')
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_demo_error_handling(mock_get):
     mock_get.side_effect = requests.exceptions.RequestException('Test Error')
     reader = demo.ReaderAPI()
     demo.demo_error_handling(reader)
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_demo_pdf_status(mock_get):
     mock_get.return_value.status_code = 200
     mock_get.return_value.json.return_value = {'data': {'title': 'Test'}}
@@ -64,7 +64,7 @@ class TestReaderAPI:
         assert ' ' not in encoded
         assert '%' in encoded
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_json_success(self, mock_get):
         """Test successful JSON response"""
         expected_data = {
@@ -88,7 +88,7 @@ class TestReaderAPI:
         assert call_args[0][0] == f"{self.api.base_url}/{quote(self.test_url, safe='')}"
         assert call_args[1]['headers']['Accept'] == 'application/json'
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_markdown_success(self, mock_get):
         """Test successful markdown response"""
         markdown_content = "# Hello World\n\nThis is a test page."
@@ -103,7 +103,7 @@ class TestReaderAPI:
         call_args = mock_get.call_args
         assert call_args[1]['headers']['Accept'] == 'text/plain'
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_html_success(self, mock_get):
         """Test successful HTML response"""
         html_content = "<html><body><h1>Test</h1></body></html>"
@@ -118,7 +118,7 @@ class TestReaderAPI:
         call_args = mock_get.call_args
         assert call_args[1]['headers']['X-Respond-With'] == 'html'
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_request_with_params(self, mock_get):
         """Test requests with additional parameters"""
         mock_response = make_mock_resp(200, json_data={'test': 'data'})
@@ -130,7 +130,7 @@ class TestReaderAPI:
         call_args = mock_get.call_args
         assert call_args[1]['params'] == {'timeout': 30, 'format': 'clean'}
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_http_error_handling(self, mock_get):
         """Test HTTP error handling"""
         mock_response = make_mock_resp(404, text='Not Found')
@@ -139,7 +139,7 @@ class TestReaderAPI:
         with pytest.raises(requests.HTTPError):
             self.api.get_json(self.test_url)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_connection_error_handling(self, mock_get):
         """Test connection error handling"""
         mock_get.side_effect = ConnectionError("Connection failed")
@@ -147,7 +147,7 @@ class TestReaderAPI:
         with pytest.raises(ConnectionError):
             self.api.get_json(self.test_url)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_timeout_error_handling(self, mock_get):
         """Test timeout error handling"""
         mock_get.side_effect = Timeout("Request timed out")
@@ -155,7 +155,7 @@ class TestReaderAPI:
         with pytest.raises(Timeout):
             self.api.get_json(self.test_url)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_invalid_json_response(self, mock_get):
         """Test handling of invalid JSON responses"""
         mock_response = make_mock_resp(200, text='invalid json')
@@ -220,7 +220,7 @@ def test_get_json_and_markdown_and_html(monkeypatch):
         # Return markdown/plain for others
         return make_resp(200, text='## Hello World')
 
-    monkeypatch.setattr(requests, 'get', fake_get)
+    monkeypatch.setattr(requests.Session, 'get', staticmethod(fake_get))
 
     reader = demo.ReaderAPI(base_url='http://example.com')
 
@@ -239,7 +239,7 @@ def test_get_text_and_screenshot(monkeypatch):
     def fake_get_text(url, headers=None, params=None, timeout=None):
         return make_resp(200, text='plain text')
 
-    monkeypatch.setattr(requests, 'get', fake_get_text)
+    monkeypatch.setattr(requests.Session, 'get', staticmethod(fake_get_text))
 
     reader = demo.ReaderAPI(base_url='http://example.com')
     txt = reader.get_text('https://example.org')
@@ -257,7 +257,7 @@ def test_get_queue_and_check_ui(monkeypatch):
             return make_resp(200, text='queue ui')
         return make_resp(404, text='not found')
 
-    monkeypatch.setattr(requests, 'get', fake_get_queue)
+    monkeypatch.setattr(requests.Session, 'get', staticmethod(fake_get_queue))
 
     reader = demo.ReaderAPI(base_url='http://example.com')
     q = reader.get_queue_status()
@@ -279,3 +279,257 @@ def test_print_separator(capsys):
     demo.print_separator('TEST SECTION')
     captured = capsys.readouterr()
     assert 'TEST SECTION' in captured.out
+
+
+def test_session_pool_and_retry_configuration():
+    reader = demo.ReaderAPI(base_url='http://example.com', pool_connections=4, pool_maxsize=16,
+                            connect_timeout=2.0, read_timeout=30.0, max_retries=5)
+    adapter = reader.session.get_adapter('http://example.com/')
+    assert adapter._pool_connections == 4
+    assert adapter._pool_maxsize == 16
+    assert adapter.max_retries.total == 5
+    assert adapter.max_retries.read == 0  # A hung render is not sent again
+    assert 503 in adapter.max_retries.status_forcelist
+    assert 'POST' not in adapter.max_retries.allowed_methods
+    assert reader.session.get_adapter('https://example.com/') is adapter
+    assert reader.timeout == (2.0, 30.0)
+
+
+def test_session_reused_with_timeouts(monkeypatch):
+    calls = []
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(timeout)
+        return make_resp(200, text='ok')
+
+    shared = requests.Session()
+    monkeypatch.setattr(shared, 'get', fake_get)
+    with demo.ReaderAPI(base_url='http://example.com', session=shared, read_timeout=42) as reader:
+        assert reader.session is shared
+        reader.get_text('https://example.org')
+        reader.get_markdown('https://example.org')
+    assert calls == [(10.0, 42), (10.0, 42)]
+
+
+def test_close_leaves_caller_session_open(monkeypatch):
+    shared = requests.Session()
+    closed = []
+    monkeypatch.setattr(shared, 'close', lambda: closed.append('shared'))
+    with demo.ReaderAPI(base_url='http://example.com', session=shared):
+        pass
+    assert closed == []
+
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    monkeypatch.setattr(reader.session, 'close', lambda: closed.append('own'))
+    reader.close()
+    assert closed == ['own']
+
+
+def test_close_leaves_caller_endpoint_pool_open():
+    from balancer import EndpointPool
+    pool = EndpointPool(['http://a.test', 'http://b.test'], probe_interval=0)
+    pool.close = Mock()
+    with demo.ReaderAPI(endpoints=pool):
+        pass
+    pool.close.assert_not_called()
+
+    reader = demo.ReaderAPI(base_url='http://a.test,http://b.test')
+    reader.endpoints.close = Mock()
+    reader.close()
+    reader.endpoints.close.assert_called_once()
+
+
+def test_get_format_unknown_format():
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    with pytest.raises(ValueError):
+        reader.get_format('https://example.org', 'pdf')
+
+
+def test_map_unordered_streams_results_and_errors(monkeypatch):
+    import time as _time
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        if 'slow' in url:
+            _time.sleep(0.2)
+        if 'bad' in url:
+            return make_resp(500, text='boom')
+        return make_resp(200, text=url.rsplit('/', 1)[-1])
+
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    monkeypatch.setattr(reader.session, 'get', fake_get)
+
+    urls = ['https://a.test/slow', 'https://a.test/fast', 'https://a.test/bad']
+    results = list(reader.map(urls, 'text', workers=3))
+
+    assert [u for u, _ in results][0] != 'https://a.test/slow'
+    by_url = dict(results)
+    assert by_url['https://a.test/fast'] == quote('https://a.test/fast', safe='')
+    assert isinstance(by_url['https://a.test/bad'], requests.HTTPError)
+    assert set(by_url) == set(urls)
+
+
+def test_map_ordered_preserves_input_order(monkeypatch):
+    import random
+    import time as _time
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        _time.sleep(random.random() * 0.02)
+        return make_resp(200, text=url)
+
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    monkeypatch.setattr(reader.session, 'get', fake_get)
+
+    urls = [f'https://a.test/{i}' for i in range(20)]
+    assert [u for u, _ in reader.map(urls, 'markdown', workers=4, ordered=True)] == urls
+
+
+def test_map_applies_back_pressure(monkeypatch):
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    monkeypatch.setattr(reader.session, 'get', lambda url, **kw: make_resp(200, text='ok'))
+
+    consumed = []
+
+    def url_source():
+        for i in range(1_000_000):
+            consumed.append(i)
+            yield f'https://a.test/{i}'
+
+    results = reader.map(url_source(), 'text', workers=2)
+    first = [next(results) for _ in range(3)]
+    results.close()
+
+    assert len(first) == 3
+    # Only a small window beyond what was consumed may have been pulled from the source
+    assert len(consumed) <= 3 + 2 * 2
+
+
+def test_map_rejects_invalid_workers():
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    with pytest.raises(ValueError):
+        list(reader.map(['https://a.test'], workers=0))
+
+
+def test_get_bundle_single_round_trip(monkeypatch):
+    calls = []
+    payload = {
+        'code': 200,
+        'data': {
+            'title': 'Example',
+            'url': 'https://example.org/',
+            'content': '# Example',
+            'links': {},
+            'formats': {'default': '# Example', 'html': '<h1>Example</h1>', 'screenshot': '/instant-screenshots/s.png'},
+        },
+    }
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(headers)
+        return make_resp(200, json_data=payload)
+
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    monkeypatch.setattr(reader.session, 'get', fake_get)
+
+    bundle = reader.get_bundle('https://example.org', formats=['json', 'markdown', 'html', 'screenshot'],
+                               headers={'x-timeout': '20'})
+
+    assert len(calls) == 1
+    assert calls[0]['X-Respond-With'] == 'default,html,screenshot'
+    assert calls[0]['Accept'] == 'application/json'
+    assert calls[0]['x-timeout'] == '20'
+    assert bundle['title'] == 'Example'
+    assert bundle['formats']['markdown'] == '# Example'
+    assert bundle['formats']['html'] == '<h1>Example</h1>'
+    assert bundle['formats']['screenshot'] == '/instant-screenshots/s.png'
+    assert bundle['formats']['json']['content'] == '# Example'
+    assert 'formats' not in bundle['formats']['json']
+
+
+def test_get_bundle_metadata_only_uses_json(monkeypatch):
+    calls = []
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(headers)
+        return make_resp(200, json_data={'data': {'title': 'T', 'content': 'md'}})
+
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    monkeypatch.setattr(reader.session, 'get', fake_get)
+
+    bundle = reader.get_bundle('https://example.org', formats=['json', 'markdown'])
+    assert 'X-Respond-With' not in calls[0]
+    assert bundle['formats'] == {'json': {'title': 'T', 'content': 'md'}, 'markdown': 'md'}
+    assert bundle['url'] == 'https://example.org'
+
+
+def test_get_bundle_rejects_unknown_formats():
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    with pytest.raises(ValueError):
+        reader.get_bundle('https://example.org', formats=['pdf'])
+    with pytest.raises(ValueError):
+        reader.get_bundle('https://example.org', formats=[])
+
+
+class StreamResp:
+    def __init__(self, chunks, status=200):
+        self.chunks = chunks
+        self.status_code = status
+        self.closed = False
+        self.chunk_sizes = []
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"Status {self.status_code}")
+
+    def iter_content(self, chunk_size=1):
+        self.chunk_sizes.append(chunk_size)
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_markdown_to_callback(monkeypatch):
+    resp = StreamResp([b'# Title\n', b'', b'body'])
+    calls = []
+
+    def fake_get(url, headers=None, params=None, timeout=None, stream=False):
+        calls.append((headers, stream))
+        return resp
+
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    monkeypatch.setattr(reader.session, 'get', fake_get)
+
+    chunks = []
+    total = reader.stream_markdown('https://example.org', chunks.append, chunk_size=1024)
+
+    assert total == 12
+    assert chunks == [b'# Title\n', b'body']
+    assert calls[0][0]['Accept'] == 'text/plain'
+    assert calls[0][1] is True
+    assert resp.chunk_sizes == [1024]
+    assert resp.closed
+
+
+def test_download_writes_atomically(tmp_path, monkeypatch):
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    monkeypatch.setattr(reader.session, 'get', lambda url, **kw: StreamResp([b'\x89PNG', b'data']))
+
+    target = tmp_path / 'shot.png'
+    assert reader.download('https://example.org', str(target), 'pageshot') == 8
+    assert target.read_bytes() == b'\x89PNGdata'
+    assert [p.name for p in tmp_path.iterdir()] == ['shot.png']
+
+
+def test_download_failure_leaves_no_partial_file(tmp_path, monkeypatch):
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    monkeypatch.setattr(reader.session, 'get', lambda url, **kw: StreamResp([], status=502))
+
+    target = tmp_path / 'page.md'
+    with pytest.raises(requests.HTTPError):
+        reader.download('https://example.org', str(target))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stream_rejects_bad_sink():
+    reader = demo.ReaderAPI(base_url='http://example.com')
+    with pytest.raises(TypeError):
+        reader.stream('https://example.org', 'markdown', sink=None)
@@ -0,0 +1,105 @@
+import asyncio
+from urllib.parse import unquote
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import demo
+
+
+def make_app(delay=0.0, state=None):
+    """Minimal stand-in for the Reader server"""
+    state = state if state is not None else {}
+    state.setdefault('active', 0)
+    state.setdefault('peak', 0)
+
+    async def crawl(request):
+        target = unquote(request.match_info['target'])
+        state['active'] += 1
+        state['peak'] = max(state['peak'], state['active'])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            state['active'] -= 1
+        if 'fail' in target:
+            return web.Response(status=500, text='boom')
+        if request.headers.get('Accept') == 'application/json':
+            return web.json_response({'data': {'url': target, 'query': dict(request.query)}})
+        mode = request.headers.get('X-Respond-With', 'markdown')
+        return web.Response(text=f'{mode}:{target}')
+
+    async def queue(request):
+        return web.json_response({'status': 'ok', 'max_concurrent': 3})
+
+    app = web.Application()
+    app.router.add_get('/queue', queue)
+    app.router.add_get('/{target:.+}', crawl)
+    return app
+
+
+async def serve(app):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+def test_async_getters():
+    async def run():
+        runner, base = await serve(make_app())
+        try:
+            async with demo.AsyncReaderAPI(base_url=base) as reader:
+                j = await reader.get_json('https://example.com/a', timeout=5)
+                assert j['data']['url'] == 'https://example.com/a'
+                assert j['data']['query'] == {'timeout': '5'}
+                assert await reader.get_markdown('https://example.com') == 'markdown:https://example.com'
+                assert await reader.get_html('https://example.com') == 'html:https://example.com'
+                assert await reader.get_text('https://example.com') == 'text:https://example.com'
+                assert await reader.get_screenshot('https://example.com', full_page=True) == 'pageshot:https://example.com'
+                assert (await reader.get_queue_status())['status'] == 'ok'
+                with pytest.raises(aiohttp.ClientResponseError):
+                    await reader.get_markdown('https://example.com/fail')
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def test_fetch_many_respects_concurrency_and_reports_errors():
+    state = {}
+
+    async def run():
+        runner, base = await serve(make_app(delay=0.05, state=state))
+        try:
+            urls = (f'https://example.com/{i}' for i in range(12))
+            async with demo.AsyncReaderAPI(base_url=base, concurrency=3) as reader:
+                results = {}
+                async for url, result in reader.fetch_many(urls, 'text'):
+                    results[url] = result
+                errors = [r async for _, r in reader.fetch_many(['https://example.com/fail'])]
+        finally:
+            await runner.cleanup()
+        return results, errors
+
+    results, errors = asyncio.run(run())
+    assert len(results) == 12
+    assert results['https://example.com/4'] == 'text:https://example.com/4'
+    assert state['peak'] <= 3
+    assert isinstance(errors[0], aiohttp.ClientResponseError)
+
+
+def test_fetch_many_rejects_unknown_format():
+    async def run():
+        async with demo.AsyncReaderAPI(base_url='http://127.0.0.1:1') as reader:
+            return [r async for _, r in reader.fetch_many(['https://example.com'], 'pdf')]
+
+    results = asyncio.run(run())
+    assert isinstance(results[0], ValueError)
+
+
+def test_invalid_concurrency():
+    with pytest.raises(ValueError):
+        demo.AsyncReaderAPI(concurrency=0)
@@ -0,0 +1,47 @@
+import json
+import random
+
+import pytest
+
+from latency import LatencyHistogram
+
+
+def test_percentiles_within_precision():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(-1, 1) for _ in range(20000)]
+    histogram = LatencyHistogram.from_values(values)
+    ordered = sorted(values)
+
+    assert histogram.count == len(values)
+    assert histogram.mean == pytest.approx(sum(values) / len(values), rel=1e-4)
+    for q in (50, 90, 99, 99.9):
+        exact = ordered[int(q / 100 * len(ordered) + 0.999999) - 1]
+        assert histogram.percentile(q) == pytest.approx(exact, rel=2e-3)
+    assert histogram.percentile(100) == pytest.approx(max(values), abs=1e-6)
+    assert histogram.min == pytest.approx(min(values), abs=1e-6)
+
+
+def test_storage_is_compact():
+    histogram = LatencyHistogram.from_values(i / 1000 for i in range(1, 100001))
+    assert len(histogram.counts) < 10000  # vs 100000 samples
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(99) == 0.0
+    assert histogram.summary()['count'] == 0
+
+
+def test_merge_and_json_round_trip():
+    a = LatencyHistogram.from_values([0.01, 0.02, 0.03])
+    b = LatencyHistogram.from_values([1.5, 2.5])
+    merged = LatencyHistogram().merge(a).merge(b)
+    assert merged.count == 5
+    assert merged.max == pytest.approx(2.5)
+    assert merged.min == pytest.approx(0.01)
+
+    restored = LatencyHistogram.from_dict(json.loads(json.dumps(merged.to_dict())))
+    assert restored.summary() == merged.summary()
+
+    with pytest.raises(ValueError):
+        merged.merge(LatencyHistogram(significant_figures=2))
@@ -0,0 +1,90 @@
+import pytest
+
+import matrix_bench
+from matrix_bench import load_grid, load_routes, option_combinations, print_matrix_report, run_matrix
+
+PIPELINES = """
+pipeline_routing:
+  default: default_html
+  routes:
+    "/default_html": default_html
+    "/default_pdf": default_pdf
+    "/default_html_ai": default_html_ai
+    "/json/": default_html
+    "/": default_html
+  pipelines:
+    default_html: {content_type: html, ai_required: false}
+    default_pdf: {content_type: pdf, ai_required: false}
+    default_html_ai: {content_type: html, ai_required: true}
+"""
+
+
+@pytest.fixture
+def pipeline_config(tmp_path):
+    path = tmp_path / 'crawl_pipeline.yaml'
+    path.write_text(PIPELINES)
+    return str(path)
+
+
+def test_routes_map_to_served_paths(pipeline_config):
+    routes = load_routes(pipeline_config)
+    assert [(r['route'], r['prefix']) for r in routes] == [
+        ('/default_html', 'task/default_html/'), ('/default_pdf', 'task/default_pdf/'),
+        ('/json/', 'json/'), ('/', '')]
+    assert '/default_html_ai' in [r['route'] for r in load_routes(pipeline_config, include_ai=True)]
+
+
+def test_repository_pipeline_config_loads():
+    routes = load_routes(matrix_bench.DEFAULT_PIPELINE_CONFIG)
+    assert {'default_html', 'default_pdf'} <= {r['pipeline'] for r in routes}
+    assert not any(r['ai_required'] for r in routes)
+
+
+def test_grid_loading_and_combinations(tmp_path):
+    grid_file = tmp_path / 'grid.yaml'
+    grid_file.write_text('X-Target-Selector: [null, article, main]\nx-timeout: [null, 10]\n')
+    grid = load_grid(str(grid_file))
+    assert grid == {'x-target-selector': [None, 'article', 'main'], 'x-timeout': [None, '10']}
+
+    assert option_combinations(grid) == [{}, {'x-target-selector': 'article'},
+                                         {'x-target-selector': 'main'}, {'x-timeout': '10'}]
+    product = option_combinations(grid, 'product')
+    assert len(product) == 6 and product[0] == {}
+    assert {'x-target-selector': 'main', 'x-timeout': '10'} in product
+
+    grid_file.write_text('x-timeout: []\n')
+    with pytest.raises(ValueError):
+        load_grid(str(grid_file))
+    assert load_grid(None) == matrix_bench.DEFAULT_OPTION_GRID
+
+
+class FakeTester:
+    def __init__(self):
+        self.calls = []
+
+    def test_url(self, url, format_type='json', prefix='', extra_headers=None):
+        self.calls.append((url, prefix, dict(extra_headers or {})))
+        slow = 'x-with-links-summary' in (extra_headers or {})
+        return {'success': True, 'response_time': 0.4 if slow else 0.1,
+                'content_length': 2000 if slow else 1000, 'url': url, 'format': format_type}
+
+
+def test_run_matrix_costs_each_cell(pipeline_config, capsys):
+    tester = FakeTester()
+    routes = load_routes(pipeline_config)
+    combos = [{}, {'x-with-links-summary': 'true'}]
+    report = run_matrix(tester, ['https://a.test/page', 'https://a.test/doc.pdf'], routes, combos,
+                        iterations=2)
+
+    assert report['total_requests'] == len(tester.calls) == 4 * 2 * 2
+    assert {url for url, prefix, _ in tester.calls if prefix == 'task/default_pdf/'} == {'https://a.test/doc.pdf'}
+    assert {url for url, prefix, _ in tester.calls if prefix == 'json/'} == {'https://a.test/page'}
+    slow = next(c for c in report['cells'] if c['route'] == '/' and c['options'])
+    assert slow['latency_ratio'] == pytest.approx(4.0, rel=0.01) and slow['bytes_ratio'] == 2.0
+    print_matrix_report(report)
+    assert 'MOST EXPENSIVE OPTIONS' in capsys.readouterr().out
+
+
+def test_run_matrix_skips_routes_without_matching_urls(pipeline_config):
+    report = run_matrix(FakeTester(), ['https://a.test/page'], load_routes(pipeline_config), [{}], iterations=1)
+    assert report['skipped'] == [{'route': '/default_pdf', 'reason': 'no pdf URLs'}]
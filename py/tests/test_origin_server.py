@@ -0,0 +1,68 @@
+import requests
+import pytest
+
+import speedtest
+from origin_server import CORPORA, Corpus, OriginServer
+
+
+def test_corpus_is_deterministic_and_follows_spec():
+    spec = {'pages': 3, 'paragraphs': 10, 'words': 30, 'depth': 7, 'images': 4, 'links': 12,
+            'slow': 2, 'pdfs': 2}
+    a, b = Corpus('custom', spec, seed=1), Corpus('custom', spec, seed=1)
+    page = a.page(0).decode()
+    assert page == b.page(0).decode()
+    assert page != Corpus('custom', spec, seed=2).page(0).decode()
+
+    assert page.count('<div class="level-') == 7
+    assert page.count('/custom/img/0-') == 4
+    assert page.count('/custom/slow/0-') == 2
+    assert page.count('<a href="/custom/page/') == 12 + 1  # Plus the "Next" link
+    assert page.count('<p>') == 10 + 1  # Plus the footer
+    assert '/custom/doc/' in page
+
+
+def test_pdf_and_png_are_well_formed():
+    corpus = Corpus('pdf')
+    pdf = corpus.pdf(3)
+    assert pdf.startswith(b'%PDF-1.4') and pdf.rstrip().endswith(b'%%EOF')
+    assert pdf.count(b'/Type /Page ') == CORPORA['pdf']['pdf_pages']
+    startxref = int(pdf.rsplit(b'startxref\n', 1)[1].split(b'\n')[0])
+    assert pdf[startxref:].startswith(b'xref')
+
+    png = corpus.image(0, 0)
+    assert png.startswith(b'\x89PNG\r\n\x1a\n') and png.endswith(b'IEND\xaeB`\x82')
+
+
+def test_server_routes():
+    with OriginServer(corpora={'tiny': {'pages': 2, 'pdfs': 1, 'slow': 1, 'slow_delay': 0.2}}) as origin:
+        urls = origin.urls('tiny')
+        assert urls == [f'{origin.base_url}/tiny/page/0.html', f'{origin.base_url}/tiny/page/1.html',
+                        f'{origin.base_url}/tiny/doc/0.pdf']
+        page = requests.get(urls[0])
+        assert page.headers['Content-Type'].startswith('text/html')
+        assert page.content == origin.corpus('tiny').page(0)
+        assert requests.get(urls[2]).headers['Content-Type'] == 'application/pdf'
+        assert requests.get(f'{origin.base_url}/tiny/index.html').text.count('<li>') == 3
+        assert 'Allow: /' in requests.get(f'{origin.base_url}/robots.txt').text
+
+        slow = requests.get(f'{origin.base_url}/tiny/slow/0-0.png')
+        assert slow.elapsed.total_seconds() >= 0.2
+        assert requests.get(f'{origin.base_url}/tiny/page/2.html').status_code == 404
+        assert requests.get(f'{origin.base_url}/other/page/0.html').status_code == 404
+        with pytest.raises(ValueError):
+            origin.urls('other')
+
+
+def test_speedtester_targets_corpus_by_name():
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    try:
+        urls = tester.corpus_urls('small')
+        assert len(urls) == CORPORA['small']['pages']
+        assert requests.get(urls[0]).status_code == 200
+        assert tester.corpus_urls('pdf', include_pdfs=False) == [
+            f'{tester.origin.base_url}/pdf/page/{n}.html' for n in range(CORPORA['pdf']['pages'])]
+        assert tester.corpus_urls('pdf', origin_url='http://lab.internal:8800/')[-1] == \
+            'http://lab.internal:8800/pdf/doc/19.pdf'
+    finally:
+        tester.close()
+    assert tester.origin is None
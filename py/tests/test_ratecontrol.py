@@ -0,0 +1,121 @@
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+import demo
+from ratecontrol import AdaptiveController, TokenBucket, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('5') == 5.0
+    assert parse_retry_after('-3') == 0.0
+    assert parse_retry_after('soon') is None
+    in_ten = parse_retry_after(formatdate(time.time() + 10, usegmt=True))
+    assert in_ten is not None and 8 <= in_ten <= 10
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2, capacity=2)
+    assert bucket.try_take(now=bucket._updated) == 0.0
+    assert bucket.try_take(now=bucket._updated) == 0.0
+    assert bucket.try_take(now=bucket._updated) == pytest.approx(0.5)
+    assert bucket.try_take(now=bucket._updated + 0.5) == 0.0
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_aimd_increase_and_decrease():
+    controller = AdaptiveController(initial_concurrency=4, min_concurrency=1, max_concurrency=8)
+    for _ in range(8):
+        controller.acquire()
+        controller.release(status=200)
+    grown = controller.stats()['concurrency_limit']
+    assert 5 < grown <= 8
+
+    controller.acquire()
+    controller.release(status=429, retry_after=0)
+    assert controller.stats()['concurrency_limit'] == pytest.approx(grown / 2)
+    assert controller.stats()['throttled'] == 1
+    assert controller.current_rate() > 0
+
+    for _ in range(10):
+        controller.acquire()
+        controller.release(status=429, retry_after=0)
+    assert controller.stats()['concurrency_limit'] == 1
+
+
+def test_concurrency_cap_blocks_and_keys_are_independent():
+    controller = AdaptiveController(initial_concurrency=1, max_concurrency=1)
+    controller.acquire('key-a')
+    with pytest.raises(TimeoutError):
+        controller.acquire('key-a', timeout=0.05)
+    controller.acquire('key-b', timeout=0.05)
+
+    released = threading.Timer(0.05, lambda: controller.release('key-a', status=200))
+    released.start()
+    controller.acquire('key-a', timeout=2)
+    assert controller.stats('key-a')['in_flight'] == 1
+
+
+def test_retry_after_pauses_key():
+    controller = AdaptiveController(initial_concurrency=2)
+    controller.acquire()
+    controller.release(status=429, retry_after=0.2)
+    assert controller.stats()['paused_for'] > 0.1
+    start = time.monotonic()
+    controller.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        AdaptiveController(initial_concurrency=0)
+    with pytest.raises(ValueError):
+        AdaptiveController(decrease_factor=1.5)
+
+
+class Resp:
+    def __init__(self, status, text='', headers=None):
+        self.status_code = status
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"Status {self.status_code}")
+
+    def close(self):
+        pass
+
+
+def test_reader_api_waits_out_429(monkeypatch):
+    responses = [Resp(429, headers={'Retry-After': '0.05'}), Resp(200, text='done')]
+    seen_keys = []
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        seen_keys.append(headers.get('x-api-key'))
+        return responses.pop(0)
+
+    controller = AdaptiveController(initial_concurrency=2)
+    reader = demo.ReaderAPI(base_url='http://example.com', rate_controller=controller)
+    monkeypatch.setattr(reader.session, 'get', fake_get)
+
+    assert reader.get_text('https://example.org', headers={'x-api-key': 'k1'}) == 'done'
+    assert seen_keys == ['k1', 'k1']
+    stats = controller.stats('k1')
+    assert stats['throttled'] == 1 and stats['completed'] == 1
+    assert stats['in_flight'] == 0
+
+
+def test_reader_api_gives_up_after_max_throttle_retries(monkeypatch):
+    controller = AdaptiveController(max_throttle_retries=1)
+    reader = demo.ReaderAPI(base_url='http://example.com', rate_controller=controller)
+    monkeypatch.setattr(reader.session, 'get', lambda url, **kw: Resp(429, headers={'Retry-After': '0'}))
+
+    with pytest.raises(requests.HTTPError):
+        reader.get_text('https://example.org')
+    assert controller.stats()['throttled'] == 2
@@ -0,0 +1,141 @@
+import os
+import time
+
+import pytest
+import requests
+
+import demo
+from reader_cache import DiskCache, cache_directives, normalize_url
+
+
+def make_resp(status=200, text='', json_data=None):
+    class Resp:
+        def __init__(self):
+            self.status_code = status
+            self.text = text
+        def raise_for_status(self):
+            if self.status_code >= 400:
+                raise requests.HTTPError(f"Status {self.status_code}")
+        def json(self):
+            return json_data
+    return Resp()
+
+
+def test_normalize_url():
+    assert normalize_url(' HTTPS://Example.COM:443/Path?q=1#frag ') == 'https://example.com/Path?q=1'
+    assert normalize_url('http://example.com') == 'http://example.com/'
+
+
+def test_key_ignores_cache_control_and_credentials():
+    base = DiskCache.make_key('https://example.com/a', 'markdown', {'X-Target-Selector': 'main'})
+    assert base == DiskCache.make_key('https://EXAMPLE.com/a#top', 'markdown',
+                                      {'x-target-selector': 'main', 'x-no-cache': 'true', 'X-Api-Key': 'secret'})
+    assert base != DiskCache.make_key('https://example.com/a', 'html', {'X-Target-Selector': 'main'})
+    assert base != DiskCache.make_key('https://example.com/a', 'markdown', {'X-Target-Selector': 'article'})
+    assert base != DiskCache.make_key('https://example.com/a', 'markdown', {'X-Target-Selector': 'main'}, {'timeout': 5})
+
+
+def test_cache_directives():
+    assert cache_directives(None) == (False, None)
+    assert cache_directives({'X-No-Cache': 'true'}) == (True, 0.0)
+    assert cache_directives({'x-cache-tolerance': '30'}) == (False, 30.0)
+    assert cache_directives({'x-cache-tolerance': 'soon'}) == (False, None)
+    # Same rule as the server's Boolean(header): any non-empty value counts
+    assert cache_directives({'x-no-cache': 'false'}) == (True, 0.0)
+    assert cache_directives({'x-no-cache': 'on'})[0] is True
+    assert cache_directives({'x-no-cache': ''}) == (False, None)
+
+
+def test_set_get_and_ttl(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), ttl=60)
+    key = DiskCache.make_key('https://example.com', 'json')
+    cache.set(key, {'data': {'title': 'T'}})
+    assert cache.get(key) == {'data': {'title': 'T'}}
+    assert not [p for p in tmp_path.rglob('*.tmp')]
+
+    real_time = time.time
+    monkeypatch.setattr(time, 'time', lambda: real_time() + 30)
+    assert cache.get(key, max_age=10) is None
+    assert cache.get(key) is not None
+
+    monkeypatch.setattr(time, 'time', lambda: real_time() + 120)
+    assert cache.get(key) is None
+    assert cache.stats()['bytes'] == 0
+
+
+def test_lru_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=600)
+    keys = [DiskCache.make_key(f'https://example.com/{i}', 'text') for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        cache.set(key, 'x' * 100)
+        os.utime(cache._path(key), (1000 + i, time.time() - 100 + i))  # (last used, created)
+    # Touch the oldest entry so it becomes most recently used
+    assert cache.get(keys[0]) == 'x' * 100
+    cache.set(keys[3], 'y' * 200)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[3]) is not None
+    assert cache.stats()['bytes'] <= 600
+
+
+def test_eviction_trims_to_low_water_mark(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), max_bytes=20000)
+    walks = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, '_entries', lambda: walks.append(1) or entries())
+    for i in range(200):  # ~170 bytes each: the cache fills after ~120 writes
+        cache.set(DiskCache.make_key(f'https://example.com/{i}', 'text'), 'x' * 100)
+        assert cache.stats()['bytes'] <= 20000
+    # Each eviction frees 10% of the budget, so a full cache is not rescanned on every write
+    assert 1 <= len(walks) <= 10
+
+
+def test_evict_expires_by_creation_time_not_last_use(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), ttl=60)
+    key = DiskCache.make_key('https://example.com', 'text')
+    cache.set(key, 'hello')
+    real_time = time.time
+    monkeypatch.setattr(time, 'time', lambda: real_time() + 50)
+    assert cache.get(key) == 'hello'  # A read does not extend the TTL...
+    monkeypatch.setattr(time, 'time', lambda: real_time() + 70)
+    assert cache.evict() == 1  # ...for evict() either
+    assert cache.stats()['bytes'] == 0
+
+
+def test_size_survives_reopen(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.set(DiskCache.make_key('https://example.com', 'text'), 'hello')
+    assert DiskCache(str(tmp_path)).stats()['bytes'] == cache.stats()['bytes'] > 0
+
+
+def test_invalid_configuration(tmp_path):
+    with pytest.raises(ValueError):
+        DiskCache(str(tmp_path), ttl=0)
+    with pytest.raises(ValueError):
+        DiskCache(str(tmp_path), max_bytes=0)
+
+
+def test_reader_api_serves_hits_without_network(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(headers)
+        return make_resp(200, text=f'content {len(calls)}')
+
+    reader = demo.ReaderAPI(base_url='http://example.com', cache=DiskCache(str(tmp_path)))
+    monkeypatch.setattr(reader.session, 'get', fake_get)
+
+    assert reader.get_markdown('https://example.org') == 'content 1'
+    assert reader.get_markdown('https://example.org') == 'content 1'
+    assert len(calls) == 1
+    assert calls[0]['Accept'] == 'text/plain'
+
+    # x-no-cache refreshes the stored entry, and the header is still sent upstream
+    assert reader.get_markdown('https://example.org', headers={'x-no-cache': 'true'}) == 'content 2'
+    assert calls[1]['x-no-cache'] == 'true'
+    assert reader.get_markdown('https://example.org') == 'content 2'
+
+    # x-cache-tolerance of zero accepts no cached entry
+    assert reader.get_markdown('https://example.org', headers={'x-cache-tolerance': '0'}) == 'content 3'
+    assert len(calls) == 3
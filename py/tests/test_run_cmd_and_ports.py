@@ -1,3 +1,6 @@
+import os
+import sys
+
 import pytest
 import app
 
@@ -24,3 +27,103 @@ def test_ensure_port_available_delegates(monkeypatch):
     monkeypatch.setattr(app, 'handle_port_conflict', fake_handle)
     assert app.ensure_port_available(12345, 'svc') is True
     assert called['v']
+
+
+def python_cmd(code):
+    import sys
+    return [sys.executable, '-c', code]
+
+
+def test_run_cmd_drains_chatty_output_without_blocking():
+    # Far more than a pipe buffer on both streams; waiting before reading would deadlock
+    code = ("import sys\n"
+            "for i in range(20000):\n"
+            "    print('out', i); print('err', i, file=sys.stderr)\n")
+    rc, out, err = app.run_cmd(python_cmd(code), timeout=30, max_lines=100000)
+    assert rc == 0
+    assert out.count('\n') == 20000 and out.endswith('out 19999\n')
+    assert err.count('\n') == 20000 and err.endswith('err 19999\n')
+
+
+def test_run_cmd_keeps_last_lines_tees_and_calls_back(tmp_path, capsys):
+    log = tmp_path / 'cmd.log'
+    seen = []
+    code = "import sys\nfor i in range(10): print(i)\nprint('boom', file=sys.stderr)\nsys.exit(2)"
+    rc, out, err = app.run_cmd(python_cmd(code), max_lines=3, log_file=str(log), echo=True,
+                               on_line=lambda stream, line: seen.append((stream, line.strip())))
+    assert rc == 2
+    assert out == '[... 7 earlier lines dropped ...]\n7\n8\n9\n'
+    assert err == 'boom\n'
+    assert ('stderr', 'boom') in seen and len(seen) == 11
+    assert sorted(log.read_text().splitlines()) == sorted([str(i) for i in range(10)] + ['boom'])
+    captured = capsys.readouterr()
+    assert '9\n' in captured.out and 'boom' in captured.err
+
+
+def test_run_cmd_timeout_returns_partial_output():
+    import time
+    code = "import time\nprint('started', flush=True)\ntime.sleep(30)"
+    start = time.monotonic()
+    rc, out, _ = app.run_cmd(python_cmd(code), timeout=1)
+    assert rc == 124 and out == 'started\n'
+    assert time.monotonic() - start < 10
+
+
+def test_wait_for_returns_as_soon_as_condition_holds():
+    import time
+    calls = []
+
+    def condition():
+        calls.append(time.monotonic())
+        return len(calls) == 4
+
+    start = time.monotonic()
+    assert app.wait_for(condition, timeout=5, interval=0.01)
+    assert time.monotonic() - start < 1
+    assert not app.wait_for(lambda: False, timeout=0.2, interval=0.01)
+
+
+def test_is_ready_follows_readiness_endpoint():
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    state = {'ready': False}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200 if state['ready'] else 503)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/health/ready"
+    try:
+        assert not app.is_ready(url)
+        threading.Timer(0.3, state.update, kwargs={'ready': True}).start()
+        assert app.wait_until_ready(url, timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not app.is_ready(url)  # Nothing listening any more
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='process groups')
+def test_terminate_process_group_returns_once_processes_exit():
+    import subprocess
+    import time
+    proc = subprocess.Popen(python_cmd('import time; time.sleep(30)'), preexec_fn=os.setsid)
+    start = time.monotonic()
+    app._terminate_process_group(proc)
+    assert proc.poll() is not None
+    assert time.monotonic() - start < 1  # No fixed sleep before SIGKILL
+
+
+def test_wait_for_port_release(monkeypatch):
+    states = iter([False, False, True])
+    monkeypatch.setattr(app, 'check_port_available', lambda port: next(states))
+    assert app.wait_for_port_release(12345, timeout=5)
+    monkeypatch.setattr(app, 'check_port_available', lambda port: False)
+    assert not app.wait_for_port_release(12345, timeout=0.2)
@@ -0,0 +1,368 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+import speedtest
+from latency import LatencyHistogram
+
+
+def make_stream_resp(chunks, status=200):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.iter_content.return_value = iter(chunks)
+    if status >= 400:
+        resp.raise_for_status.side_effect = requests.HTTPError(f"Status {status}")
+    return resp
+
+
+def test_test_url_counts_bytes_without_decoding():
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    resp = make_stream_resp([b'caf\xc3\xa9', b'!'])
+    tester.session.get = MagicMock(return_value=resp)
+
+    result = tester.test_url('https://example.com', 'markdown')
+
+    assert result['success'] is True
+    assert result['content_length'] == 6
+    assert tester.session.get.call_args[1]['stream'] is True
+    resp.close.assert_called_once()
+
+
+
+def test_test_url_uses_configured_timeout():
+    tester = speedtest.SpeedTester(base_url='http://reader.local', timeout=7.5)
+    tester.session.get = MagicMock(return_value=make_stream_resp([b'ok']))
+
+    tester.test_url('https://example.com', 'markdown')
+
+    assert tester.session.get.call_args[1]['timeout'] == 7.5
+
+
+def test_remounting_closes_replaced_adapter():
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    first = tester.session.adapters['http://']
+    first.close = MagicMock()
+
+    tester._mount(speedtest.TimedAdapter(pool_connections=4, pool_maxsize=4))
+
+    first.close.assert_called_once()
+    assert tester.session.adapters['http://'] is tester.session.adapters['https://']
+    assert tester.session.adapters['http://'] is not first
+
+def test_test_url_failure():
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    tester.session.get = MagicMock(return_value=make_stream_resp([], status=500))
+
+    result = tester.test_url('https://example.com', 'json')
+
+    assert result['success'] is False
+    assert 'Status 500' in result['error']
+
+
+def make_slow_test_url(delay, calls):
+    def fake_test_url(url, format_type='json'):
+        calls.append((url, format_type))
+        time.sleep(delay)
+        if 'throttled' in url:
+            return {'success': False, 'response_time': delay, 'status_code': 429, 'error': '429',
+                    'url': url, 'format': format_type}
+        return {'success': True, 'response_time': delay, 'status_code': 200, 'content_length': 1,
+                'url': url, 'format': format_type}
+    return fake_test_url
+
+
+def test_open_loop_arrivals_do_not_wait_for_slow_responses():
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    calls = []
+    # Each response takes longer than the whole run, yet arrivals stay on schedule
+    tester.test_url = make_slow_test_url(0.5, calls)
+
+    report = tester.run_load_test(['https://a.test', 'https://throttled.test'], rate=50, duration=0.3)
+
+    assert report['mode'] == 'open'
+    assert 13 <= report['issued'] <= 16
+    assert report['completed'] == report['issued']
+    assert report['peak_in_flight'] >= 10
+    assert report['achieved_rps'] == 0  # Nothing completed inside the window
+    assert report['status_codes']['429'] >= 6
+    assert report['latency']['p50'] >= 0.5
+    assert report['drain_time'] > 0
+
+
+def test_closed_loop_limits_concurrency_to_users():
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    calls = []
+    tester.test_url = make_slow_test_url(0.05, calls)
+
+    report = tester.run_load_test(['https://a.test'], formats=('json', 'html'), users=2, duration=0.3)
+
+    assert report['mode'] == 'closed'
+    assert report['peak_in_flight'] <= 2
+    assert report['issued'] == report['completed'] == len(calls)
+    assert 8 <= report['completed'] <= 14
+    assert {fmt for _, fmt in calls} == {'json', 'html'}
+    assert report['achieved_rps'] > 20
+
+
+def test_load_test_argument_validation():
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    with pytest.raises(ValueError):
+        tester.run_load_test(['https://a.test'])
+    with pytest.raises(ValueError):
+        tester.run_load_test(['https://a.test'], rate=1, users=1)
+    with pytest.raises(ValueError):
+        tester.run_load_test(['https://a.test'], rate=0)
+
+
+def test_report_uses_per_request_latencies(monkeypatch):
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    times = iter([0.1, 0.2, 0.9, 1.0, 1.0, 1.0])
+
+    def fake_test_url(url, format_type='json'):
+        return {'success': True, 'response_time': next(times), 'url': url, 'format': format_type}
+
+    tester.test_url = fake_test_url
+    report = tester.run_speed_test(['https://a.test', 'https://b.test'], iterations=1)
+
+    summary = report['summary']
+    assert summary['total_requests'] == 6
+    assert summary['min_response_time'] == pytest.approx(0.1)
+    assert summary['max_response_time'] == pytest.approx(1.0)
+    assert summary['median_response_time'] == pytest.approx(0.9, rel=1e-3)
+    assert summary['percentiles']['p99.9'] == pytest.approx(1.0)
+    assert report['format_breakdown']['markdown']['percentiles']['p50'] == pytest.approx(0.2, rel=1e-3)
+    assert report['url_results'][1]['formats'][0]['percentiles']['p50'] == pytest.approx(1.0, rel=1e-3)
+    assert report['histograms']['overall']['count'] == 6
+    assert set(report['histograms']['urls']) == {'https://a.test', 'https://b.test'}
+
+
+def test_save_report_round_trips(tmp_path):
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    tester.test_url = lambda url, format_type='json': {'success': True, 'response_time': 0.25,
+                                                       'url': url, 'format': format_type}
+    report = tester.run_speed_test(['https://a.test'], iterations=2)
+    path = tmp_path / 'run.json'
+    speedtest.save_report(report, str(path))
+    saved = json.loads(path.read_text())
+    assert saved['summary']['percentiles']['p50'] == pytest.approx(0.25)
+    assert LatencyHistogram.from_dict(saved['histograms']['overall']).count == 6
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Waits before the headers and between two body chunks"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(0.1)
+        self.send_response(200)
+        self.send_header('Content-Length', '10')
+        self.end_headers()
+        self.wfile.write(b'01234')
+        self.wfile.flush()
+        time.sleep(0.1)
+        self.wfile.write(b'56789')
+
+    def log_message(self, *args):
+        pass
+
+
+def test_test_url_times_each_phase_on_a_real_connection():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        tester = speedtest.SpeedTester(base_url=f'http://127.0.0.1:{server.server_port}')
+        first = tester.test_url('https://example.com', 'markdown')
+        second = tester.test_url('https://example.com', 'markdown')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert first['success'] and first['content_length'] == 10
+    phases = first['phases']
+    assert phases['connect'] > 0
+    assert phases['ttfb'] >= 0.1 > phases['connect']
+    assert phases['download'] >= 0.09
+    assert first['response_time'] == pytest.approx(phases['ttfb'] + phases['download'], abs=1e-3)
+    assert second['phases']['connect'] == 0  # Keep-alive connection reused
+
+
+def test_report_aggregates_phases_per_format():
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+
+    def fake_test_url(url, format_type='json'):
+        download = 0.5 if format_type == 'markdown' else 0.01
+        return {'success': True, 'response_time': 0.2 + download, 'url': url, 'format': format_type,
+                'phases': {'connect': 0.01, 'ttfb': 0.2, 'download': download}}
+
+    tester.test_url = fake_test_url
+    report = tester.run_speed_test(['https://a.test'], iterations=2)
+    breakdown = report['phase_breakdown']
+    assert breakdown['overall']['ttfb']['count'] == 6
+    assert breakdown['formats']['markdown']['download']['p50'] == pytest.approx(0.5, rel=1e-3)
+    assert breakdown['formats']['json']['download']['p99'] == pytest.approx(0.01, rel=1e-3)
+    speedtest.print_report(report)
+
+
+def test_check_history_gates_on_regression(tmp_path, capsys):
+    args = speedtest.argparse.Namespace(
+        load=True, cache=False, capacity=None, soak=None, matrix=False, warmup=0.0, base_url='http://reader.local', corpus='small', no_pdfs=False, formats=['markdown'],
+        iterations=1, rate=10.0, users=None, duration=5.0, poisson=False,
+        history=str(tmp_path / 'history.jsonl'), baseline_runs=10, tolerance=0.10, no_gate=False,
+        accept=False)
+
+    def report(p99):
+        return {'achieved_rps': 10.0, 'success_rate': 100.0,
+                'latency': {'p50': 0.1, 'p90': 0.2, 'p99': p99}}
+
+    for _ in range(3):
+        assert speedtest.check_history(report(0.5), args, []) == 0
+    assert speedtest.check_history(report(2.0), args, []) == speedtest.REGRESSION_EXIT_CODE
+    assert 'latency_p99' in capsys.readouterr().out
+
+    args.no_gate = True
+    assert speedtest.check_history(report(2.0), args, []) == 0
+    args.no_gate = False
+
+    # Accepting the slower level makes it the baseline from then on
+    args.accept = True
+    assert speedtest.check_history(report(2.0), args, []) == 0
+    args.accept = False
+    for _ in range(3):
+        assert speedtest.check_history(report(2.0), args, []) == 0
+    assert speedtest.check_history(report(4.0), args, []) == speedtest.REGRESSION_EXIT_CODE
+
+
+def test_zipf_mix_skews_towards_popular_urls():
+    urls = [f'https://{n}.test' for n in range(10)]
+    mix = speedtest.zipf_mix(urls, 2000, skew=1.2)
+    assert mix.count(urls[0]) > 5 * mix.count(urls[9])
+    uniform = speedtest.zipf_mix(urls, 2000, skew=0)
+    assert max(uniform.count(u) for u in urls) < 2 * min(uniform.count(u) for u in urls)
+
+
+def test_cache_test_classifies_hits_and_misses(capsys):
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    stats = {'hits': 0, 'misses': 0, 'keys': 0, 'vsize': 0, 'enabled': True}
+    cached = set()
+
+    def fake_test_url(url, format_type='json'):
+        hit = (url, format_type) in cached
+        stats['hits' if hit else 'misses'] += 1
+        cached.add((url, format_type))
+        return {'success': True, 'response_time': 0.01 if hit else 0.5, 'status_code': 200,
+                'url': url, 'format': format_type}
+
+    tester.test_url = fake_test_url
+    tester.cache_stats = lambda: dict(stats)
+    tester.session.post = MagicMock(return_value=MagicMock(ok=True))
+    urls = [f'https://{n}.test' for n in range(4)]
+
+    report = tester.run_cache_test(urls, warm_passes=2, pass_size=10)
+
+    tester.session.post.assert_called_once_with('http://reader.local/cache/clear', timeout=10)
+    assert report['passes']['cold'] == {**report['passes']['cold'], 'hits': 0, 'misses': 4, 'hit_ratio': 0.0}
+    assert report['warm_hit_ratio'] == 1.0 and report['total_requests'] == 24
+    assert report['latency']['hit']['p50'] == pytest.approx(0.01, rel=0.01)
+    assert report['latency']['miss']['p50'] == pytest.approx(0.5, rel=0.01)
+    speedtest.print_cache_report(report)
+    assert 'faster than a miss' in capsys.readouterr().out
+
+
+
+def test_cache_test_separates_unchanged_counters_from_unavailable_stats(capsys):
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    tester.test_url = lambda url, format_type='json': {'success': True, 'response_time': 0.1, 'status_code': 200,
+                                                       'url': url, 'format': format_type}
+    tester.session.post = MagicMock(return_value=MagicMock(ok=True))
+    urls = ['https://a.test', 'https://b.test']
+
+    tester.cache_stats = lambda: {'hits': 0, 'misses': 0, 'keys': 0, 'vsize': 0, 'enabled': True}
+    report = tester.run_cache_test(urls, warm_passes=1, pass_size=2)
+    assert report['counters_unchanged'] == 4 and report['stats_unavailable'] == 0
+    speedtest.print_cache_report(report)
+    out = capsys.readouterr().out
+    assert 'counters unchanged' in out and 'unavailable' not in out
+    assert 'No cache hits on warm passes' in out
+
+    tester.cache_stats = lambda: None
+    report = tester.run_cache_test(urls, warm_passes=1, pass_size=2)
+    assert report['stats_unavailable'] == 4 and report['counters_unchanged'] == 0
+    speedtest.print_cache_report(report)
+    out = capsys.readouterr().out
+    assert '/cache/stats unavailable' in out and 'No cache hits' not in out
+
+def test_warmup_is_left_out_of_the_load_report():
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    calls = []
+    tester.test_url = make_slow_test_url(0.01, calls)
+
+    report = tester.run_load_test(['https://a.test'], rate=50, duration=0.2, warmup=0.2)
+
+    assert len(calls) >= 18
+    assert 8 <= report['issued'] <= 12 and report['completed'] == report['issued']
+
+
+def make_capacity_test_url(capacity):
+    """Latency grows and 429s appear once the offered load exceeds ``capacity`` req/s"""
+    state = {'level': 0}
+
+    def fake_test_url(url, format_type='json'):
+        if state['level'] > capacity:
+            return {'success': False, 'response_time': 0.001, 'status_code': 429, 'error': '429',
+                    'url': url, 'format': format_type}
+        time.sleep(0.005)
+        return {'success': True, 'response_time': 0.005, 'status_code': 200, 'url': url,
+                'format': format_type}
+    return fake_test_url, state
+
+
+def test_capacity_search_stops_at_the_knee(monkeypatch, capsys):
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    fake, state = make_capacity_test_url(capacity=30)
+    tester.test_url = fake
+    run_load_test = tester.run_load_test
+
+    def tracking_load_test(*args, **kwargs):
+        state['level'] = kwargs['rate']
+        return run_load_test(*args, **kwargs)
+
+    monkeypatch.setattr(tester, 'run_load_test', tracking_load_test)
+    report = tester.run_capacity_search(['https://a.test'], start=10, step=10, max_level=100,
+                                        step_duration=0.3, warmup=0.05, slo_p99=1.0)
+
+    assert [row['level'] for row in report['ramp']] == [10, 20, 30, 40]
+    assert report['max_passing']['level'] == 30
+    assert report['knee']['level'] == 40
+    assert any('429' in reason for reason in report['knee']['reasons'])
+    assert report['max_sustainable_rps'] > 20
+    speedtest.print_capacity_report(report)
+    assert 'Highest passing level: 30 req/s' in capsys.readouterr().out
+
+
+def test_capacity_step_judges_slo_and_throughput():
+    report = {'completed': 100, 'successful_requests': 100, 'failed_requests': 0, 'status_codes': {'200': 100},
+              'offered_rps': 10.0, 'achieved_rps': 8.0, 'latency': {'p50': 0.5, 'p99': 3.0}}
+    row = speedtest._capacity_step(10, 'rate', report, slo_p99=2.0, max_error_rate=0.01,
+                                   max_throttled_rate=0.01)
+    assert not row['passed'] and len(row['reasons']) == 2
+    assert speedtest._capacity_step(10, 'users', report, slo_p99=5.0, max_error_rate=0.01,
+                                    max_throttled_rate=0.01)['passed']
+
+
+def test_test_url_sends_route_prefix_and_option_headers():
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    tester.session.get = MagicMock(return_value=make_stream_resp([b'x']))
+
+    tester.test_url('https://example.com/a', 'markdown', prefix='task/default_pdf/',
+                    extra_headers={'x-target-selector': 'main'})
+
+    url = tester.session.get.call_args.args[0]
+    headers = tester.session.get.call_args.kwargs['headers']
+    assert url.startswith('http://reader.local/task/default_pdf/https://example.com')
+    assert headers == {'Accept': 'text/plain', 'x-target-selector': 'main'}
@@ -0,0 +1,64 @@
+import json
+import sys
+
+import app
+from step_profiler import StepProfiler
+
+# Parent that keeps a child alive and burns some CPU
+TREE = ("import subprocess, sys, time\n"
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(0.8)'])\n"
+        "end = time.time() + 0.6\n"
+        "while time.time() < end: pass\n"
+        "child.wait()\n")
+
+
+def test_pipeline_steps_are_profiled(monkeypatch, tmp_path):
+    profiler = StepProfiler(interval=0.05)
+    monkeypatch.setattr(app, 'PROFILER', profiler)
+    profiler.start()
+    try:
+        results = app.run_pipeline({
+            'busy': lambda: app.run_cmd([sys.executable, '-c', TREE], timeout=30)[0],
+            'fails': lambda: app.run_cmd([sys.executable, '-c', 'raise SystemExit(3)'], timeout=30)[0],
+            'python only': lambda: 0,
+        }, force=True, jobs=2)
+    finally:
+        profiler.stop()
+
+    assert results == {'busy': 0, 'fails': 3, 'python only': 0}
+    steps = {step['name']: step for step in profiler.summary()['steps']}
+    busy = steps['busy']
+    assert busy['returncode'] == 0 and busy['wall_s'] >= 0.8
+    assert busy['max_processes'] == 2 and busy['peak_rss_mb'] > 1
+    assert busy['children_cpu_s'] > 0.2
+    assert busy['commands'][0]['cmd'].startswith(sys.executable) and busy['commands'][0]['returncode'] == 0
+    assert steps['fails']['returncode'] == 3 and steps['fails']['commands'][0]['returncode'] == 3
+    assert steps['python only']['commands'] == []
+
+    paths = profiler.write(str(tmp_path / 'profile'))
+    summary = json.loads(open(paths['summary']).read())
+    assert {step['name'] for step in summary['steps']} == set(results)
+    trace = json.loads(open(paths['trace']).read())['traceEvents']
+    spans = [e for e in trace if e['ph'] == 'X']
+    step_span = next(e for e in spans if e['name'] == 'busy')
+    command_span = next(e for e in spans if e['cat'] == 'command' and e['tid'] == step_span['tid'])
+    assert step_span['ts'] <= command_span['ts']
+    assert command_span['ts'] + command_span['dur'] <= step_span['ts'] + step_span['dur']
+    assert any(e['ph'] == 'C' and e['name'] == 'busy resources' for e in trace)
+    assert {e['args']['name'] for e in trace if e['name'] == 'thread_name'} == set(results)
+
+
+def test_commands_outside_steps_are_ignored():
+    profiler = StepProfiler()
+    profiler.track(123, ['echo'])
+    profiler.finish(0)
+    assert profiler.summary()['steps'] == []
+
+
+def test_print_profile(capsys):
+    profiler = StepProfiler()
+    with profiler.step('pyright') as record:
+        record['returncode'] = 0
+    app.print_profile(profiler.summary())
+    out = capsys.readouterr().out
+    assert 'Step Profile' in out and 'pyright' in out and 'Pipeline wall time' in out
@@ -0,0 +1,149 @@
+import csv
+import json
+import os
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import speedtest
+from telemetry import TelemetrySampler, growth_trend, kendall_tau, pearson, write_csv
+
+
+class StatsHandler(BaseHTTPRequestHandler):
+    state = {'active': 2, 'hits': 0, 'misses': 0}
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/queue':
+            body, status = {'active_requests': self.state['active'], 'pending_requests': 1,
+                            'total_requests': 10, 'memory_usage': {'rss': 2 ** 20 * 100, 'heapUsed': 2 ** 20 * 40}}, 200
+        elif path == '/cache/stats':
+            body, status = {'keys': 3, 'hits': self.state['hits'], 'misses': self.state['misses']}, 200
+        elif path == '/rate-limit/stats':
+            body, status = {'key:openai': {'requests_this_minute': 4}}, 200
+        elif path == '/health':
+            body, status = {'status': 'unhealthy'}, 503
+        else:
+            body, status = {}, 404
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stats_server():
+    StatsHandler.state = {'active': 2, 'hits': 0, 'misses': 0}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StatsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_sample_reads_endpoints_and_process_tree(stats_server):
+    sampler = TelemetrySampler(stats_server, server_pid=os.getpid(), api_key='key')
+    first = sampler.sample()
+    assert first['queue_depth'] == 3 and first['health'] == 'unhealthy'
+    assert first['rate_limit_minute'] == 4
+    assert 'cache_hit_rate' not in first  # Needs a previous sample
+    assert first['rss_mb'] > 0 and first['processes'] >= 1 and first['open_fds'] > 0
+    assert first['node_rss_mb'] == 100 and first['heap_used_mb'] == 40 and first['total_requests'] == 10
+
+    StatsHandler.state.update(hits=3, misses=1)
+    assert sampler.sample()['cache_hit_rate'] == 0.75
+
+
+def test_unreachable_server_still_samples():
+    sampler = TelemetrySampler('http://127.0.0.1:9', interval=0.2, server_pid=-1)
+    sample = sampler.sample()
+    assert sample['health'] == 'unreachable' and 'queue_depth' not in sample and 'rss_mb' not in sample
+
+
+def test_correlate_finds_spikes_and_queue_correlation():
+    sampler = TelemetrySampler('http://reader.local', interval=1.0, server_pid=-1)
+    records = []
+    for second, (depth, latency) in enumerate([(1, 0.1), (2, 0.1), (1, 0.1), (8, 0.9), (2, 0.1)]):
+        sampler.samples.append({'t': second + 0.1, 'queue_depth': depth})
+        records += [{'success': True, 'started_at': second + 0.5, 'latency': latency}] * 5
+    records.append({'success': False, 'started_at': 0.5, 'latency': 9.0})
+
+    result = sampler.correlate(records)
+    assert len(result['windows']) == 5
+    assert result['correlations']['queue_depth'] > 0.9
+    assert result['correlations']['browser_rss_mb'] is None
+    assert [spike['t'] for spike in result['spikes']] == [3.0]
+    assert result['spikes'][0]['queue_depth'] == 8
+
+
+def test_pearson_edge_cases():
+    assert pearson([1, 2], [1, 2]) is None
+    assert pearson([1, 1, 1], [1, 2, 3]) is None
+    assert pearson([1, 2, 3], [3, 2, 1]) == pytest.approx(-1.0)
+
+
+def test_load_test_attaches_telemetry(stats_server, capsys):
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    tester.test_url = lambda url, format_type='json': {
+        'success': True, 'response_time': 0.01, 'status_code': 200, 'url': url, 'format': format_type}
+    sampler = TelemetrySampler(stats_server, interval=0.1, server_pid=-1)
+
+    report = tester.run_load_test(['https://a.test'], rate=20, duration=0.3, telemetry=sampler)
+
+    telemetry = report['telemetry']
+    assert len(telemetry['samples']) >= 3
+    assert all(0 <= s['t'] < 1.0 for s in telemetry['samples'])
+    assert telemetry['windows']
+    speedtest.print_load_report(report)
+    assert 'SERVER TELEMETRY' in capsys.readouterr().out
+
+
+def test_growth_trend_flags_leaks_but_not_sawtooth_or_noise():
+    rng = random.Random(1)
+    ts = [i * 10.0 for i in range(360)]
+    leak = [500 + i * 0.5 + rng.uniform(-20, 20) for i in range(360)]
+    sawtooth = [500 + (i % 30) * 5 for i in range(360)]  # Cleanup every 5 minutes
+    noise = [500 + rng.uniform(-50, 50) for _ in range(360)]
+
+    trend = growth_trend(ts, leak)
+    assert trend['growing'] and trend['slope_per_hour'] == pytest.approx(180, rel=0.1)
+    assert not growth_trend(ts, sawtooth)['growing']
+    assert not growth_trend(ts, noise)['growing']
+    assert growth_trend(ts[:40], [i // 4 for i in range(40)])['growing']  # Zero baseline
+    assert kendall_tau([1, 2, 3]) == 1.0 and kendall_tau([3, 2, 1]) == -1.0
+
+
+def test_write_csv_keeps_numeric_fields(tmp_path):
+    path = tmp_path / 'series.csv'
+    write_csv([{'t': 0.0, 'rss_mb': 1.23456, 'health': 'healthy'}, {'t': 10.0, 'open_fds': 7}], str(path))
+    rows = list(csv.reader(path.open()))
+    assert rows == [['t', 'open_fds', 'rss_mb'], ['0.0', '', '1.235'], ['10.0', '7', '']]
+
+
+def test_soak_test_runs_segments_and_reports_trends(stats_server, capsys):
+    tester = speedtest.SpeedTester(base_url='http://reader.local')
+    tester.test_url = lambda url, format_type='json': {
+        'success': True, 'response_time': 0.01, 'status_code': 200, 'url': url, 'format': format_type}
+
+    class GrowingSampler(TelemetrySampler):
+        def sample(self):
+            StatsHandler.state['active'] += 1  # Requests that never finish
+            return super().sample()
+
+    sampler = GrowingSampler(stats_server, interval=0.05, server_pid=-1)
+    report = tester.run_soak_test(['https://a.test'], rate=20, hours=0.9 / 3600, segment=0.3,
+                                  sampler=sampler)
+
+    assert len(report['segments']) == 3 and report['success_rate'] == 100
+    assert len(report['samples']) >= 10
+    assert 'active_requests' in report['leaks'] and 'latency_p99' in report['trends']
+    speedtest.print_soak_report(report)
+    assert 'POSSIBLE LEAKS: active requests' in capsys.readouterr().out
@@ -0,0 +1,128 @@
+import pytest
+
+import bulk
+import demo
+from urlindex import BloomFilter, ScalableBloomFilter, UrlIndex, canonicalize_url, dedupe
+
+
+@pytest.mark.parametrize('url,expected', [
+    ('HTTPS://Example.COM:443/a/', 'https://example.com/a'),
+    ('http://example.com:8080//a//b', 'http://example.com:8080/a/b'),
+    ('https://example.com', 'https://example.com/'),
+    ('https://example.com/p?b=2&utm_source=x&a=1&fbclid=y', 'https://example.com/p?a=1&b=2'),
+    ('https://example.com/p#section', 'https://example.com/p'),
+    ('https://example.com/app#/route', 'https://example.com/app#/route'),
+    ('https://example.com/a%2fb', 'https://example.com/a%2Fb'),
+    ('https://example.com/CaseSensitive', 'https://example.com/CaseSensitive'),
+    ('https://bücher.example/', 'https://xn--bcher-kva.example/'),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_bloom_filter_add_contains_and_persist(tmp_path):
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    assert bloom.add('https://a.test/')
+    assert not bloom.add('https://a.test/')
+    assert 'https://a.test/' in bloom
+    assert 'https://b.test/' not in bloom
+
+    path = tmp_path / 'seen.bloom'
+    bloom.save(str(path))
+    loaded = BloomFilter.load(str(path))
+    assert 'https://a.test/' in loaded
+    assert loaded.count == 1
+    assert loaded.num_bits == bloom.num_bits
+    assert loaded.capacity == pytest.approx(1000, rel=0.1)
+
+    path.write_bytes(b'garbage' * 10)
+    with pytest.raises(ValueError):
+        BloomFilter.load(str(path))
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f'https://example.com/{i}')
+    false_positives = sum(f'https://other.test/{i}' in bloom for i in range(5000))
+    assert false_positives / 5000 < 0.03
+    assert not bloom.saturated
+
+
+
+def test_unparseable_urls_pass_through():
+    assert canonicalize_url(' http://example.com:99999/x ') == 'http://example.com:99999/x'
+    assert canonicalize_url('http://[::1/x') == 'http://[::1/x'
+    index = UrlIndex(capacity=100)
+    urls = ['http://example.com:99999/x', 'http://example.com:99999/x', 'https://a.test']
+    assert list(dedupe(urls, index)) == ['http://example.com:99999/x', 'https://a.test']
+
+
+def test_scalable_bloom_filter_grows_with_its_input():
+    bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.01)
+    added = sum(bloom.add(f'https://example.com/{i}') for i in range(2000))
+    assert len(bloom.filters) > 1 and bloom.filters[0].capacity == 100
+    assert added == len(bloom) > 1950
+    assert 'https://example.com/0' in bloom and not bloom.add('https://example.com/1999')
+
+def test_url_index_dedupe_and_reload(tmp_path):
+    path = str(tmp_path / 'seen.bloom')
+    index = UrlIndex(path, capacity=1000)
+    urls = ['https://a.test/x?utm_source=feed', 'https://A.test/x', 'https://a.test/y']
+    assert list(dedupe(urls, index)) == ['https://a.test/x?utm_source=feed', 'https://a.test/y']
+    assert len(index) == 0  # Dispatching alone does not mark URLs as fetched
+    assert index.mark_done('https://a.test/x?utm_source=feed')
+    assert index.mark_done('https://a.test/y')
+    assert not index.mark_done('https://a.test/y/')
+    assert list(dedupe(urls, index)) == []
+    index.save()
+
+    reloaded = UrlIndex(path)
+    assert 'https://a.test/x#top' in reloaded
+    assert len(reloaded) == 2
+    with pytest.raises(ValueError):
+        UrlIndex(capacity=10).save()
+
+
+def test_map_skips_duplicates_and_requests_original_urls(monkeypatch):
+    reader = demo.ReaderAPI(base_url='http://reader.test')
+    requested = []
+
+    def get_format(url, fmt, **params):
+        requested.append(url)
+        if 'bad' in url:
+            raise ValueError('boom')
+        return url
+
+    monkeypatch.setattr(reader, 'get_format', get_format)
+
+    index = UrlIndex(capacity=100)
+    urls = ['https://a.test/?gclid=1', 'https://a.test', 'https://b.test/?foo', 'https://bad.test/']
+    results = dict(reader.map(urls, 'markdown', workers=2, index=index))
+    assert sorted(results) == ['https://a.test/?gclid=1', 'https://b.test/?foo', 'https://bad.test/']
+    assert sorted(requested) == ['https://a.test/?gclid=1', 'https://b.test/?foo', 'https://bad.test/']
+    assert 'https://b.test/?foo' in index
+    assert 'https://bad.test/' not in index
+
+    # A later run retries the failure only
+    requested.clear()
+    list(reader.map(urls, 'markdown', workers=2, index=index))
+    assert requested == ['https://bad.test/']
+
+
+def test_run_bulk_with_index_skips_known_and_keeps_failures_retryable(tmp_path):
+    class Reader:
+        def map(self, urls, response_format, workers=4):
+            for url in urls:
+                yield url, ValueError('boom') if 'bad' in url else url
+
+    index = UrlIndex(capacity=100)
+    index.check_and_add('https://done.test/')
+    journal = bulk.CheckpointJournal(str(tmp_path / 'out.checkpoint'))
+    urls = ['https://done.test', 'https://a.test/#x', 'https://a.test', 'https://bad.test']
+    counts = bulk.run_bulk(Reader(), urls, str(tmp_path / 'out.jsonl'), journal, index=index)
+    journal.close()
+
+    assert counts == {'succeeded': 1, 'failed': 1, 'skipped': 0, 'duplicates': 2}
+    assert 'https://a.test' in index
+    assert 'https://bad.test' not in index
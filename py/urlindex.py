@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+URL canonicalization and a compact seen-URL index for batch extraction.
+
+URL feeds are full of near-duplicates (tracking parameters, fragments, trailing
+slashes, mixed-case hosts) that would each cost a full browser render. The
+batch modes of ``ReaderAPI`` can consult a ``UrlIndex`` before dispatching so
+every canonical URL is crawled once. The canonical form is only the dedup key;
+the URL as given is what gets requested, and a URL is only added to the index
+once it was fetched successfully, so failures stay retryable.
+
+``canonicalize_url`` only rewrites parts of a URL that cannot change the page:
+scheme and host case, default ports, fragments (except ``#/`` SPA routes, which
+the server keeps too), known tracking parameters, query parameter order and
+percent-escape case. Path case is preserved because paths are case-sensitive,
+even though the server's response cache key lowercases the whole URL.
+
+``UrlIndex`` is backed by a Bloom filter, so memory is fixed by its capacity
+and error rate (about 1.8 MB per million URLs at 0.1%) no matter how many URLs
+pass through it. A false positive means a URL is wrongly treated as seen and
+skipped, with probability ``error_rate`` while the index is below capacity.
+"""
+
+import hashlib
+import math
+import os
+import re
+import struct
+import tempfile
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only carry analytics/attribution data
+TRACKING_PARAMS = frozenset([
+    'fbclid', 'gclid', 'gclsrc', 'dclid', 'msclkid', 'yclid', 'twclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'oly_anon_id',
+    'oly_enc_id', 'vero_id', 'wickedid', 'ref_src',
+])
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Starting size of the per-run duplicate filter in ``dedupe``; it grows with the batch
+RUN_FILTER_CAPACITY = 65_536
+
+_PERCENT_ESCAPE = re.compile(r'%[0-9a-fA-F]{2}')
+
+
+def _is_tracking_param(name: str) -> bool:
+    lowered = name.lower()
+    return lowered in TRACKING_PARAMS or lowered.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """Return the canonical form of ``url`` used for deduplication
+
+    URLs that cannot be parsed (an out-of-range port, a broken IPv6 literal)
+    are returned stripped but otherwise unchanged.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or '').rstrip('.')
+    try:
+        host = host.encode('idna').decode('ascii')
+    except UnicodeError:
+        pass
+    host = host.lower()
+    netloc = host
+    if ':' in host:
+        netloc = f"[{host}]"  # IPv6 literal
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else '')
+        netloc = f"{userinfo}@{netloc}"
+
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+    path = _PERCENT_ESCAPE.sub(lambda m: m.group(0).upper(), path)
+
+    query_pairs = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not _is_tracking_param(k)]
+    query = urlencode(sorted(query_pairs))
+
+    fragment = parts.fragment if parts.fragment.startswith('/') else ''
+    return urlunsplit((scheme, netloc, path, query, fragment))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a BLAKE2b digest"""
+
+    MAGIC = b'DRBF1'
+    HEADER = struct.Struct('<5sQIQ')  # magic, bit count, hash count, item count
+
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 0.001):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        h2 |= 1  # Odd step so positions do not collapse
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add ``item``; return True if it was (probably) not present before"""
+        added = False
+        for p in self._positions(item):
+            byte, mask = p >> 3, 1 << (p & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    @property
+    def saturated(self) -> bool:
+        """True once more items than ``capacity`` were added (error rate degrades)"""
+        return self.count > self.capacity
+
+    def save(self, path: str) -> None:
+        """Persist the filter atomically"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.num_bits, self.num_hashes, self.count))
+                f.write(self.bits)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'BloomFilter':
+        """Load a filter written by ``save``"""
+        with open(path, 'rb') as f:
+            magic, num_bits, num_hashes, count = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != cls.MAGIC:
+                raise ValueError(f"{path} is not a URL index file")
+            bits = bytearray(f.read())
+        if len(bits) != (num_bits + 7) // 8:
+            raise ValueError(f"{path} is truncated")
+        bloom = cls.__new__(cls)
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom.bits = bits
+        bloom.count = count
+        # Recover the nominal sizing from the stored geometry
+        bloom.capacity = max(1, int(round(num_bits * math.log(2) / num_hashes)))
+        bloom.error_rate = math.exp(-num_bits / bloom.capacity * (math.log(2) ** 2))
+        return bloom
+
+
+class ScalableBloomFilter:
+    """Bloom filter that grows with its input
+
+    A chain of ``BloomFilter``s: once the newest one is full, a filter twice
+    its size with half its error rate is added, so memory follows the number
+    of items and the overall error rate stays below ``error_rate``.
+    """
+
+    def __init__(self, initial_capacity: int = RUN_FILTER_CAPACITY, error_rate: float = 0.001):
+        self.filters: List[BloomFilter] = [BloomFilter(initial_capacity, error_rate / 2)]
+
+    def __len__(self) -> int:
+        return sum(f.count for f in self.filters)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in f for f in self.filters)
+
+    def add(self, item: str) -> bool:
+        """Add ``item``; return True if it was (probably) not present before"""
+        if item in self:
+            return False
+        newest = self.filters[-1]
+        if newest.count >= newest.capacity:
+            newest = BloomFilter(newest.capacity * 2, newest.error_rate / 2)
+            self.filters.append(newest)
+        newest.add(item)
+        return True
+
+
+class UrlIndex:
+    """Thread-safe set of canonical URLs already fetched, optionally persisted"""
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 10_000_000,
+                 error_rate: float = 0.001):
+        self.path = path
+        if path and os.path.exists(path):
+            self.bloom = BloomFilter.load(path)
+        else:
+            self.bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.bloom.count
+
+    def __contains__(self, url: str) -> bool:
+        return canonicalize_url(url) in self.bloom
+
+    def check_and_add(self, url: str) -> Tuple[str, bool]:
+        """Canonicalize ``url`` and record it; return ``(canonical, is_new)``"""
+        canonical = canonicalize_url(url)
+        with self._lock:
+            return canonical, self.bloom.add(canonical)
+
+    def mark_done(self, url: str) -> bool:
+        """Record ``url`` as successfully fetched; return True if it was new"""
+        return self.check_and_add(url)[1]
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Persist the index to ``path`` (default: the path it was opened with)"""
+        target = path or self.path
+        if not target:
+            raise ValueError("no path to save the URL index to")
+        with self._lock:
+            self.bloom.save(target)
+
+
+def dedupe(urls: Iterable[str], index: UrlIndex,
+           on_duplicate: Optional[Callable[[str], None]] = None) -> Iterator[str]:
+    """Yield each URL not yet fetched according to ``index``, once per canonical form
+
+    Nothing is added to ``index``; call ``index.mark_done(url)`` after a
+    successful fetch. Duplicates within ``urls`` are tracked in a run-local
+    filter that grows with the batch. Skipped URLs are passed to
+    ``on_duplicate``.
+    """
+    seen = ScalableBloomFilter(min(index.bloom.capacity, RUN_FILTER_CAPACITY), index.bloom.error_rate)
+    for url in urls:
+        canonical = canonicalize_url(url)
+        if canonical in index.bloom or not seen.add(canonical):
+            if on_duplicate is not None:
+                on_duplicate(url)
+            continue
+        yield url